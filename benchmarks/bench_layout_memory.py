@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Measure the memory held by Layout objects and by each raw retention mode.
+
+Run from the project root:
+
+    python -m benchmarks.bench_layout_memory --layouts 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, get_args
+
+from doc_page_extractor.adapters.unlimited import parse_unlimited_ocr_layouts
+from doc_page_extractor.types import Layout, LayoutKind, RawRetention
+
+from . import synthetic
+
+
+# 加 slots 之前的 Layout，字段与默认值保持一致
+@dataclass
+class _LegacyLayout:
+    det: tuple[int, int, int, int]
+    text: str | None
+    type: str | None = None
+    polygon: list[tuple[int, int]] | None = None
+    html: str | None = None
+    source: str | None = None
+    raw: dict[str, Any] | None = field(default=None, repr=False)
+    kind: LayoutKind = LayoutKind.UNKNOWN
+
+
+def main() -> None:
+    args = _parse_args()
+    width, height = 1654, 2339
+    layouts = synthetic.layouts(args.layouts, width, height)
+
+    print(f"{args.layouts} layouts, bytes retained after the build step")
+    print(f"{'case':<24}{'MiB':>10}{'bytes/layout':>14}")
+
+    def legacy_objects() -> object:
+        return [_copy(_LegacyLayout, layout) for layout in layouts]
+
+    def slotted_objects() -> object:
+        return [_copy(Layout, layout) for layout in layouts]
+
+    _report("Layout (dict)", legacy_objects, args.layouts)
+    _report("Layout (slots)", slotted_objects, args.layouts)
+
+    for retention in get_args(RawRetention):
+
+        def parsed(retention: RawRetention = retention) -> object:
+            # 解析结果在函数返回后释放，只有 layouts（以及它们保留的 raw）留下来
+            parse_result = synthetic.unlimited_vendor_result(args.layouts, width, height)
+            for item in parse_result["pages"][0]["layouts"]:
+                item["layout_id"] = f"layout-{id(item):x}"
+                item["confidence"] = 0.98
+            return parse_unlimited_ocr_layouts(parse_result, raw_retention=retention)
+
+        _report(f"vendor raw={retention}", parsed, args.layouts)
+
+
+def _copy(layout_class, layout: Layout):
+    # 文本等字段共享原对象，只统计 Layout 实例本身
+    return layout_class(det=layout.det, text=layout.text, kind=layout.kind)
+
+
+def _report(name: str, build: Callable[[], object], count: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        kept = build()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    retained = after - before
+    print(f"{name:<24}{retained / 2**20:>10.2f}{retained / count:>14.1f}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layouts", type=int, default=100_000, help="Layouts per case.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Compare the single-pass DeepSeek tokenizer with the previous regex parser.
+
+Run from the project root:
+
+    python -m benchmarks.bench_parser --blocks 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import timeit
+from typing import Callable
+
+from doc_page_extractor.parser import (
+    IncrementalLineBlockParser,
+    IncrementalOCRParser,
+    ParsedItemKind,
+    parse_ocr_response,
+)
+
+from . import synthetic
+
+# 单遍分词器之前的实现：标签正则 + 对每个 det 再做一次坐标正则；OCR 2 先整段搜索一次选格式
+_LEGACY_TAG_PATTERN = re.compile(r"<\|(det|ref)\|>(.+?)<\|/\1\|>")
+_LEGACY_COORDS_PATTERN = re.compile(r"\[\[(\d+),\s*(\d+),\s*(\d+),\s*(\d+)\]\]")
+_LEGACY_LINE_BLOCK_PATTERN = re.compile(
+    r"^(?P<ref>[A-Za-z_]+)\[\[(?P<x1>\d+),\s*(?P<y1>\d+),\s*(?P<x2>\d+),\s*(?P<y2>\d+)\]\]\s*$",
+    re.MULTILINE,
+)
+_WIDTH = 1654
+_HEIGHT = 2339
+
+
+def main() -> None:
+    args = _parse_args()
+    tag_response = synthetic.deepseek_tag_response(args.blocks)
+    line_response = synthetic.deepseek_line_block_response(args.blocks)
+    chunks = [tag_response[i : i + 16] for i in range(0, len(tag_response), 16)]
+
+    cases: list[tuple[str, Callable[[], object], Callable[[], object]]] = [
+        (
+            "parse_ocr_response",
+            lambda: _legacy_parse(tag_response),
+            lambda: list(parse_ocr_response(tag_response, _WIDTH, _HEIGHT)),
+        ),
+        (
+            "ocr2 tag format",
+            lambda: _legacy_ocr2(tag_response),
+            lambda: _ocr2([tag_response]),
+        ),
+        (
+            "ocr2 line blocks",
+            lambda: _legacy_ocr2(line_response),
+            lambda: _ocr2([line_response]),
+        ),
+        (
+            "16-char chunks",
+            lambda: _legacy_incremental(chunks),
+            lambda: _incremental(chunks),
+        ),
+    ]
+
+    print(f"{args.blocks} blocks, {len(tag_response)} chars, best of {args.repeat}")
+    print(f"{'case':<20}{'legacy ms':>12}{'single-pass ms':>16}{'speedup':>10}")
+    for name, legacy, current in cases:
+        legacy_seconds, current_seconds = _best_interleaved(legacy, current, args.repeat)
+        print(
+            f"{name:<20}{legacy_seconds * 1000:>12.2f}{current_seconds * 1000:>16.2f}"
+            f"{legacy_seconds / current_seconds:>9.2f}x"
+        )
+
+
+def _best_interleaved(
+    legacy: Callable[[], object], current: Callable[[], object], repeat: int
+) -> tuple[float, float]:
+    # 两种实现交替运行，机器负载的波动对双方影响相同
+    legacy_times = []
+    current_times = []
+    for _ in range(repeat):
+        legacy_times.append(timeit.timeit(legacy, number=1))
+        current_times.append(timeit.timeit(current, number=1))
+    return min(legacy_times), min(current_times)
+
+
+def _incremental(chunks: list[str]) -> list:
+    parser = IncrementalOCRParser(_WIDTH, _HEIGHT)
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items
+
+
+def _ocr2(chunks: list[str]) -> list:
+    line_blocks = IncrementalLineBlockParser(_WIDTH, _HEIGHT)
+    tags = IncrementalOCRParser(_WIDTH, _HEIGHT)
+    items: list = []
+    for chunk in chunks:
+        items.extend(line_blocks.feed(chunk))
+        if not line_blocks.detected:
+            items.extend(tags.feed(chunk))
+    items.extend(line_blocks.close())
+    if not line_blocks.detected:
+        items.extend(tags.close())
+    return items
+
+
+def _legacy_parse(response: str) -> list:
+    items: list = []
+    last_end = 0
+    for matched in _LEGACY_TAG_PATTERN.finditer(response):
+        if matched.start() > last_end:
+            items.append((ParsedItemKind.TEXT, response[last_end : matched.start()]))
+        if matched.group(1) == "ref":
+            items.append((ParsedItemKind.REF, matched.group(2)))
+        else:
+            coords = _LEGACY_COORDS_PATTERN.search(matched.group(2))
+            if coords:
+                items.append((ParsedItemKind.DET, _scaled(coords.groups())))
+        last_end = matched.end()
+    if last_end < len(response):
+        items.append((ParsedItemKind.TEXT, response[last_end:]))
+    return items
+
+
+def _legacy_ocr2(response: str) -> list:
+    if not _LEGACY_LINE_BLOCK_PATTERN.search(response):
+        return _legacy_parse(response)
+    blocks = []
+    ref, det, text_parts = None, None, []
+    for line in response.splitlines():
+        matched = _LEGACY_LINE_BLOCK_PATTERN.match(line)
+        if matched:
+            if ref is not None and det is not None:
+                blocks.append((ref, det, "\n".join(text_parts).strip("\n") or None))
+            ref = matched.group("ref")
+            det = _scaled(matched.group("x1", "y1", "x2", "y2"))
+            text_parts = []
+        elif ref is not None:
+            text_parts.append(line)
+    if ref is not None and det is not None:
+        blocks.append((ref, det, "\n".join(text_parts).strip("\n") or None))
+    return blocks
+
+
+def _legacy_incremental(chunks: list[str]) -> list:
+    # 之前的增量解析器：每个标签之后切掉缓冲区，并重新查找行首和开始标签
+    open_pattern = re.compile(r"<\|(det|ref)\|>")
+    buffer = ""
+    scan_from = 0
+    items: list = []
+
+    def drain(final: bool) -> None:
+        nonlocal buffer, scan_from
+        while True:
+            matched = _LEGACY_TAG_PATTERN.search(buffer, scan_from)
+            line_start = buffer.rfind("\n") + 1
+            if matched is None:
+                scan_from = max(scan_from, line_start)
+                return
+            if (
+                not final
+                and matched.start() >= line_start
+                and open_pattern.search(buffer, max(scan_from, line_start), matched.start())
+            ):
+                return
+            if matched.start() > 0:
+                items.append((ParsedItemKind.TEXT, buffer[: matched.start()]))
+            if matched.group(1) == "ref":
+                items.append((ParsedItemKind.REF, matched.group(2)))
+            else:
+                coords = _LEGACY_COORDS_PATTERN.search(matched.group(2))
+                if coords:
+                    items.append((ParsedItemKind.DET, _scaled(coords.groups())))
+            buffer = buffer[matched.end() :]
+            scan_from = 0
+
+    for chunk in chunks:
+        buffer += chunk
+        drain(final=False)
+    drain(final=True)
+    return items
+
+
+def _scaled(normalized) -> tuple[int, int, int, int]:
+    x1, y1, x2, y2 = (int(value) for value in normalized)
+    return (
+        round(x1 / 1000 * _WIDTH),
+        round(y1 / 1000 * _HEIGHT),
+        round(x2 / 1000 * _WIDTH),
+        round(y2 / 1000 * _HEIGHT),
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=5000, help="Blocks per response.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
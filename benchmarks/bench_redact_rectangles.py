@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Compare the monotonic-stack redaction planner with the nested-loop version.
+
+Run from the project root:
+
+    python -m benchmarks.bench_redact_rectangles --dets 200 2000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from typing import Iterable
+
+from doc_page_extractor.extractor import _PageStages
+
+from . import synthetic
+
+# 目录页扫描件的尺寸，见 tests/images/index.png
+_PAGE_SIZE = (5106, 7750)
+
+
+def main() -> None:
+    args = _parse_args()
+    width, height = _PAGE_SIZE
+    y_cutted = round(height * 2 / 3)
+    stages = _PageStages()
+
+    print(f"best of {args.repeat}, {width}x{height} page, cut at y={y_cutted}")
+    print(f"{'dets':>8}{'below cut':>11}{'nested ms':>12}{'sweep ms':>10}{'speedup':>10}")
+    for count in args.dets:
+        dets = [layout.det for layout in synthetic.layouts(count, width, height)]
+        below = sum(1 for det in dets if det[3] > y_cutted)
+        legacy = list(_nested_loop(y_cutted, dets))
+        current = list(stages._redact_button_rectangles(y_cutted, dets))
+        assert legacy == current
+
+        legacy_seconds = min(
+            timeit.repeat(lambda: list(_nested_loop(y_cutted, dets)), number=1, repeat=args.repeat)
+        )
+        current_seconds = min(
+            timeit.repeat(
+                lambda: list(stages._redact_button_rectangles(y_cutted, dets)),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(
+            f"{count:>8}{below:>11}{legacy_seconds * 1000:>12.2f}{current_seconds * 1000:>10.2f}"
+            f"{legacy_seconds / current_seconds:>9.1f}x"
+        )
+
+
+def _nested_loop(y_cutted: int, dets: Iterable[tuple[int, int, int, int]]):
+    # 单调栈之前的实现，每个区块与其后的全部区块比较
+    parts: list[tuple[int, int, int]] = []
+    for x1, _, x2, y2 in dets:
+        height = y2 - y_cutted
+        if height > 0:
+            parts.append((x1, x2, height))
+    parts.sort()
+    forbidden = -sys.maxsize
+    for i, (x1, x2, height) in enumerate(parts):
+        left = max(x1, forbidden)
+        right = x2
+        for j in range(i + 1, len(parts)):
+            nx1, _, nheight = parts[j]
+            if nheight > height:
+                right = min(right, nx1)
+        if left < right:
+            yield (left, y_cutted, right, y_cutted + height)
+            forbidden = right
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dets", type=int, nargs="+", default=[200, 2000, 10000], help="Boxes per page.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per size.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
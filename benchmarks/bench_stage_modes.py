@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Compare the redact and crop stage modes of two-stage extraction.
+
+Each page goes through a fake adapter that encodes the image it receives as PNG,
+like the vendor adapters do before uploading, and reports the second-stage
+image size, the encoded bytes and the second-stage time (redaction, cropping,
+encoding and coordinate mapping).
+
+Run from the project root:
+
+    python -m benchmarks.bench_stage_modes --images 4 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import get_args
+
+from PIL import Image
+
+from doc_page_extractor import ExtractionContext, OCRPageResult, StageMode, create_page_extractor_with_adapter
+from doc_page_extractor.adapters.images import encode_png
+
+from . import synthetic
+
+_IMAGES_DIR = Path(__file__).resolve().parent.parent / "tests" / "images"
+# 第一阶段识别出的正文占页面上方 85%，下方留给页脚
+_BODY_RATE = 0.85
+
+
+def main() -> None:
+    args = _parse_args()
+    pages = _pages(args.images)
+
+    print(f"two stages, best of {args.repeat}; second-stage image, PNG upload and time")
+    print(f"{'page':<24}{'mode':<8}{'stage 2 image':>15}{'pixels':>9}{'PNG KiB':>10}{'stage 2 ms':>12}")
+    totals = {mode: [0, 0, 0.0] for mode in get_args(StageMode)}
+    for name, image in pages:
+        for mode in get_args(StageMode):
+            adapter = _EncodingAdapter(args.layouts)
+            extractor = create_page_extractor_with_adapter(adapter, stage_mode=mode)  # type: ignore[arg-type]
+
+            def second_stage_seconds(extractor=extractor, image=image) -> float:
+                context = ExtractionContext(check_aborted=lambda: False)
+                results = list(extractor.extract_page_results(image, size="gundam", stages=2, context=context))
+                return results[-1][1].timings["total"]
+
+            seconds = min(second_stage_seconds() for _ in range(args.repeat))
+            width, height = adapter.sizes[-1]
+            share = width * height / (image.size[0] * image.size[1])
+            totals[mode][0] += width * height
+            totals[mode][1] += adapter.encoded_bytes[-1]
+            totals[mode][2] += seconds
+            print(
+                f"{name:<24}{mode:<8}{f'{width}x{height}':>15}{share:>8.0%}"
+                f"{adapter.encoded_bytes[-1] / 1024:>10.1f}{seconds * 1000:>12.1f}"
+            )
+
+    redact_pixels, redact_bytes, redact_seconds = totals["redact"]
+    crop_pixels, crop_bytes, crop_seconds = totals["crop"]
+    print(
+        f"crop / redact: {crop_pixels / redact_pixels:.0%} of the stage-2 pixels, "
+        f"{crop_bytes / redact_bytes:.0%} of the stage-2 PNG bytes, "
+        f"{crop_seconds / redact_seconds:.0%} of the time"
+    )
+
+
+class _EncodingAdapter:
+    """第一阶段返回覆盖正文的合成版面，第二阶段不返回版面；每次都把收到的图片编码成 PNG。"""
+
+    allows_multi_stage = True
+
+    def __init__(self, layouts: int) -> None:
+        self._layouts = layouts
+        self.sizes: list[tuple[int, int]] = []
+        self.encoded_bytes: list[int] = []
+
+    def download(self, revision: str | None) -> None:
+        del revision
+
+    def load(self) -> None:
+        pass
+
+    def extract_page(self, *args, **kwargs) -> OCRPageResult:
+        raise NotImplementedError
+
+    def extract_page_image(self, prompt, image, output_path, size, context, device_number) -> OCRPageResult:
+        del prompt, output_path, size, context, device_number
+        first_stage = len(self.sizes) % 2 == 0
+        self.sizes.append(image.size)
+        self.encoded_bytes.append(len(encode_png(image)))
+        width, height = image.size
+        layouts = synthetic.layouts(self._layouts, width, round(height * _BODY_RATE)) if first_stage else []
+        return OCRPageResult(layouts=layouts, source="benchmark")
+
+
+def _pages(limit: int | None) -> list[tuple[str, Image.Image]]:
+    pages = [("synthetic-1654x2339", synthetic.page(1654, 2339))]
+    for path in sorted(_IMAGES_DIR.glob("*.png"))[:limit]:
+        with Image.open(path) as image:
+            pages.append((path.name, image.convert("RGB")))
+    return pages
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=None, help="Use only the first N images in tests/images.")
+    parser.add_argument("--layouts", type=int, default=60, help="Layouts found by the first stage.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per page and mode.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
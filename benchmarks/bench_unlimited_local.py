@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Compare the Unlimited OCR local coordinate scanner with the ast.literal_eval parser.
+
+Run from the project root:
+
+    python -m benchmarks.bench_unlimited_local --blocks 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import re
+import timeit
+from typing import Callable
+
+from doc_page_extractor.adapters.unlimited import _parse_local_dets, parse_unlimited_ocr_local_layouts
+from doc_page_extractor.structure import unlimited_ocr_type_to_kind
+from doc_page_extractor.types import Layout
+
+from . import synthetic
+
+# 快速扫描器之前的实现：先把所有匹配放进列表，再对每个坐标串调用 ast.literal_eval
+_LEGACY_DET_PATTERN = re.compile(
+    r"<\|det\|>\s*"
+    r"(?P<type>[A-Za-z_][\w-]*)"
+    r"(?P<coords>[\s\S]*?)"
+    r"\s*<\|/det\|>",
+)
+
+
+class _Image:
+    size = (1654, 2339)
+
+
+def main() -> None:
+    args = _parse_args()
+    single = synthetic.unlimited_local_response(args.blocks, boxes_per_det=1)
+    multi = synthetic.unlimited_local_response(args.blocks, boxes_per_det=3)
+    coords = [matched.group("coords") for matched in _LEGACY_DET_PATTERN.finditer(multi)]
+    cases: list[tuple[str, Callable[[], object], Callable[[], object]]] = [
+        (
+            "coords only",
+            lambda: [_legacy_dets(raw, 1654, 2339) for raw in coords],
+            lambda: [_parse_local_dets(raw, 1654, 2339) for raw in coords],
+        ),
+        (
+            "single box",
+            lambda: _legacy_parse(_Image(), single),
+            lambda: parse_unlimited_ocr_local_layouts(_Image(), single),
+        ),
+        (
+            "three boxes",
+            lambda: _legacy_parse(_Image(), multi),
+            lambda: parse_unlimited_ocr_local_layouts(_Image(), multi),
+        ),
+    ]
+    for _, legacy, current in cases:
+        assert legacy() == current()
+
+    print(f"{args.blocks} dets, best of {args.repeat}")
+    print(f"{'case':<16}{'literal_eval ms':>16}{'scanner ms':>12}{'speedup':>10}")
+    for name, legacy, current in cases:
+        legacy_times = []
+        current_times = []
+        for _ in range(args.repeat):
+            legacy_times.append(timeit.timeit(legacy, number=1))
+            current_times.append(timeit.timeit(current, number=1))
+        legacy_seconds = min(legacy_times)
+        current_seconds = min(current_times)
+        print(
+            f"{name:<16}{legacy_seconds * 1000:>16.2f}{current_seconds * 1000:>12.2f}"
+            f"{legacy_seconds / current_seconds:>9.2f}x"
+        )
+
+
+def _legacy_parse(image, response: str) -> list[Layout]:
+    width, height = image.size
+    layouts: list[Layout] = []
+    matches = list(_LEGACY_DET_PATTERN.finditer(response))
+    for index, matched in enumerate(matches):
+        next_start = matches[index + 1].start() if index + 1 < len(matches) else len(response)
+        layout_type = matched.group("type")
+        text = response[matched.end():next_start].strip("\n") or None
+        for det in _legacy_dets(matched.group("coords"), width, height):
+            layouts.append(
+                Layout(
+                    det=det,
+                    text=text,
+                    kind=unlimited_ocr_type_to_kind(layout_type, text),
+                    type=layout_type,
+                    source="unlimited-ocr",
+                    raw={"type": layout_type, "coords": matched.group("coords")},
+                )
+            )
+    return layouts
+
+
+def _legacy_dets(raw_coords: str, width: int, height: int) -> list[tuple[int, int, int, int]]:
+    raw_coords = raw_coords.strip()
+    if not raw_coords:
+        return []
+    try:
+        parsed = ast.literal_eval(raw_coords)
+    except (SyntaxError, ValueError):
+        return []
+    if not isinstance(parsed, list):
+        return []
+    dets = []
+    for box in parsed if parsed and isinstance(parsed[0], list) else [parsed]:
+        if not isinstance(box, list) or len(box) < 4:
+            continue
+        try:
+            x1, y1, x2, y2 = [float(part) for part in box[:4]]
+        except (TypeError, ValueError):
+            continue
+        det = (
+            round(x1 / 999 * width),
+            round(y1 / 999 * height),
+            round(x2 / 999 * width),
+            round(y2 / 999 * height),
+        )
+        if det[2] > det[0] and det[3] > det[1]:
+            dets.append(det)
+    return dets
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=5000, help="Dets per response.")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed runs per case.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
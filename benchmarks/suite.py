@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Benchmark the CPU-side work around OCR inference and report machine-readable results.
+
+Run from the project root:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --quick --filter parse
+
+Every case is timed call by call until both --min-seconds and --min-iterations are
+reached, then run once more under tracemalloc. The JSON report lists ops/sec, mean,
+p50 and p99 latency, and peak memory per case. Peak memory counts allocations made
+through Python's allocators; Pillow's pixel buffers are allocated outside them, so
+for image cases it covers the Python-side overhead only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from PIL import Image
+
+from doc_page_extractor import ExtractionContext, Layout, OCRPageResult, PageExtractor
+from doc_page_extractor.adapters.deepseek import parse_deepseek_ocr2_layouts, parse_deepseek_ocr_layouts
+from doc_page_extractor.adapters.unlimited import (
+    parse_unlimited_ocr_layouts,
+    parse_unlimited_ocr_local_layouts,
+)
+from doc_page_extractor.extractor import _PageStages, create_page_extractor_with_adapter
+from doc_page_extractor.parser import parse_ocr_response
+from doc_page_extractor.plot import plot
+from doc_page_extractor.redacter import background_color, redact
+from doc_page_extractor.structure import build_structured_page
+
+from . import synthetic
+
+SCHEMA_VERSION = 1
+_IMAGES_DIR = Path(__file__).resolve().parents[1] / "tests" / "images"
+# A4 300 dpi
+_LARGE_PAGE_SIZE = (2480, 3508)
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    input: str
+    run: Callable[[], object]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    input: str
+    iterations: int
+    total_seconds: float
+    ops_per_sec: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_bytes: int
+
+
+def main() -> None:
+    args = _parse_args()
+    cases = [
+        case
+        for case in build_cases(quick=args.quick)
+        if not args.filter or any(pattern in case.name for pattern in args.filter)
+    ]
+    results = []
+    for case in cases:
+        result = measure(case, min_seconds=args.min_seconds, min_iterations=args.min_iterations)
+        results.append(result)
+        print(
+            f"{result.name:<44}{result.input:<24}{result.ops_per_sec:>12.1f} ops/s"
+            f"{result.p50_ms:>10.3f} ms p50{result.p99_ms:>10.3f} ms p99"
+            f"{result.peak_memory_bytes / 1024:>10.0f} KiB",
+            file=sys.stderr,
+        )
+
+    report = json.dumps(build_report(results, quick=args.quick), indent=2, ensure_ascii=False)
+    if args.output is None:
+        print(report)
+    else:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+
+
+def measure(
+    case: BenchmarkCase,
+    min_seconds: float = 1.0,
+    min_iterations: int = 5,
+    max_iterations: int = 100_000,
+) -> BenchmarkResult:
+    case.run()  # 预热：导入、正则编译、字体加载等一次性开销不计入
+    samples: list[float] = []
+    started = time.perf_counter()
+    while len(samples) < max_iterations and (
+        len(samples) < min_iterations or time.perf_counter() - started < min_seconds
+    ):
+        call_started = time.perf_counter()
+        case.run()
+        samples.append(time.perf_counter() - call_started)
+
+    total = sum(samples)
+    samples.sort()
+    return BenchmarkResult(
+        name=case.name,
+        input=case.input,
+        iterations=len(samples),
+        total_seconds=total,
+        ops_per_sec=len(samples) / total if total > 0 else math.inf,
+        mean_ms=total / len(samples) * 1000,
+        p50_ms=_percentile(samples, 50) * 1000,
+        p99_ms=_percentile(samples, 99) * 1000,
+        peak_memory_bytes=_peak_memory(case.run),
+    )
+
+
+def build_report(results: Iterable[BenchmarkResult], quick: bool = False) -> dict[str, Any]:
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "results": [asdict(result) for result in results],
+    }
+
+
+def build_cases(quick: bool = False) -> list[BenchmarkCase]:
+    # quick 只用一张样例页和较小的合成输入，用于冒烟测试
+    blocks = 200 if quick else 5000
+    dets = [200] if quick else [200, 2000]
+    images = _sample_images(limit=1 if quick else None)
+    width, height = (620, 877) if quick else _LARGE_PAGE_SIZE
+    pages = images + [(f"synthetic-{width}x{height}", synthetic.page(width, height))]
+    cases: list[BenchmarkCase] = []
+    cases.extend(_parser_cases(blocks))
+    cases.extend(_structure_cases(blocks))
+    cases.extend(_redact_rectangle_cases(dets))
+    for input_name, image in pages:
+        cases.extend(_image_cases(input_name, image))
+    return cases
+
+
+def _parser_cases(blocks: int) -> list[BenchmarkCase]:
+    page = _SizedImage(*_LARGE_PAGE_SIZE)
+    input_name = f"synthetic-{blocks}-blocks"
+    tag_response = synthetic.deepseek_tag_response(blocks)
+    line_block_response = synthetic.deepseek_line_block_response(blocks)
+    local_response = synthetic.unlimited_local_response(blocks)
+    vendor_result = synthetic.unlimited_vendor_result(blocks, *_LARGE_PAGE_SIZE)
+    return [
+        BenchmarkCase(
+            "parser.parse_ocr_response",
+            input_name,
+            lambda: list(parse_ocr_response(tag_response, *_LARGE_PAGE_SIZE)),
+        ),
+        BenchmarkCase(
+            "deepseek.parse_ocr_layouts",
+            input_name,
+            lambda: parse_deepseek_ocr_layouts(page, tag_response),
+        ),
+        BenchmarkCase(
+            "deepseek.parse_ocr2_layouts[tags]",
+            input_name,
+            lambda: parse_deepseek_ocr2_layouts(page, tag_response),
+        ),
+        BenchmarkCase(
+            "deepseek.parse_ocr2_layouts[lines]",
+            input_name,
+            lambda: parse_deepseek_ocr2_layouts(page, line_block_response),
+        ),
+        BenchmarkCase(
+            "unlimited.parse_layouts",
+            input_name,
+            lambda: parse_unlimited_ocr_layouts(vendor_result),
+        ),
+        BenchmarkCase(
+            "unlimited.parse_local_layouts",
+            input_name,
+            lambda: parse_unlimited_ocr_local_layouts(page, local_response),
+        ),
+    ]
+
+
+def _structure_cases(blocks: int) -> list[BenchmarkCase]:
+    layouts = synthetic.layouts(blocks, *_LARGE_PAGE_SIZE)
+    return [
+        BenchmarkCase(
+            "structure.build_structured_page",
+            f"synthetic-{blocks}-layouts",
+            lambda: build_structured_page(layouts),
+        )
+    ]
+
+
+def _redact_rectangle_cases(counts: list[int]) -> list[BenchmarkCase]:
+    width, height = _LARGE_PAGE_SIZE
+    stages = _PageStages()
+    y_cutted = round(height * 2 / 3)
+    cases = []
+    for count in counts:
+        dets = [layout.det for layout in synthetic.layouts(count, width, height)]
+        cases.append(
+            BenchmarkCase(
+                "extractor._redact_button_rectangles",
+                f"synthetic-{count}-dets",
+                lambda dets=dets: list(stages._redact_button_rectangles(y_cutted, dets)),
+            )
+        )
+    return cases
+
+
+def _image_cases(input_name: str, image: Image.Image) -> list[BenchmarkCase]:
+    layouts = synthetic.layouts(60, *image.size)
+    rectangles = list(_PageStages()._redact_rectangles(image, (layout.det for layout in layouts)))
+    canvas = image.convert("RGB")
+    extractor = create_page_extractor_with_adapter(_FakeAdapter(synthetic.deepseek_tag_response(60)))
+    crop_extractor = create_page_extractor_with_adapter(
+        _FakeAdapter(synthetic.deepseek_tag_response(60)), stage_mode="crop"
+    )
+    context = ExtractionContext(check_aborted=lambda: False)
+
+    def extract_page(extractor: PageExtractor = extractor) -> None:
+        for _ in extractor.extract_page_results(image, size="gundam", stages=2, context=context):
+            pass
+
+    return [
+        BenchmarkCase("redacter.background_color", input_name, lambda: background_color(image)),
+        BenchmarkCase(
+            "redacter.redact",
+            input_name,
+            lambda: redact(canvas, fill_color=(255, 255, 255), rectangles=rectangles),
+        ),
+        BenchmarkCase("plot.plot", input_name, lambda: plot(canvas, layouts)),
+        BenchmarkCase("extractor.extract_page_results[2 stages]", input_name, extract_page),
+        BenchmarkCase(
+            "extractor.extract_page_results[2 stages, crop]",
+            input_name,
+            lambda: extract_page(crop_extractor),
+        ),
+    ]
+
+
+class _SizedImage:
+    def __init__(self, width: int, height: int) -> None:
+        self.size = (width, height)
+
+
+class _FakeAdapter:
+    """不做推理的 adapter：每次都解析同一段 DeepSeek 输出，只留下抽取器自身的开销。"""
+
+    allows_multi_stage = True
+
+    def __init__(self, response: str) -> None:
+        self._response = response
+
+    def download(self, revision: str | None) -> None:
+        del revision
+
+    def load(self) -> None:
+        pass
+
+    def extract_page(self, *args, **kwargs) -> OCRPageResult:
+        raise NotImplementedError
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: Image.Image,
+        output_path: Path,
+        size: str,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        del prompt, output_path, size, context, device_number
+        layouts: list[Layout] = parse_deepseek_ocr_layouts(image, self._response, source="benchmark")
+        return OCRPageResult(layouts=layouts, source="benchmark", raw_text=self._response)
+
+
+def _sample_images(limit: int | None) -> list[tuple[str, Image.Image]]:
+    paths = sorted(_IMAGES_DIR.glob("*.png"))[:limit]
+    images = []
+    for path in paths:
+        with Image.open(path) as image:
+            image.load()
+            images.append((path.name, image.copy()))
+    return images
+
+
+def _percentile(sorted_samples: list[float], percent: float) -> float:
+    # 最近秩法，样本少时 p99 就是最大值
+    rank = math.ceil(percent / 100 * len(sorted_samples))
+    return sorted_samples[max(rank, 1) - 1]
+
+
+def _peak_memory(run: Callable[[], object]) -> int:
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return max(peak - baseline, 0)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument(
+        "--filter",
+        action="append",
+        help="Only run cases whose name contains this text. Repeatable.",
+    )
+    parser.add_argument("--quick", action="store_true", help="One sample page and small inputs.")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum timed seconds per case.")
+    parser.add_argument("--min-iterations", type=int, default=5, help="Minimum timed calls per case.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Synthetic model responses and pages for the benchmarks.
+
+Coordinates follow the models' normalized 0-999 grid, so the same response can be
+parsed against any page size.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from PIL import Image, ImageDraw
+
+from doc_page_extractor import Layout
+from doc_page_extractor.types import LayoutKind
+
+DEEPSEEK_LABELS = ["title", "text", "text", "text", "table", "image", "image_caption", "footnote"]
+UNLIMITED_TYPES = ["title", "text", "text", "text", "table", "image", "page_footnote", "page_number"]
+_KINDS = [
+    LayoutKind.TITLE,
+    LayoutKind.TEXT,
+    LayoutKind.TEXT,
+    LayoutKind.TABLE,
+    LayoutKind.IMAGE,
+    LayoutKind.IMAGE_CAPTION,
+    LayoutKind.FOOTNOTE,
+    LayoutKind.PAGE_NUMBER,
+]
+
+
+def normalized_box(index: int, row_height: int = 9) -> tuple[int, int, int, int]:
+    # 固定的伪随机分布，块在页面上错落排布，高度按 row_height 计
+    x1 = index * 37 % 500
+    y1 = index * 997 % (999 - row_height)
+    return x1, y1, x1 + 400, y1 + row_height
+
+
+def body_text(index: int) -> str:
+    return f"第 {index} 段正文，包含一些 **markdown** 与数字 {index * 31}。"
+
+
+def deepseek_tag_response(blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        x1, y1, x2, y2 = normalized_box(i)
+        label = DEEPSEEK_LABELS[i % len(DEEPSEEK_LABELS)]
+        parts.append(
+            f"<|ref|>{label}<|/ref|><|det|>[[{x1}, {y1}, {x2}, {y2}]]<|/det|>\n{body_text(i)}\n\n"
+        )
+    return "".join(parts)
+
+
+def deepseek_line_block_response(blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        x1, y1, x2, y2 = normalized_box(i)
+        label = DEEPSEEK_LABELS[i % len(DEEPSEEK_LABELS)]
+        parts.append(f"{label}[[{x1}, {y1}, {x2}, {y2}]]\n{body_text(i)}\n\n")
+    return "".join(parts)
+
+
+def unlimited_local_response(blocks: int, boxes_per_det: int = 1) -> str:
+    parts = []
+    for i in range(blocks):
+        boxes = [
+            f"[{x1}, {y1}, {x2}, {y2}]"
+            for x1, y1, x2, y2 in (normalized_box(i * boxes_per_det + j, 40) for j in range(boxes_per_det))
+        ]
+        coords = boxes[0] if boxes_per_det == 1 else f"[{', '.join(boxes)}]"
+        layout_type = UNLIMITED_TYPES[i % len(UNLIMITED_TYPES)]
+        parts.append(f"<|det|>{layout_type} {coords}<|/det|>{body_text(i)}\n")
+    return "".join(parts)
+
+
+def unlimited_vendor_result(blocks: int, width: int, height: int) -> dict[str, Any]:
+    items: list[dict[str, Any]] = []
+    for i in range(blocks):
+        x1, y1, x2, y2 = _scaled(normalized_box(i), width, height)
+        item: dict[str, Any] = {
+            "type": UNLIMITED_TYPES[i % len(UNLIMITED_TYPES)],
+            "text": body_text(i),
+        }
+        # 一半给 position，一半只给 polygon，两种坐标都会被解析到
+        if i % 2:
+            item["position"] = [x1, y1, x2 - x1, y2 - y1]
+        else:
+            item["polygon"] = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+        items.append(item)
+    return {"file_name": "page.png", "pages": [{"layouts": items}]}
+
+
+def layouts(count: int, width: int, height: int) -> list[Layout]:
+    return [
+        Layout(
+            det=_scaled(normalized_box(i), width, height),
+            text=body_text(i),
+            kind=_KINDS[i % len(_KINDS)],
+        )
+        for i in range(count)
+    ]
+
+
+def page(width: int, height: int, lines: int = 60) -> Image.Image:
+    # 米黄色纸张上的深灰色文字行，背景色取中位数时结果是纸张颜色
+    image = Image.new("RGB", (width, height), (246, 242, 230))
+    draw = ImageDraw.Draw(image)
+    margin = width // 10
+    line_height = max(1, height // (lines * 2))
+    for line in range(lines):
+        y = margin + line * line_height * 2
+        if y + line_height > height - margin:
+            break
+        right = width - margin - (line * 131 % (width // 4))
+        draw.rectangle((margin, y, right, y + line_height), fill=(40, 40, 40))
+    return image
+
+
+def _scaled(
+    box: tuple[int, int, int, int], width: int, height: int
+) -> tuple[int, int, int, int]:
+    x1, y1, x2, y2 = box
+    return (
+        round(x1 / 1000 * width),
+        round(y1 / 1000 * height),
+        round(x2 / 1000 * width),
+        round(y2 / 1000 * height),
+    )
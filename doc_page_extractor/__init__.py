@@ -4,44 +4,97 @@ __version__ = "1.2.0"
 
 _LAZY_EXPORTS = {
     "AbortError": ("extraction_context", "AbortError"),
+    "AsyncDeepSeekOCR2VendorAdapter": ("adapters", "AsyncDeepSeekOCR2VendorAdapter"),
+    "AsyncDeepSeekOCRVendorAdapter": ("adapters", "AsyncDeepSeekOCRVendorAdapter"),
+    "AsyncOCRAdapter": ("types", "AsyncOCRAdapter"),
+    "AsyncPageExtractor": ("types", "AsyncPageExtractor"),
+    "AsyncUnlimitedOCRVendorAdapter": ("adapters", "AsyncUnlimitedOCRVendorAdapter"),
+    "AsyncVendorHTTPClient": ("adapters", "AsyncVendorHTTPClient"),
+    "CacheStats": ("cache", "CacheStats"),
+    "CachedOCRAdapter": ("cache", "CachedOCRAdapter"),
     "DeepSeekOCR2VendorAdapter": ("adapters", "DeepSeekOCR2VendorAdapter"),
     "DeepSeekOCR2VendorConfig": ("adapters", "DeepSeekOCR2VendorConfig"),
     "DeepSeekBackend": ("types", "DeepSeekBackend"),
     "DeepSeekOCRSize": ("types", "DeepSeekOCRSize"),
     "DeepSeekOCRVendorAdapter": ("adapters", "DeepSeekOCRVendorAdapter"),
     "DeepSeekOCRVendorConfig": ("adapters", "DeepSeekOCRVendorConfig"),
+    "DeviceScheduler": ("scheduler", "DeviceScheduler"),
+    "DirectoryResultStore": ("cache", "DirectoryResultStore"),
     "ExtractionAbortedError": ("extraction_context", "ExtractionAbortedError"),
     "ExtractionContext": ("types", "ExtractionContext"),
+    "ImageEncodingConfig": ("adapters", "ImageEncodingConfig"),
+    "ImageOCRAdapter": ("types", "ImageOCRAdapter"),
+    "InMemoryTracer": ("tracing", "InMemoryTracer"),
+    "JSONLinesTracer": ("tracing", "JSONLinesTracer"),
     "Layout": ("types", "Layout"),
+    "LazyRaw": ("raw_retention", "LazyRaw"),
+    "MemoryResultStore": ("cache", "MemoryResultStore"),
+    "MetricsRegistry": ("metrics", "MetricsRegistry"),
+    "MetricsTracer": ("metrics", "MetricsTracer"),
+    "MultiTracer": ("tracing", "MultiTracer"),
+    "NoopTracer": ("tracing", "NoopTracer"),
+    "OCRResultStore": ("cache", "OCRResultStore"),
     "LayoutKind": ("types", "LayoutKind"),
+    "LayoutBatch": ("layout_batch", "LayoutBatch"),
     "OCRAdapter": ("types", "OCRAdapter"),
     "OCRPageResult": ("types", "OCRPageResult"),
     "PageBlock": ("types", "PageBlock"),
     "PageExtractor": ("types", "PageExtractor"),
+    "RawRetention": ("types", "RawRetention"),
+    "SQLiteResultStore": ("cache", "SQLiteResultStore"),
+    "SpatialIndex": ("geometry", "SpatialIndex"),
+    "Span": ("tracing", "Span"),
+    "StageMode": ("types", "StageMode"),
+    "StreamingOCRAdapter": ("types", "StreamingOCRAdapter"),
     "StructuredPage": ("types", "StructuredPage"),
     "TokenLimitError": ("extraction_context", "TokenLimitError"),
+    "Tracer": ("tracing", "Tracer"),
     "UnlimitedModelOCRAdapter": ("adapters", "UnlimitedModelOCRAdapter"),
     "UnlimitedOCRVendorAdapter": ("adapters", "UnlimitedOCRVendorAdapter"),
     "UnlimitedOCRVendorConfig": ("adapters", "UnlimitedOCRVendorConfig"),
+    "create_async_deepseek_ocr2_vendor_page_extractor": (
+        "async_extractor",
+        "create_async_deepseek_ocr2_vendor_page_extractor",
+    ),
+    "create_async_deepseek_ocr_vendor_page_extractor": (
+        "async_extractor",
+        "create_async_deepseek_ocr_vendor_page_extractor",
+    ),
+    "create_async_page_extractor_with_adapter": ("async_extractor", "create_async_page_extractor_with_adapter"),
+    "create_async_unlimited_ocr_vendor_page_extractor": (
+        "async_extractor",
+        "create_async_unlimited_ocr_vendor_page_extractor",
+    ),
     "create_deepseek_ocr_page_extractor": ("extractor", "create_deepseek_ocr_page_extractor"),
     "create_page_extractor_with_adapter": ("extractor", "create_page_extractor_with_adapter"),
     "create_deepseek_ocr2_vendor_page_extractor": ("extractor", "create_deepseek_ocr2_vendor_page_extractor"),
     "create_deepseek_ocr_vendor_page_extractor": ("extractor", "create_deepseek_ocr_vendor_page_extractor"),
     "create_unlimited_ocr_page_extractor": ("extractor", "create_unlimited_ocr_page_extractor"),
     "create_unlimited_ocr_vendor_page_extractor": ("extractor", "create_unlimited_ocr_vendor_page_extractor"),
+    "extract_document": ("document", "extract_document"),
     "plot": ("plot", "plot"),
+    "render_prometheus": ("metrics", "render_prometheus"),
 }
 
 __all__ = [
     "plot",
+    "extract_document",
     "create_deepseek_ocr_page_extractor",
     "create_page_extractor_with_adapter",
     "create_deepseek_ocr_vendor_page_extractor",
     "create_deepseek_ocr2_vendor_page_extractor",
     "create_unlimited_ocr_page_extractor",
     "create_unlimited_ocr_vendor_page_extractor",
+    "create_async_page_extractor_with_adapter",
+    "create_async_deepseek_ocr_vendor_page_extractor",
+    "create_async_deepseek_ocr2_vendor_page_extractor",
+    "create_async_unlimited_ocr_vendor_page_extractor",
     "PageExtractor",
+    "AsyncPageExtractor",
     "OCRAdapter",
+    "ImageOCRAdapter",
+    "StreamingOCRAdapter",
+    "AsyncOCRAdapter",
     "OCRPageResult",
     "DeepSeekOCRSize",
     "DeepSeekBackend",
@@ -52,14 +105,40 @@ __all__ = [
     "UnlimitedOCRVendorConfig",
     "UnlimitedOCRVendorAdapter",
     "UnlimitedModelOCRAdapter",
+    "ImageEncodingConfig",
+    "DeviceScheduler",
+    "CachedOCRAdapter",
+    "CacheStats",
+    "OCRResultStore",
+    "MemoryResultStore",
+    "SQLiteResultStore",
+    "DirectoryResultStore",
+    "AsyncDeepSeekOCRVendorAdapter",
+    "AsyncDeepSeekOCR2VendorAdapter",
+    "AsyncUnlimitedOCRVendorAdapter",
+    "AsyncVendorHTTPClient",
     "ExtractionContext",
     "AbortError",
     "ExtractionAbortedError",
     "TokenLimitError",
+    "Tracer",
+    "Span",
+    "NoopTracer",
+    "InMemoryTracer",
+    "JSONLinesTracer",
+    "MultiTracer",
+    "MetricsRegistry",
+    "MetricsTracer",
+    "render_prometheus",
     "Layout",
     "LayoutKind",
+    "LayoutBatch",
+    "SpatialIndex",
     "PageBlock",
     "StructuredPage",
+    "RawRetention",
+    "LazyRaw",
+    "StageMode",
 ]
 
 
@@ -1,10 +1,15 @@
 # pylint: disable=undefined-all-variable
 
 _LAZY_EXPORTS = {
+    "AsyncDeepSeekOCR2VendorAdapter": ("deepseek", "AsyncDeepSeekOCR2VendorAdapter"),
+    "AsyncDeepSeekOCRVendorAdapter": ("deepseek", "AsyncDeepSeekOCRVendorAdapter"),
+    "AsyncUnlimitedOCRVendorAdapter": ("unlimited", "AsyncUnlimitedOCRVendorAdapter"),
+    "AsyncVendorHTTPClient": ("http_client", "AsyncVendorHTTPClient"),
     "DeepSeekOCR2VendorAdapter": ("deepseek", "DeepSeekOCR2VendorAdapter"),
     "DeepSeekOCR2VendorConfig": ("deepseek", "DeepSeekOCR2VendorConfig"),
     "DeepSeekOCRVendorAdapter": ("deepseek", "DeepSeekOCRVendorAdapter"),
     "DeepSeekOCRVendorConfig": ("deepseek", "DeepSeekOCRVendorConfig"),
+    "ImageEncodingConfig": ("images", "ImageEncodingConfig"),
     "UnlimitedModelOCRAdapter": ("unlimited", "UnlimitedModelOCRAdapter"),
     "UnlimitedOCRVendorAdapter": ("unlimited", "UnlimitedOCRVendorAdapter"),
     "UnlimitedOCRVendorConfig": ("unlimited", "UnlimitedOCRVendorConfig"),
@@ -12,13 +17,20 @@ _LAZY_EXPORTS = {
     "parse_unlimited_ocr_local_layouts": ("unlimited", "parse_unlimited_ocr_local_layouts"),
     "parse_deepseek_ocr2_layouts": ("deepseek", "parse_deepseek_ocr2_layouts"),
     "parse_deepseek_ocr_layouts": ("deepseek", "parse_deepseek_ocr_layouts"),
+    "stream_deepseek_ocr2_layouts": ("deepseek", "stream_deepseek_ocr2_layouts"),
+    "stream_deepseek_ocr_layouts": ("deepseek", "stream_deepseek_ocr_layouts"),
 }
 
 __all__ = [
+    "AsyncDeepSeekOCR2VendorAdapter",
+    "AsyncDeepSeekOCRVendorAdapter",
+    "AsyncUnlimitedOCRVendorAdapter",
+    "AsyncVendorHTTPClient",
     "DeepSeekOCR2VendorAdapter",
     "DeepSeekOCR2VendorConfig",
     "DeepSeekOCRVendorAdapter",
     "DeepSeekOCRVendorConfig",
+    "ImageEncodingConfig",
     "UnlimitedModelOCRAdapter",
     "UnlimitedOCRVendorAdapter",
     "UnlimitedOCRVendorConfig",
@@ -26,6 +38,8 @@ __all__ = [
     "parse_unlimited_ocr_local_layouts",
     "parse_deepseek_ocr2_layouts",
     "parse_deepseek_ocr_layouts",
+    "stream_deepseek_ocr2_layouts",
+    "stream_deepseek_ocr_layouts",
 ]
 
 
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+
+@dataclass
+class _CachedToken:
+    value: str
+    # 墙上时钟时间，便于多个进程通过文件共享
+    expires_at: float | None
+
+
+class AccessTokenCache:
+    """OAuth access token 的缓存，记录过期时间并在过期前提前失效。
+
+    设置 path 后 token 同时写入本地 JSON 文件，同一台机器上的其他 worker 进程
+    可以直接复用，不必各自再请求一次。文件按 key 区分不同账号，只保存 token，
+    不保存密钥。本类只负责存取，单飞刷新由 adapter 在锁内完成。
+    多个进程对文件的读取、修改和替换通过旁路锁文件（path + ".lock"）上的 flock 串行化。
+    """
+
+    def __init__(
+        self,
+        key: str,
+        path: Path | str | None = None,
+        refresh_margin_seconds: float = 300,
+    ) -> None:
+        self._key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        self._path = Path(path) if path is not None else None
+        self._refresh_margin_seconds = refresh_margin_seconds
+        self._lock = threading.Lock()
+        self._token: _CachedToken | None = None
+
+    def current(self) -> str | None:
+        with self._lock:
+            if self._token is None or not self._is_fresh(self._token):
+                self._token = self._read_file()
+            if self._token is not None and self._is_fresh(self._token):
+                return self._token.value
+            return None
+
+    def store(self, value: str, expires_in: float | None) -> None:
+        expires_at = time.time() + expires_in if expires_in else None
+        with self._lock:
+            self._token = _CachedToken(value=value, expires_at=expires_at)
+
+            def update(data: dict[str, Any]) -> None:
+                data[self._key] = {"access_token": value, "expires_at": expires_at}
+
+            self._update_file(update)
+
+    def invalidate(self, value: str) -> None:
+        # 只作废调用方用过的那个 token，避免把其他线程或进程刚刷新的新 token 丢掉
+        with self._lock:
+            if self._token is not None and self._token.value == value:
+                self._token = None
+
+            def update(data: dict[str, Any]) -> None:
+                entry = data.get(self._key)
+                if isinstance(entry, dict) and entry.get("access_token") == value:
+                    del data[self._key]
+
+            self._update_file(update)
+
+    def _is_fresh(self, token: _CachedToken) -> bool:
+        if token.expires_at is None:
+            return True
+        return time.time() < token.expires_at - self._refresh_margin_seconds
+
+    def _read_file(self) -> _CachedToken | None:
+        if self._path is None:
+            return None
+        try:
+            entry = json.loads(self._path.read_text(encoding="utf-8")).get(self._key)
+        except (OSError, ValueError, AttributeError):
+            return None
+        if not isinstance(entry, dict) or not entry.get("access_token"):
+            return None
+        token = _CachedToken(
+            value=str(entry["access_token"]),
+            expires_at=entry.get("expires_at"),
+        )
+        return token if self._is_fresh(token) else None
+
+    def _update_file(self, update: Callable[[dict[str, Any]], None]) -> None:
+        if self._path is None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock():
+            try:
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+                if not isinstance(data, dict):
+                    data = {}
+            except (OSError, ValueError):
+                data = {}
+            update(data)
+
+            temp_path = self._path.with_name(
+                f".{self._path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            # token 是凭据，只允许当前用户读写
+            file_descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temp_path, self._path)
+
+    @contextmanager
+    def _file_lock(self) -> Generator[None, None, None]:
+        # 锁加在旁路文件上：token 文件本身会被 os.replace 换掉，不能作为锁
+        assert self._path is not None
+        if os.name != "posix":
+            # 没有 fcntl 的平台只在进程内串行化
+            yield
+            return
+        import fcntl
+
+        lock_path = self._path.with_name(f"{self._path.name}.lock")
+        file_descriptor = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(file_descriptor)
@@ -1,23 +1,35 @@
+import asyncio
 import base64
 import json
-import re
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable, Generator, Protocol, cast
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Mapping, Protocol, cast
 
-from ..parser import ParsedItemKind, parse_ocr_response
+from ..extraction_context import (
+    AbortError,
+    ExtractionAbortedError,
+    TokenLimitError,
+    raise_if_aborted,
+)
+from ..parser import (
+    IncrementalLineBlockParser,
+    IncrementalOCRParser,
+    LineBlock,
+    ParsedItem,
+    ParsedItemKind,
+    parse_ocr_response,
+)
 from ..structure import build_structured_page, deepseek_ref_to_kind
+from ..timings import add_timing, timed
 from ..types import DeepSeekOCRSize, ExtractionContext, Layout, LayoutKind, OCRPageResult
+from .http_client import AsyncVendorHTTPClient, VendorHTTPClient
+from .images import EncodedImage, ImageEncodingConfig, encode_upload, temporary_image_file
 
 _DEFAULT_VENDOR_MAX_TOKENS = 8000
-_LINE_BLOCK_PATTERN = re.compile(
-    r"^(?P<ref>[A-Za-z_]+)\[\[(?P<x1>\d+),\s*(?P<y1>\d+),\s*(?P<x2>\d+),\s*(?P<y2>\d+)\]\]\s*$",
-    re.MULTILINE,
-)
 
 if TYPE_CHECKING:
     from PIL import Image
-    import requests
 
 
 class _ImageLike(Protocol):
@@ -25,6 +37,7 @@ class _ImageLike(Protocol):
 
 
 DeepSeekLayoutParser = Callable[[_ImageLike, str, str], list[Layout]]
+DeepSeekLayoutStreamParser = Callable[[_ImageLike, Iterable[str], str], Iterable[Layout]]
 
 
 class _LocalDeepSeekModel(Protocol):
@@ -45,6 +58,17 @@ class _LocalDeepSeekModel(Protocol):
     ) -> str:
         ...
 
+    def generate_stream(
+        self,
+        prompt: str,
+        image_path: Path,
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> Iterable[str]:
+        ...
+
 
 def parse_deepseek_ocr_layouts(
     image: _ImageLike, response: str, source: str = "deepseek-ocr-vendor"
@@ -56,14 +80,41 @@ def parse_deepseek_ocr_layouts(
     ]
 
 
+def stream_deepseek_ocr_layouts(
+    image: _ImageLike, chunks: Iterable[str], source: str = "deepseek-ocr"
+) -> Generator[Layout, None, None]:
+    """边接收模型输出的文本块边产出 Layout，结果与 parse_deepseek_ocr_layouts 相同。"""
+    width, height = image.size
+    parser = IncrementalOCRParser(width, height)
+
+    def items() -> Generator[ParsedItem, None, None]:
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+    for label, det, text in _deepseek_ocr_blocks(items()):
+        if _has_area(det):
+            yield _deepseek_layout(label=label, det=det, text=text, source=source)
+
+
 def parse_deepseek_ocr2_layouts(
     image: _ImageLike, response: str, source: str = "deepseek-ocr2-vendor"
 ) -> list[Layout]:
-    return [
-        _deepseek_layout(label=label, det=det, text=text, source=source)
-        for label, det, text in _parse_deepseek_ocr2_response(image, response)
-        if _has_area(det)
-    ]
+    return list(stream_deepseek_ocr2_layouts(image, (response,), source))
+
+
+def stream_deepseek_ocr2_layouts(
+    image: _ImageLike, chunks: Iterable[str], source: str = "deepseek-ocr2"
+) -> Generator[Layout, None, None]:
+    """DeepSeek OCR 2 的流式解析，结果与 parse_deepseek_ocr2_layouts 相同。
+
+    一旦出现行块格式就边接收边产出；如果始终是标签格式，要到文本结束才能确定，
+    届时一次性产出。
+    """
+    width, height = image.size
+    for label, det, text in _deepseek_ocr2_blocks(chunks, width, height):
+        if _has_area(det):
+            yield _deepseek_layout(label=label, det=det, text=text, source=source)
 
 
 def _deepseek_layout(
@@ -91,10 +142,12 @@ class _DeepSeekLocalAdapter:
         model: _LocalDeepSeekModel,
         source: str = "deepseek-ocr",
         parse_layouts: DeepSeekLayoutParser = parse_deepseek_ocr_layouts,
+        stream_layouts: DeepSeekLayoutStreamParser | None = stream_deepseek_ocr_layouts,
     ) -> None:
         self._model = model
         self._source = source
         self._parse_layouts = parse_layouts
+        self._stream_layouts = stream_layouts
 
     def download(self, revision: str | None) -> None:
         self._model.download(revision)
@@ -111,24 +164,68 @@ class _DeepSeekLocalAdapter:
         context: ExtractionContext | None,
         device_number: int | None,
     ) -> OCRPageResult:
-        response = self._model.generate(
-            prompt=prompt,
-            image_path=image_path,
-            output_path=output_path,
-            size=size,
-            context=context,
-            device_number=device_number,
-        )
+        timings: dict[str, float] = {}
+        with timed(timings, "inference"):
+            response = self._model.generate(
+                prompt=prompt,
+                image_path=image_path,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
         from PIL import Image
 
         with Image.open(image_path) as image:
-            layouts = self._parse_layouts(image, response, self._source)
-        return OCRPageResult(
-            layouts=layouts,
-            source=self._source,
-            structured=build_structured_page(layouts),
-            raw_text=response,
-        )
+            return _page_result(image, response, self._source, self._parse_layouts, timings)
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        with temporary_image_file(image, output_path) as image_path:
+            add_timing(timings, "encode", time.perf_counter() - started)
+            with timed(timings, "inference"):
+                response = self._model.generate(
+                    prompt=prompt,
+                    image_path=image_path,
+                    output_path=output_path,
+                    size=size,
+                    context=context,
+                    device_number=device_number,
+                )
+        return _page_result(image, response, self._source, self._parse_layouts, timings)
+
+    def stream_page_layouts(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> Generator[Layout, None, None]:
+        with temporary_image_file(image, output_path) as image_path:
+            chunks = self._model.generate_stream(
+                prompt=prompt,
+                image_path=image_path,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
+            if self._stream_layouts is None:
+                # 输出格式要看到完整文本才能确定，只能在生成结束后一次性解析
+                yield from self._parse_layouts(image, "".join(chunks), self._source)
+            else:
+                yield from self._stream_layouts(image, chunks, self._source)
 
 
 @dataclass
@@ -140,6 +237,12 @@ class DeepSeekOCRVendorConfig:
     top_p: float | None = None
     max_tokens: int = _DEFAULT_VENDOR_MAX_TOKENS
     timeout_seconds: int = 180
+    pool_size: int = 10
+    keep_alive: bool = True
+    max_retries: int = 0
+    retry_backoff_seconds: float = 0.5
+    stream: bool = False
+    encoding: ImageEncodingConfig = field(default_factory=ImageEncodingConfig)
 
 
 @dataclass
@@ -151,13 +254,34 @@ class DeepSeekOCR2VendorConfig:
     top_p: float | None = None
     max_tokens: int = _DEFAULT_VENDOR_MAX_TOKENS
     timeout_seconds: int = 180
+    pool_size: int = 10
+    keep_alive: bool = True
+    max_retries: int = 0
+    retry_backoff_seconds: float = 0.5
+    stream: bool = False
+    encoding: ImageEncodingConfig = field(default_factory=ImageEncodingConfig)
 
 
-class DeepSeekOCRVendorAdapter:
+class _DeepSeekVendorAdapter:
     allows_multi_stage = True
+    _source: str
+    _user_agent: str
+    _parse_layouts: DeepSeekLayoutParser
+    _stream_layouts: DeepSeekLayoutStreamParser | None
 
-    def __init__(self, config: DeepSeekOCRVendorConfig) -> None:
+    def __init__(self, config: DeepSeekOCRVendorConfig | DeepSeekOCR2VendorConfig) -> None:
         self._config = config
+        self._http = VendorHTTPClient.from_config(config)
+
+    @property
+    def max_image_side(self) -> Mapping[DeepSeekOCRSize, int] | None:
+        return self._config.encoding.max_image_side
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
 
     def download(self, revision: str | None) -> None:
         del revision
@@ -165,6 +289,9 @@ class DeepSeekOCRVendorAdapter:
     def load(self) -> None:
         pass
 
+    def close(self) -> None:
+        self._http.close()
+
     def extract_page(
         self,
         prompt: str,
@@ -175,162 +302,403 @@ class DeepSeekOCRVendorAdapter:
         device_number: int | None,
     ) -> OCRPageResult:
         del output_path, size, device_number
-        payload: dict[str, Any] = {
-            "model": self._config.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": _data_url(image_path)},
-                        },
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            ],
-            "max_tokens": self._config.max_tokens,
-            "stream": False,
-        }
-        if self._config.temperature is not None:
-            payload["temperature"] = self._config.temperature
-        if self._config.top_p is not None:
-            payload["top_p"] = self._config.top_p
-
-        import requests
-
-        response = requests.post(
-            _vendor_chat_completions_url(self._config.base_url),
-            headers={
-                "Authorization": f"Bearer {self._config.api_key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "User-Agent": "doc-page-extractor-deepseek-ocr-vendor/1.0",
-            },
+        from PIL import Image
+
+        with Image.open(image_path) as image:
+            encoded = encode_upload(image, self._config.encoding, image_path.read_bytes())
+            return self._extract(prompt, encoded, image, context)
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        del output_path, size, device_number
+        return self._extract(prompt, encode_upload(image, self._config.encoding), image, context)
+
+    def stream_page_layouts(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> Generator[Layout, None, None]:
+        del output_path, size, device_number
+        response = self._post(prompt, encode_upload(image, self._config.encoding), stream=True)
+        try:
+            if response.status_code >= 400:
+                _raise_vendor_error(response)
+            chunks = _chat_completion_stream_chunks(response, context, usage={})
+            if self._stream_layouts is None:
+                yield from self._parse_layouts(image, "".join(chunks), self._source)
+            else:
+                yield from self._stream_layouts(image, chunks, self._source)
+        finally:
+            response.close()
+
+    def _extract(
+        self,
+        prompt: str,
+        encoded: EncodedImage,
+        image: _ImageLike,
+        context: ExtractionContext | None,
+    ) -> OCRPageResult:
+        started = time.perf_counter()
+        response = self._post(prompt, encoded, stream=self._config.stream)
+        request_seconds = time.perf_counter() - started
+        upload = encoded.upload_report(response_seconds=request_seconds)
+        timings = {"encode": encoded.encode_seconds, "request": request_seconds}
+        if self._config.stream:
+            page_result = _chat_completion_stream_page_result(
+                response, image, context, self._source, self._parse_layouts, timings
+            )
+        else:
+            page_result = _chat_completion_page_result(
+                response, image, context, self._source, self._parse_layouts, timings
+            )
+        page_result.raw = {**(page_result.raw or {}), "upload": upload}
+        return page_result
+
+    def _post(self, prompt: str, encoded: EncodedImage, stream: bool) -> Any:
+        url, headers, payload = _chat_completion_request(
+            self._config, prompt, encoded, self._user_agent, stream
+        )
+        return self._http.post(
+            url,
+            headers=headers,
             json=payload,
             timeout=self._config.timeout_seconds,
+            stream=stream,
         )
-        if response.status_code >= 400:
-            _raise_vendor_error(response)
 
-        data = response.json()
-        usage = data.get("usage") or {}
-        if context is not None:
-            context.input_tokens += int(usage.get("prompt_tokens") or 0)
-            context.output_tokens += int(usage.get("completion_tokens") or 0)
 
-        choices = data.get("choices") or []
-        raw_text = ""
-        if choices:
-            raw_text = str((choices[0].get("message") or {}).get("content") or "")
+class DeepSeekOCRVendorAdapter(_DeepSeekVendorAdapter):
+    _source = "deepseek-ocr-vendor"
+    _user_agent = "doc-page-extractor-deepseek-ocr-vendor/1.0"
+    _parse_layouts = staticmethod(parse_deepseek_ocr_layouts)
+    _stream_layouts = staticmethod(stream_deepseek_ocr_layouts)
 
-        from PIL import Image
+    def __init__(self, config: DeepSeekOCRVendorConfig) -> None:
+        super().__init__(config)
 
-        with Image.open(image_path) as image:
-            layouts = parse_deepseek_ocr_layouts(
-                image, raw_text, source="deepseek-ocr-vendor"
-            )
-        return OCRPageResult(
-            layouts=layouts,
-            source="deepseek-ocr-vendor",
-            structured=build_structured_page(layouts),
-            raw_text=raw_text,
-            raw={"usage": usage},
-        )
 
+class DeepSeekOCR2VendorAdapter(_DeepSeekVendorAdapter):
+    _source = "deepseek-ocr2-vendor"
+    _user_agent = "doc-page-extractor-deepseek-ocr2-vendor/1.0"
+    _parse_layouts = staticmethod(parse_deepseek_ocr2_layouts)
+    _stream_layouts = staticmethod(stream_deepseek_ocr2_layouts)
 
-class DeepSeekOCR2VendorAdapter:
+    def __init__(self, config: DeepSeekOCR2VendorConfig) -> None:
+        super().__init__(config)
+
+
+class _AsyncDeepSeekVendorAdapter:
     allows_multi_stage = True
+    _source: str
+    _user_agent: str
+    _parse_layouts: DeepSeekLayoutParser
 
-    def __init__(self, config: DeepSeekOCR2VendorConfig) -> None:
+    def __init__(
+        self,
+        config: DeepSeekOCRVendorConfig | DeepSeekOCR2VendorConfig,
+        client: AsyncVendorHTTPClient | None = None,
+    ) -> None:
         self._config = config
+        self._owns_client = client is None
+        self._client = client or AsyncVendorHTTPClient.from_config(config)
 
-    def download(self, revision: str | None) -> None:
-        del revision
+    @property
+    def max_image_side(self) -> Mapping[DeepSeekOCRSize, int] | None:
+        return self._config.encoding.max_image_side
 
-    def load(self) -> None:
-        pass
+    async def __aenter__(self):
+        return self
 
-    def extract_page(
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def extract_page_image(
         self,
         prompt: str,
-        image_path: Path,
-        output_path: Path,
+        image: "Image.Image",
         size: DeepSeekOCRSize,
         context: ExtractionContext | None,
-        device_number: int | None,
     ) -> OCRPageResult:
-        del output_path, size, device_number
-        payload: dict[str, Any] = {
-            "model": self._config.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": _data_url(image_path)},
-                        },
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            ],
-            "max_tokens": self._config.max_tokens,
-            "stream": False,
-        }
-        if self._config.temperature is not None:
-            payload["temperature"] = self._config.temperature
-        if self._config.top_p is not None:
-            payload["top_p"] = self._config.top_p
-
-        import requests
-
-        response = requests.post(
-            _vendor_chat_completions_url(self._config.base_url),
-            headers={
-                "Authorization": f"Bearer {self._config.api_key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "User-Agent": "doc-page-extractor-deepseek-ocr2-vendor/1.0",
-            },
+        del size
+        raise_if_aborted(context)
+        encoded = await asyncio.to_thread(encode_upload, image, self._config.encoding)
+        stream = self._config.stream
+        url, headers, payload = _chat_completion_request(
+            self._config, prompt, encoded, self._user_agent, stream
+        )
+        started = time.perf_counter()
+        response = await self._client.post(
+            url,
+            context=context,
+            headers=headers,
             json=payload,
             timeout=self._config.timeout_seconds,
+            stream=stream,
         )
+        request_seconds = time.perf_counter() - started
+        upload = encoded.upload_report(response_seconds=request_seconds)
+        timings = {"encode": encoded.encode_seconds, "request": request_seconds}
+        if stream:
+            # 逐块读取事件流是阻塞的，放到线程中进行，块与块之间仍会检查中断
+            page_result = await asyncio.to_thread(
+                _chat_completion_stream_page_result,
+                response,
+                image,
+                context,
+                self._source,
+                self._parse_layouts,
+                timings,
+            )
+        else:
+            page_result = _chat_completion_page_result(
+                response, image, context, self._source, self._parse_layouts, timings
+            )
+        page_result.raw = {**(page_result.raw or {}), "upload": upload}
+        return page_result
+
+
+class AsyncDeepSeekOCRVendorAdapter(_AsyncDeepSeekVendorAdapter):
+    _source = "deepseek-ocr-vendor"
+    _user_agent = "doc-page-extractor-deepseek-ocr-vendor/1.0"
+    _parse_layouts = staticmethod(parse_deepseek_ocr_layouts)
+
+    def __init__(
+        self,
+        config: DeepSeekOCRVendorConfig,
+        client: AsyncVendorHTTPClient | None = None,
+    ) -> None:
+        super().__init__(config, client)
+
+
+class AsyncDeepSeekOCR2VendorAdapter(_AsyncDeepSeekVendorAdapter):
+    _source = "deepseek-ocr2-vendor"
+    _user_agent = "doc-page-extractor-deepseek-ocr2-vendor/1.0"
+    _parse_layouts = staticmethod(parse_deepseek_ocr2_layouts)
+
+    def __init__(
+        self,
+        config: DeepSeekOCR2VendorConfig,
+        client: AsyncVendorHTTPClient | None = None,
+    ) -> None:
+        super().__init__(config, client)
+
+
+def _chat_completion_request(
+    config: DeepSeekOCRVendorConfig | DeepSeekOCR2VendorConfig,
+    prompt: str,
+    encoded: EncodedImage,
+    user_agent: str,
+    stream: bool = False,
+) -> tuple[str, dict[str, str], dict[str, Any]]:
+    payload: dict[str, Any] = {
+        "model": config.model,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": _data_url(encoded)},
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ],
+        "max_tokens": config.max_tokens,
+        "stream": stream,
+    }
+    if stream:
+        payload["stream_options"] = {"include_usage": True}
+    if config.temperature is not None:
+        payload["temperature"] = config.temperature
+    if config.top_p is not None:
+        payload["top_p"] = config.top_p
+
+    headers = {
+        "Authorization": f"Bearer {config.api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream" if stream else "application/json",
+        "User-Agent": user_agent,
+    }
+    return _vendor_chat_completions_url(config.base_url), headers, payload
+
+
+def _chat_completion_page_result(
+    response: Any,
+    image: _ImageLike,
+    context: ExtractionContext | None,
+    source: str,
+    parse_layouts: DeepSeekLayoutParser,
+    timings: dict[str, float],
+) -> OCRPageResult:
+    if response.status_code >= 400:
+        _raise_vendor_error(response)
+
+    data = response.json()
+    usage = data.get("usage") or {}
+    if context is not None:
+        context.input_tokens += int(usage.get("prompt_tokens") or 0)
+        context.output_tokens += int(usage.get("completion_tokens") or 0)
+
+    choices = data.get("choices") or []
+    raw_text = ""
+    if choices:
+        raw_text = str((choices[0].get("message") or {}).get("content") or "")
+
+    page_result = _page_result(image, raw_text, source, parse_layouts, timings)
+    page_result.raw = {"usage": usage}
+    return page_result
+
+
+def _chat_completion_stream_page_result(
+    response: Any,
+    image: _ImageLike,
+    context: ExtractionContext | None,
+    source: str,
+    parse_layouts: DeepSeekLayoutParser,
+    timings: dict[str, float],
+) -> OCRPageResult:
+    try:
         if response.status_code >= 400:
             _raise_vendor_error(response)
+        usage: dict[str, Any] = {}
+        with timed(timings, "stream"):
+            raw_text = "".join(_chat_completion_stream_chunks(response, context, usage))
+    finally:
+        response.close()
 
-        data = response.json()
-        usage = data.get("usage") or {}
-        if context is not None:
-            context.input_tokens += int(usage.get("prompt_tokens") or 0)
-            context.output_tokens += int(usage.get("completion_tokens") or 0)
+    page_result = _page_result(image, raw_text, source, parse_layouts, timings)
+    page_result.raw = {"usage": usage}
+    return page_result
 
-        choices = data.get("choices") or []
-        raw_text = ""
-        if choices:
-            raw_text = str((choices[0].get("message") or {}).get("content") or "")
 
-        from PIL import Image
+def _page_result(
+    image: _ImageLike,
+    raw_text: str,
+    source: str,
+    parse_layouts: DeepSeekLayoutParser,
+    timings: dict[str, float],
+) -> OCRPageResult:
+    with timed(timings, "parse"):
+        layouts = parse_layouts(image, raw_text, source)
+    with timed(timings, "structure"):
+        structured = build_structured_page(layouts)
+    return OCRPageResult(
+        layouts=layouts,
+        source=source,
+        structured=structured,
+        raw_text=raw_text,
+        timings=timings,
+    )
 
-        with Image.open(image_path) as image:
-            layouts = parse_deepseek_ocr2_layouts(image, raw_text)
-        return OCRPageResult(
-            layouts=layouts,
-            source="deepseek-ocr2-vendor",
-            structured=build_structured_page(layouts),
-            raw_text=raw_text,
-            raw={"usage": usage},
-        )
+
+def _chat_completion_stream_chunks(
+    response: Any,
+    context: ExtractionContext | None,
+    usage: dict[str, Any],
+) -> Generator[str, None, None]:
+    """逐个产出 OpenAI-style SSE 中的文本增量。
+
+    每个事件之后检查 check_aborted 和 token 上限；服务端没有返回实时 usage 时，
+    按收到的文本增量数估算已生成的 token 数。中断时关闭连接，不再等待剩余输出。
+    用量随事件写入 context。
+    """
+    output_limit = _remaining_output_tokens(context)
+    deltas = 0
+    charged = [0, 0]  # 已经写入 context 的 input / output token
+    error: ExtractionAbortedError | None = None
+    try:
+        # chunk_size=None：数据到达即处理，不等凑满固定大小的缓冲区
+        for line in response.iter_lines(chunk_size=None):
+            if not line or not line.startswith(b"data:"):
+                continue
+            data = line[len(b"data:") :].strip()
+            if data == b"[DONE]":
+                break
+            event = json.loads(data)
+            if event.get("usage"):
+                usage.update(event["usage"])
+            for choice in event.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    deltas += 1
+                    yield content
+
+            output_tokens = int(usage.get("completion_tokens") or deltas)
+            _charge_usage(context, usage, deltas, charged)
+            if output_limit is not None and output_tokens > output_limit:
+                error = TokenLimitError()
+                break
+            if context is not None and context.check_aborted():
+                error = AbortError()
+                break
+    finally:
+        _charge_usage(context, usage, deltas, charged)
+
+    if error is not None:
+        response.close()
+        if context is not None:
+            error.input_tokens = context.input_tokens
+            error.output_tokens = context.output_tokens
+        raise error
+
+
+def _charge_usage(
+    context: ExtractionContext | None,
+    usage: dict[str, Any],
+    deltas: int,
+    charged: list[int],
+) -> None:
+    # 每个事件之后把新增的用量写入 context，共享额度的调用方（extract_document）可以随时看到
+    if context is None:
+        return
+    input_tokens = int(usage.get("prompt_tokens") or 0)
+    output_tokens = int(usage.get("completion_tokens") or deltas)
+    context.input_tokens += input_tokens - charged[0]
+    context.output_tokens += output_tokens - charged[1]
+    charged[:] = (input_tokens, output_tokens)
+
+
+def _remaining_output_tokens(context: ExtractionContext | None) -> int | None:
+    if context is None:
+        return None
+    limits: list[int] = []
+    if context.max_tokens is not None:
+        limits.append(context.max_tokens - context.input_tokens - context.output_tokens)
+    if context.max_output_tokens is not None:
+        limits.append(context.max_output_tokens - context.output_tokens)
+    return min(limits) if limits else None
 
 
 def _parse_deepseek_ocr_response(
     image: _ImageLike, response: str
-) -> Generator[tuple[str, tuple[int, int, int, int], str | None], None, None]:
+) -> Generator[LineBlock, None, None]:
     width, height = image.size
+    yield from _deepseek_ocr_blocks(parse_ocr_response(response, width, height))
+
+
+def _deepseek_ocr_blocks(
+    items: Iterable[ParsedItem],
+) -> Generator[LineBlock, None, None]:
     det: tuple[int, int, int, int] | None = None
     ref: str | None = None
 
-    for kind, content in parse_ocr_response(response, width, height):
+    for kind, content in items:
         if kind == ParsedItemKind.TEXT:
             if det is not None and ref is not None:
                 yield ref, det, cast(str, content)
@@ -348,54 +716,21 @@ def _parse_deepseek_ocr_response(
         yield ref, det, None
 
 
-def _parse_deepseek_ocr2_response(
-    image: _ImageLike, response: str
-) -> Generator[tuple[str, tuple[int, int, int, int], str | None], None, None]:
-    if not _LINE_BLOCK_PATTERN.search(response):
-        yield from _parse_deepseek_ocr_response(image, response)
-        return
-
-    yield from _parse_deepseek_ocr2_line_blocks(image, response)
-
-
-def _parse_deepseek_ocr2_line_blocks(
-    image: _ImageLike,
-    response: str,
-) -> Generator[tuple[str, tuple[int, int, int, int], str | None], None, None]:
-    width, height = image.size
-    ref: str | None = None
-    det: tuple[int, int, int, int] | None = None
-    text_parts: list[str] = []
-
-    def flush() -> Generator[tuple[str, tuple[int, int, int, int], str | None], None, None]:
-        nonlocal ref, det, text_parts
-        if ref is not None and det is not None:
-            text = "\n".join(text_parts).strip("\n") or None
-            yield ref, det, text
-        ref = None
-        det = None
-        text_parts = []
-
-    for line in response.splitlines():
-        matched = _LINE_BLOCK_PATTERN.match(line)
-        if matched:
-            yield from flush()
-            ref = matched.group("ref")
-            x1_norm = int(matched.group("x1"))
-            y1_norm = int(matched.group("y1"))
-            x2_norm = int(matched.group("x2"))
-            y2_norm = int(matched.group("y2"))
-            det = (
-                round(x1_norm / 1000 * width),
-                round(y1_norm / 1000 * height),
-                round(x2_norm / 1000 * width),
-                round(y2_norm / 1000 * height),
-            )
-            continue
-        if ref is not None and det is not None:
-            text_parts.append(line)
-
-    yield from flush()
+def _deepseek_ocr2_blocks(
+    chunks: Iterable[str], width: int, height: int
+) -> Generator[LineBlock, None, None]:
+    # 两种格式在同一遍中解析；确认是行块格式后不再为标签格式分词
+    line_blocks = IncrementalLineBlockParser(width, height)
+    tags = IncrementalOCRParser(width, height)
+    tag_items: list[ParsedItem] = []
+    for chunk in chunks:
+        yield from line_blocks.feed(chunk)
+        if not line_blocks.detected:
+            tag_items.extend(tags.feed(chunk))
+    yield from line_blocks.close()
+    if not line_blocks.detected:
+        tag_items.extend(tags.close())
+        yield from _deepseek_ocr_blocks(tag_items)
 
 
 def _has_area(det: tuple[int, int, int, int]) -> bool:
@@ -413,9 +748,9 @@ def _vendor_chat_completions_url(base_url: str) -> str:
     return f"{normalized}/v1/chat/completions"
 
 
-def _data_url(image_path: Path) -> str:
-    encoded = base64.b64encode(image_path.read_bytes()).decode("ascii")
-    return f"data:image/png;base64,{encoded}"
+def _data_url(encoded: EncodedImage) -> str:
+    data = base64.b64encode(encoded.data).decode("ascii")
+    return f"data:{encoded.config.mime_type};base64,{data}"
 
 
 def _raise_vendor_error(response: Any) -> None:
@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from ..extraction_context import abort_error, raise_if_aborted
+from ..tracing import span
+from ..types import ExtractionContext
+
+if TYPE_CHECKING:
+    import requests
+
+_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# 服务端可能已经处理过的请求只能在这些方法上按状态码重放
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+_ABORT_CHECK_INTERVAL_SECONDS = 0.2
+
+
+class VendorHTTPClient:
+    """Vendor adapter 持有的连接池。
+
+    requests.Session 在首次请求时才创建，之后各线程共享同一个 urllib3 连接池；
+    会话创建后不再修改其状态，因此可以被多个线程并发使用。
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        max_retries: int = 0,
+        retry_backoff_seconds: float = 0.5,
+    ) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._max_retries = max_retries
+        self._retry_backoff_seconds = retry_backoff_seconds
+        self._lock = threading.Lock()
+        self._session: "requests.Session | None" = None
+
+    @classmethod
+    def from_config(cls, config: Any) -> "VendorHTTPClient":
+        return cls(
+            pool_size=config.pool_size,
+            keep_alive=config.keep_alive,
+            max_retries=config.max_retries,
+            retry_backoff_seconds=config.retry_backoff_seconds,
+        )
+
+    def post(self, url: str, **kwargs: Any) -> "requests.Response":
+        with _http_span("POST", url) as current:
+            response = self._get_session().post(url, **kwargs)
+            current.set(status=response.status_code)
+            return response
+
+    def get(self, url: str, **kwargs: Any) -> "requests.Response":
+        with _http_span("GET", url) as current:
+            response = self._get_session().get(url, **kwargs)
+            current.set(status=response.status_code)
+            return response
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _get_session(self) -> "requests.Session":
+        session = self._session
+        if session is not None:
+            return session
+
+        with self._lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+
+    def _create_session(self) -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # 连接失败时任何方法都重试；读超时不重试，避免重复提交同一页。
+        # GET 遇到 429/5xx 重试；POST 只在 429 且带 Retry-After 时重试，
+        # 5xx 时服务端可能已经创建了任务或开始计费，重放会重复提交。
+        # 重试耗尽后返回最后一次响应，由 adapter 统一处理错误
+        retry = _retry_class()(
+            total=self._max_retries,
+            read=0,
+            backoff_factor=self._retry_backoff_seconds,
+            status_forcelist=_RETRY_STATUS_CODES,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        http_adapter = HTTPAdapter(
+            pool_connections=self._pool_size,
+            pool_maxsize=self._pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("http://", http_adapter)
+        session.mount("https://", http_adapter)
+        if not self._keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+
+class AsyncVendorHTTPClient:
+    """多个异步 vendor adapter 共享的 HTTP 客户端。
+
+    请求仍由 VendorHTTPClient 的连接池发出，在有界线程池中执行；
+    asyncio.Semaphore 限制同时在途的请求数。等待响应期间会定期检查
+    ExtractionContext.check_aborted，中断时立即抛出 AbortError 并放弃该响应；
+    已经在线程中发出的请求无法中断，它结束之前一直占用信号量，
+    所以反复中断也不会让在途请求超过 max_concurrency。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        keep_alive: bool = True,
+        max_retries: int = 0,
+        retry_backoff_seconds: float = 0.5,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._http = VendorHTTPClient(
+            pool_size=max_concurrency,
+            keep_alive=keep_alive,
+            max_retries=max_retries,
+            retry_backoff_seconds=retry_backoff_seconds,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="doc-page-extractor-http",
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @classmethod
+    def from_config(cls, config: Any) -> "AsyncVendorHTTPClient":
+        return cls(
+            max_concurrency=config.pool_size,
+            keep_alive=config.keep_alive,
+            max_retries=config.max_retries,
+            retry_backoff_seconds=config.retry_backoff_seconds,
+        )
+
+    async def __aenter__(self) -> "AsyncVendorHTTPClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def post(
+        self, url: str, context: ExtractionContext | None = None, **kwargs: Any
+    ) -> "requests.Response":
+        return await self._request("POST", self._http.post, url, context, kwargs)
+
+    async def get(
+        self, url: str, context: ExtractionContext | None = None, **kwargs: Any
+    ) -> "requests.Response":
+        return await self._request("GET", self._http.get, url, context, kwargs)
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
+
+    async def _request(
+        self,
+        method: str,
+        send: Any,
+        url: str,
+        context: ExtractionContext | None,
+        kwargs: dict[str, Any],
+    ) -> "requests.Response":
+        # 线程池中的请求看不到协程的当前 span，span 在这里记录，包含等待信号量的时间
+        with _http_span(method, url) as current:
+            await self._semaphore.acquire()
+            release = True
+            try:
+                raise_if_aborted(context)
+                pending = self._executor.submit(send, url, **kwargs)
+                future = asyncio.wrap_future(pending)
+                if context is not None:
+                    while not future.done():
+                        await asyncio.wait({future}, timeout=_ABORT_CHECK_INTERVAL_SECONDS)
+                        if not future.done() and context.check_aborted():
+                            # 尚未开始的请求会被取消；已经开始的请求结束后才归还信号量
+                            future.cancel()
+                            release = False
+                            loop = asyncio.get_running_loop()
+                            pending.add_done_callback(functools.partial(_release_abandoned, loop, self._semaphore))
+                            raise abort_error(context)
+                response = await future
+            finally:
+                if release:
+                    self._semaphore.release()
+            current.set(status=response.status_code)
+            return response
+
+
+def _release_abandoned(
+    loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore, pending: Future
+) -> None:
+    # 在执行请求的线程中调用：关闭被放弃的响应，把连接还给连接池，再回到事件循环归还信号量
+    if not pending.cancelled() and pending.exception() is None:
+        pending.result().close()
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        pass  # 事件循环已经关闭，信号量也不会再被使用
+
+
+@functools.cache
+def _retry_class():
+    from urllib3.util.retry import Retry
+
+    class _VendorRetry(Retry):
+        def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+            if method.upper() in _IDEMPOTENT_METHODS:
+                return super().is_retry(method, status_code, has_retry_after)
+            return bool(self.total) and has_retry_after and status_code == 429
+
+    return _VendorRetry
+
+
+def _http_span(method: str, url: str):
+    # 查询参数可能带有 access_token，不写入 span
+    return span("http.request", method=method, url=url.split("?", 1)[0])
@@ -0,0 +1,164 @@
+import io
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generator, Literal, Mapping, Sequence
+
+from ..types import DeepSeekOCRSize
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# format -> (PIL 格式名, MIME 类型, 文件扩展名)
+_UPLOAD_FORMATS = {
+    "png": ("PNG", "image/png", "png"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+
+
+@dataclass(frozen=True)
+class ImageEncodingConfig:
+    """供应商 adapter 上传页面图片时的编码方式。
+
+    默认与以前一致：RGB 无损 PNG。单色扫描件可以用 grayscale 或 bilevel 大幅减小
+    请求体；jpeg/webp 按 quality 有损压缩。max_image_side 按 size 预设限制上传图片
+    的最长边，由抽取器缩小图片并把坐标换算回原图，未列出的预设不限制。
+    """
+
+    format: Literal["png", "jpeg", "webp"] = "png"
+    quality: int = 90
+    png_compress_level: int = 6
+    color_mode: Literal["rgb", "grayscale", "bilevel"] = "rgb"
+    bilevel_threshold: int = 128
+    max_image_side: Mapping[DeepSeekOCRSize, int] | None = None
+
+    def __post_init__(self) -> None:
+        if self.format not in _UPLOAD_FORMATS:
+            raise ValueError(f"unsupported upload format: {self.format}")
+        if self.color_mode not in ("rgb", "grayscale", "bilevel"):
+            raise ValueError(f"unsupported color mode: {self.color_mode}")
+        if not 1 <= self.quality <= 100:
+            raise ValueError("quality must be between 1 and 100")
+        if not 0 <= self.png_compress_level <= 9:
+            raise ValueError("png_compress_level must be between 0 and 9")
+
+    @property
+    def mime_type(self) -> str:
+        return _UPLOAD_FORMATS[self.format][1]
+
+    @property
+    def file_name(self) -> str:
+        return f"page.{_UPLOAD_FORMATS[self.format][2]}"
+
+    @property
+    def is_default(self) -> bool:
+        # 与 encode_png 写出的文件相同（PIL 默认 compress_level 为 6），才能直接复用
+        return self.format == "png" and self.color_mode == "rgb" and self.png_compress_level == 6
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    config: ImageEncodingConfig
+    encode_seconds: float
+
+    def upload_report(
+        self,
+        response_seconds: float | None = None,
+        submit_seconds: float | None = None,
+    ) -> dict[str, Any]:
+        # 写入 OCRPageResult.raw["upload"]，用于比较不同编码的请求体大小和耗时。
+        # 两种请求测量的范围不同，用不同的字段名，避免跨供应商直接比较：
+        # response_seconds  DeepSeek 从发送请求到收到响应（包含服务端推理；流式时到响应头为止）
+        # submit_seconds    Unlimited 提交任务请求，到返回任务 ID 为止
+        report: dict[str, Any] = {
+            "format": self.config.format,
+            "color_mode": self.config.color_mode,
+            "bytes": len(self.data),
+            "encode_seconds": self.encode_seconds,
+        }
+        if response_seconds is not None:
+            report["response_seconds"] = response_seconds
+        if submit_seconds is not None:
+            report["submit_seconds"] = submit_seconds
+        return report
+
+
+def encode_upload(
+    image: "Image.Image",
+    config: ImageEncodingConfig,
+    source_bytes: bytes | None = None,
+) -> EncodedImage:
+    """按上传配置编码页面图片。默认配置下直接复用已经写好的 PNG 字节。"""
+    started = time.perf_counter()
+    if source_bytes is not None and config.is_default:
+        return EncodedImage(source_bytes, config, time.perf_counter() - started)
+
+    if config.color_mode == "grayscale":
+        image = image.convert("L")
+    elif config.color_mode == "bilevel":
+        threshold = config.bilevel_threshold
+        image = image.convert("L").point(lambda value: 255 if value >= threshold else 0, mode="1")
+    elif config.format != "png" and image.mode != "RGB":
+        image = image.convert("RGB")
+
+    pil_format = _UPLOAD_FORMATS[config.format][0]
+    options: dict[str, Any] = {}
+    if config.format == "png":
+        options["compress_level"] = config.png_compress_level
+    else:
+        if image.mode == "1":
+            # JPEG/WebP 不支持 1 位图，以 8 位灰度保存黑白两色
+            image = image.convert("L")
+        options["quality"] = config.quality
+
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return EncodedImage(buffer.getvalue(), config, time.perf_counter() - started)
+
+
+def resolve_max_image_side(
+    max_image_side: "int | Mapping[DeepSeekOCRSize, int] | None",
+    size: DeepSeekOCRSize,
+) -> int | None:
+    if max_image_side is None or isinstance(max_image_side, int):
+        return max_image_side
+    return max_image_side.get(size)
+
+
+def encode_png(image: "Image.Image") -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def encode_pdf(images: Sequence["Image.Image"]) -> bytes:
+    # 每张图片一页，页面尺寸与图片像素尺寸一致（72 dpi）
+    if not images:
+        raise ValueError("images must not be empty")
+    pages = [image if image.mode == "RGB" else image.convert("RGB") for image in images]
+    buffer = io.BytesIO()
+    pages[0].save(buffer, "PDF", save_all=True, append_images=pages[1:], resolution=72.0)
+    return buffer.getvalue()
+
+
+@contextmanager
+def temporary_image_file(
+    image: "Image.Image", output_path: Path
+) -> Generator[Path, None, None]:
+    # 本地 Hugging Face infer() 只接受文件路径，只有这种情况才把页面落盘
+    output_path.mkdir(parents=True, exist_ok=True)
+    file_descriptor, file_name = tempfile.mkstemp(
+        prefix="raw-", suffix=".png", dir=output_path
+    )
+    os.close(file_descriptor)
+    image_path = Path(file_name)
+    try:
+        image.save(image_path, "PNG")
+        yield image_path
+    finally:
+        image_path.unlink(missing_ok=True)
@@ -0,0 +1,242 @@
+import heapq
+import itertools
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, TypeVar
+
+from ..extraction_context import abort_error
+from ..tracing import Span, current_span, span
+from ..types import ExtractionContext
+
+_T = TypeVar("_T")
+
+_ABORT_CHECK_INTERVAL_SECONDS = 0.2
+_FIRST_POLL_RATIO = 0.8
+_RETRY_POLL_RATIO = 0.25
+_JITTER = 0.2
+
+
+class PollBackoff:
+    """根据最近观察到的任务完成耗时决定下一次查询的时机。
+
+    第一次查询安排在预计完成时间之前不久；之后从预计耗时的四分之一开始指数退避。
+    每个间隔限制在 [min_seconds, max_seconds] 内，并加上 ±20% 的随机抖动，
+    避免同时提交的任务在同一时刻集中查询。initial_seconds 是还没有历史耗时时的预计耗时。
+
+    设置 interval_seconds 时不再自适应：提交后立即查询，之后每隔 interval_seconds 查询一次。
+    """
+
+    def __init__(
+        self,
+        initial_seconds: float,
+        min_seconds: float,
+        max_seconds: float,
+        history: int = 32,
+        interval_seconds: float | None = None,
+    ) -> None:
+        if min_seconds < 0 or max_seconds < min_seconds:
+            raise ValueError("poll intervals must satisfy 0 <= min_seconds <= max_seconds")
+        self._initial_seconds = initial_seconds
+        self._interval_seconds = interval_seconds
+        self._min_seconds = min_seconds
+        self._max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._durations: deque[float] = deque(maxlen=history)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._durations.append(seconds)
+
+    def expected_seconds(self) -> float:
+        with self._lock:
+            if not self._durations:
+                return self._initial_seconds
+            return statistics.median(self._durations)
+
+    def delay(self, attempt: int) -> float:
+        if self._interval_seconds is not None:
+            return 0.0 if attempt == 0 else self._interval_seconds
+        expected = self.expected_seconds()
+        if attempt == 0:
+            seconds = expected * _FIRST_POLL_RATIO
+        else:
+            seconds = expected * _RETRY_POLL_RATIO * 2 ** (attempt - 1)
+        seconds = min(max(seconds, self._min_seconds), self._max_seconds)
+        return seconds * random.uniform(1 - _JITTER, 1 + _JITTER)
+
+
+@dataclass
+class _PolledTask(Generic[_T]):
+    task_id: str
+    context: ExtractionContext | None
+    submitted_at: float
+    deadline: float
+    future: "Future[_T]" = field(default_factory=Future)
+    attempt: int = 0
+    # 提交任务时的当前 span，查询与下载在轮询线程中作为它的子 span 记录
+    parent_span: Span | None = field(default_factory=current_span)
+
+
+class TaskPoller(Generic[_T]):
+    """在一个调度线程中轮询所有在途任务，而不是每页占用一个线程睡眠等待。
+
+    query(task_id) 返回 None 表示任务仍在处理；返回结果后在线程池中调用
+    fetch(task_id, result) 下载最终结果，此时其他任务照常轮询。
+    每个任务对应一个 Future，完成、失败、超时或中断时唤醒等待方。
+    """
+
+    def __init__(
+        self,
+        query: Callable[[str], Any | None],
+        fetch: Callable[[str, Any], _T],
+        backoff: PollBackoff,
+        timeout_seconds: float,
+        max_workers: int = 4,
+        label: str = "Task",
+    ) -> None:
+        self._query = query
+        self._fetch = fetch
+        self._backoff = backoff
+        self._timeout_seconds = timeout_seconds
+        self._max_workers = max_workers
+        self._label = label
+        self._condition = threading.Condition()
+        self._schedule: list[tuple[float, int, _PolledTask[_T]]] = []
+        self._sequence = itertools.count()
+        self._tasks: dict[str, _PolledTask[_T]] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._tasks)
+
+    def submit(
+        self,
+        task_id: str,
+        context: ExtractionContext | None = None,
+        timeout_seconds: float | None = None,
+    ) -> "Future[_T]":
+        # timeout_seconds 覆盖构造时的默认超时，用于耗时远长于单页的任务（如整份文档）
+        now = time.monotonic()
+        task: _PolledTask[_T] = _PolledTask(
+            task_id=task_id,
+            context=context,
+            submitted_at=now,
+            deadline=now + (self._timeout_seconds if timeout_seconds is None else timeout_seconds),
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("TaskPoller is closed.")
+            self._start()
+            self._tasks[task_id] = task
+            self._schedule_poll(task, now + self._backoff.delay(0))
+        return task.future
+
+    def wait(
+        self,
+        task_id: str,
+        context: ExtractionContext | None = None,
+        timeout_seconds: float | None = None,
+    ) -> _T:
+        future = self.submit(task_id, context, timeout_seconds)
+        if context is not None:
+            # 轮询间隔可能较长，等待方自己也定期检查中断，以便立即返回
+            while not wait([future], timeout=_ABORT_CHECK_INTERVAL_SECONDS).done:
+                if context.check_aborted():
+                    with self._condition:
+                        task = self._tasks.get(task_id)
+                    self._finish(task, error=abort_error(context))
+        return future.result()
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            tasks = list(self._tasks.values())
+            self._condition.notify_all()
+        for task in tasks:
+            self._finish(task, error=RuntimeError("TaskPoller is closed."))
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="doc-page-extractor-poll",
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="doc-page-extractor-poller", daemon=True
+        )
+        self._thread.start()
+
+    def _schedule_poll(self, task: _PolledTask[_T], at: float) -> None:
+        heapq.heappush(self._schedule, (at, next(self._sequence), task))
+        self._condition.notify()
+
+    def _run(self) -> None:
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                if not self._schedule or self._schedule[0][0] > now:
+                    timeout = self._schedule[0][0] - now if self._schedule else None
+                    self._condition.wait(timeout)
+                    continue
+                _, _, task = heapq.heappop(self._schedule)
+                if self._tasks.get(task.task_id) is task and self._executor is not None:
+                    self._executor.submit(self._poll, task)
+
+    def _poll(self, task: _PolledTask[_T]) -> None:
+        if task.context is not None and task.context.check_aborted():
+            self._finish(task, error=abort_error(task.context))
+            return
+        try:
+            with span("poll.query", parent=task.parent_span, attempt=task.attempt) as query_span:
+                result = self._query(task.task_id)
+                query_span.set(done=result is not None)
+            if result is None:
+                now = time.monotonic()
+                if now >= task.deadline:
+                    raise TimeoutError(f"{self._label} {task.task_id} timed out.")
+                task.attempt += 1
+                with self._condition:
+                    if not self._closed:
+                        self._schedule_poll(task, now + self._backoff.delay(task.attempt))
+                return
+            self._backoff.record(time.monotonic() - task.submitted_at)
+            with span("poll.fetch", parent=task.parent_span):
+                value = self._fetch(task.task_id, result)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self._finish(task, error=error)
+            return
+        self._finish(task, value=value)
+
+    def _finish(
+        self,
+        task: _PolledTask[_T] | None,
+        value: Any = None,
+        error: BaseException | None = None,
+    ) -> None:
+        if task is None:
+            return
+        with self._condition:
+            if self._tasks.get(task.task_id) is task:
+                del self._tasks[task.task_id]
+        try:
+            if error is not None:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(value)
+        except InvalidStateError:
+            pass  # 已经因中断或关闭而结束
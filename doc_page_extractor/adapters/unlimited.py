@@ -1,26 +1,64 @@
+import asyncio
 import base64
 import ast
 import json
 import re
+import threading
 import time
 import urllib.parse
-from dataclasses import dataclass
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, TYPE_CHECKING, Protocol
+from typing import Any, Awaitable, Callable, TYPE_CHECKING, Protocol, Sequence, TypeVar, get_args
 
+from ..extraction_context import raise_if_aborted
+from ..raw_retention import retain_raw
 from ..structure import unlimited_ocr_type_to_kind, build_structured_page
-from ..types import DeepSeekOCRSize, ExtractionContext, Layout, OCRPageResult
+from ..timings import add_timing, timed
+from ..types import DeepSeekOCRSize, ExtractionContext, Layout, OCRPageResult, RawRetention
+from .access_token import AccessTokenCache
+from .http_client import AsyncVendorHTTPClient, VendorHTTPClient
+from .images import (
+    EncodedImage,
+    ImageEncodingConfig,
+    encode_pdf,
+    encode_upload,
+    temporary_image_file,
+)
+from .task_poller import PollBackoff, TaskPoller
 
 if TYPE_CHECKING:
-    import requests
+    from PIL import Image
 
 _LOCAL_PROMPT = "<image>document parsing."
+_R = TypeVar("_R")
+_T = TypeVar("_T")
+# 供应商接受的图片最长边
+_VENDOR_MAX_IMAGE_SIDE = 8192
+# 百度云 OAuth 错误码：110 access token 无效，111 access token 过期
+_AUTH_ERROR_CODES = (110, 111)
+# 供应商 layout 中已经解析到 Layout 字段上的键，raw_retention="trim" 时去掉
+_VENDOR_MAPPED_KEYS = frozenset({"text", "type", "position", "polygon", "table_html"})
+_LOCAL_MAPPED_KEYS = frozenset({"type"})
 _LOCAL_DET_PATTERN = re.compile(
     r"<\|det\|>\s*"
     r"(?P<type>[A-Za-z_][\w-]*)"
     r"(?P<coords>[\s\S]*?)"
     r"\s*<\|/det\|>",
 )
+# 坐标串的快速路径：只含数字的 [x1, y1, x2, y2] 或 [[...], ...]，与 Python 字面量语法一致
+# （整数不允许前导零、允许末尾逗号），其他写法交给 ast.literal_eval 保持原有的容错
+_LOCAL_NUMBER = r"[-+]?(?:(?:\d+\.\d*|\.\d+)(?:[eE][-+]?\d+)?|\d+[eE][-+]?\d+|[1-9]\d*|0+)"
+_LOCAL_SPACE = r"[ \t\r\n\f]*"
+_LOCAL_BOX = (
+    rf"\[{_LOCAL_SPACE}(?:{_LOCAL_NUMBER}(?:{_LOCAL_SPACE},{_LOCAL_SPACE}{_LOCAL_NUMBER})*"
+    rf"{_LOCAL_SPACE},?)?{_LOCAL_SPACE}\]"
+)
+_LOCAL_BOX_PATTERN = re.compile(_LOCAL_BOX)
+_LOCAL_BOXES_PATTERN = re.compile(
+    rf"\[{_LOCAL_SPACE}(?:{_LOCAL_BOX}(?:{_LOCAL_SPACE},{_LOCAL_SPACE}{_LOCAL_BOX})*"
+    rf"{_LOCAL_SPACE},?)?{_LOCAL_SPACE}\]"
+)
 
 
 class _LocalUnlimitedModel(Protocol):
@@ -47,17 +85,62 @@ class UnlimitedOCRVendorConfig:
     ak: str
     sk: str
     base_url: str = "https://aip.baidubce.com"
-    poll_interval_seconds: float = 2
+    # 设置后按固定间隔查询任务状态：提交后立即查询一次，之后每隔 poll_interval_seconds 查询
+    poll_interval_seconds: float | None = None
+    # poll_interval_seconds 为 None 时自适应查询：没有历史完成耗时时，用它作为任务的预计耗时，
+    # 之后按实际耗时调整，查询间隔限制在 [min_poll_interval_seconds, max_poll_interval_seconds] 内
+    expected_task_seconds: float = 2
+    min_poll_interval_seconds: float = 0.2
+    max_poll_interval_seconds: float = 10
     timeout_seconds: int = 180
+    # extract_document_pages/submit_document 整份文档任务的等待上限，单页仍使用 timeout_seconds
+    document_timeout_seconds: int = 1800
+    pool_size: int = 10
+    keep_alive: bool = True
+    max_retries: int = 0
+    retry_backoff_seconds: float = 0.5
+    # 设置后 access token 写入该文件，同机的其他 worker 进程可以复用
+    token_cache_path: Path | str | None = None
+    token_refresh_margin_seconds: float = 300
+    encoding: ImageEncodingConfig = field(default_factory=ImageEncodingConfig)
+    # Layout.raw 的保留方式，见 RawRetention；默认引用下载的解析结果
+    raw_retention: RawRetention = "keep"
+
+
+class _UnlimitedAuthError(RuntimeError):
+    pass
+
+
+@dataclass
+class _TaskOutput:
+    task_result: dict[str, Any]
+    parse_result: dict[str, Any]
+    # 轮询线程开始下载结果的时刻（perf_counter），减去提交完成的时刻即为等待耗时
+    fetched_at: float
+    download_seconds: float
 
 
 class UnlimitedOCRVendorAdapter:
     allows_multi_stage = False
-    max_image_side = 8192
 
     def __init__(self, config: UnlimitedOCRVendorConfig) -> None:
         self._config = config
-        self._access_token: str | None = None
+        self._api = _UnlimitedVendorAPI(config)
+        self._http = VendorHTTPClient.from_config(config)
+        self._tokens = self._api.token_cache()
+        self._token_lock = threading.Lock()
+        self._poller: TaskPoller[_TaskOutput] | None = None
+        self._poller_lock = threading.Lock()
+
+    @property
+    def max_image_side(self) -> int | dict[DeepSeekOCRSize, int]:
+        return _max_image_side(self._config)
+
+    def __enter__(self) -> "UnlimitedOCRVendorAdapter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
 
     def download(self, revision: str | None) -> None:
         del revision
@@ -65,6 +148,68 @@ class UnlimitedOCRVendorAdapter:
     def load(self) -> None:
         pass
 
+    def close(self) -> None:
+        with self._poller_lock:
+            poller, self._poller = self._poller, None
+        if poller is not None:
+            poller.close()
+        self._http.close()
+
+    def submit_page_image(
+        self,
+        image: "Image.Image",
+        context: ExtractionContext | None = None,
+    ) -> "Future[OCRPageResult]":
+        """提交页面后立即返回 Future，由共享的轮询器在任务完成时填入结果。
+
+        同一个 adapter 可以同时保持大量在途任务，而不需要为每页占用一个等待线程。
+        """
+        raise_if_aborted(context)
+        encoded = encode_upload(image, self._config.encoding)
+        task_id, upload = self._submit_page(encoded)
+        timings = _submit_timings(encoded, upload)
+        submitted_at = time.perf_counter()
+        return _map_future(
+            self._get_poller().submit(task_id, context),
+            lambda output: self._page_result(task_id, output, upload, timings, submitted_at),
+        )
+
+    def extract_document_pages(
+        self,
+        document: bytes | Path | str | Sequence["Image.Image"],
+        context: ExtractionContext | None = None,
+        file_name: str | None = None,
+    ) -> list[OCRPageResult]:
+        """把整份 PDF 或一组页面图片作为一个任务提交，按页拆分成 OCRPageResult。
+
+        一次 submit/query/download 代替每页一轮。图片组会先合成为每页一张图的 PDF。
+        坐标使用供应商返回的页面坐标，不做缩放。第 i 个结果对应供应商返回的第 i 页，
+        解析结果缺少的页面得到空结果。等待期间定期检查 context 的中断，中断后不再轮询该任务。
+        """
+        task_id, page_count = self._submit_document(document, context, file_name)
+        output = self._get_poller().wait(
+            task_id, context, timeout_seconds=self._config.document_timeout_seconds
+        )
+        return self._api.document_results(
+            task_id, output.task_result, output.parse_result, page_count
+        )
+
+    def submit_document(
+        self,
+        document: bytes | Path | str | Sequence["Image.Image"],
+        context: ExtractionContext | None = None,
+        file_name: str | None = None,
+    ) -> "Future[list[OCRPageResult]]":
+        task_id, page_count = self._submit_document(document, context, file_name)
+        return _map_future(
+            self._get_poller().submit(
+                task_id, context, timeout_seconds=self._config.document_timeout_seconds
+            ),
+            lambda output: self._api.document_results(
+                task_id, output.task_result, output.parse_result, page_count
+            ),
+        )
+
     def extract_page(
         self,
         prompt: str,
@@ -75,49 +220,316 @@ class UnlimitedOCRVendorAdapter:
         device_number: int | None,
     ) -> OCRPageResult:
         del prompt, output_path, size, device_number
+        from PIL import Image
+
+        with Image.open(image_path) as image:
+            encoded = encode_upload(image, self._config.encoding, image_path.read_bytes())
+        return self._extract(encoded, context)
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        del prompt, output_path, size, device_number
+        return self._extract(encode_upload(image, self._config.encoding), context)
+
+    def _extract(
+        self,
+        encoded: EncodedImage,
+        context: ExtractionContext | None,
+    ) -> OCRPageResult:
+        raise_if_aborted(context)
+        task_id, upload = self._submit_page(encoded)
+        timings = _submit_timings(encoded, upload)
+        submitted_at = time.perf_counter()
+        output = self._get_poller().wait(task_id, context)
+        return self._page_result(task_id, output, upload, timings, submitted_at)
+
+    def _page_result(
+        self,
+        task_id: str,
+        output: _TaskOutput,
+        upload: dict[str, Any],
+        timings: dict[str, float],
+        submitted_at: float,
+    ) -> OCRPageResult:
+        add_timing(timings, "poll", output.fetched_at - submitted_at)
+        add_timing(timings, "download", output.download_seconds)
+        return self._api.page_result(
+            task_id, output.task_result, output.parse_result, upload=upload, timings=timings
+        )
+
+    def _submit_document(
+        self,
+        document: bytes | Path | str | Sequence["Image.Image"],
+        context: ExtractionContext | None,
+        file_name: str | None,
+    ) -> tuple[str, int | None]:
+        # 返回任务 ID 和已知的页数；PDF 的页数由解析结果决定
+        raise_if_aborted(context)
+        if isinstance(document, (str, Path)):
+            path = Path(document)
+            file_data, file_name, page_count = path.read_bytes(), file_name or path.name, None
+        elif isinstance(document, bytes):
+            file_data, file_name, page_count = document, file_name or "document.pdf", None
+        else:
+            file_data, file_name = encode_pdf(document), file_name or "document.pdf"
+            page_count = len(document)
+        return self._submit_task(file_data, file_name), page_count
+
+    def _submit_page(self, encoded: EncodedImage) -> tuple[str, dict[str, Any]]:
+        started = time.perf_counter()
+        task_id = self._submit_task(encoded.data, encoded.config.file_name)
+        return task_id, encoded.upload_report(submit_seconds=time.perf_counter() - started)
+
+    def _get_access_token(self) -> str:
+        token = self._tokens.current()
+        if token is not None:
+            return token
+        # 单飞刷新：并发的页面只有一个真正请求新 token，其余等待后直接复用
+        with self._token_lock:
+            token = self._tokens.current()
+            if token is None:
+                url, kwargs = self._api.token_request()
+                token, expires_in = self._api.read_token(self._http.post(url, **kwargs))
+                self._tokens.store(token, expires_in)
+            return token
+
+    def _with_token(self, call: Callable[[str], _T]) -> _T:
         token = self._get_access_token()
-        task_id = self._submit_task(token, image_path)
-        task_result = self._wait_for_task(token, task_id, context)
-        parse_url = str(task_result.get("parse_result_url") or "")
-        if not parse_url:
-            raise RuntimeError(
-                f"Unlimited OCR task {task_id} did not return parse_result_url."
+        try:
+            return call(token)
+        except _UnlimitedAuthError:
+            # token 被提前吊销或已过期：作废后刷新，只重试一次
+            self._tokens.invalidate(token)
+            return call(self._get_access_token())
+
+    def _submit_task(self, file_data: bytes, file_name: str) -> str:
+        def submit(token: str) -> str:
+            url, kwargs = self._api.submit_request(token, file_data, file_name)
+            return self._api.read_task_id(self._http.post(url, **kwargs))
+
+        return self._with_token(submit)
+
+    def _get_poller(self) -> TaskPoller[_TaskOutput]:
+        with self._poller_lock:
+            if self._poller is None:
+                self._poller = TaskPoller(
+                    query=self._query_task,
+                    fetch=self._fetch_parse_result,
+                    backoff=_poll_backoff(self._config),
+                    timeout_seconds=self._config.timeout_seconds,
+                    max_workers=self._config.pool_size,
+                    label="Unlimited OCR task",
+                )
+            return self._poller
+
+    def _query_task(self, task_id: str) -> dict[str, Any] | None:
+        def query(token: str) -> dict[str, Any] | None:
+            url, kwargs = self._api.query_request(token, task_id)
+            return self._api.read_task_result(self._http.post(url, **kwargs), task_id)
+
+        return self._with_token(query)
+
+    def _fetch_parse_result(self, task_id: str, task_result: dict[str, Any]) -> _TaskOutput:
+        fetched_at = time.perf_counter()
+        parse_url = self._api.parse_result_url(task_id, task_result)
+        url, kwargs = self._api.download_request(parse_url)
+        parse_result = self._api.read_parse_result(self._http.get(url, **kwargs))
+        return _TaskOutput(
+            task_result=task_result,
+            parse_result=parse_result,
+            fetched_at=fetched_at,
+            download_seconds=time.perf_counter() - fetched_at,
+        )
+
+
+class AsyncUnlimitedOCRVendorAdapter:
+    allows_multi_stage = False
+
+    def __init__(
+        self,
+        config: UnlimitedOCRVendorConfig,
+        client: AsyncVendorHTTPClient | None = None,
+    ) -> None:
+        self._config = config
+        self._api = _UnlimitedVendorAPI(config)
+        self._owns_client = client is None
+        self._client = client or AsyncVendorHTTPClient.from_config(config)
+        self._tokens = self._api.token_cache()
+        self._token_lock = asyncio.Lock()
+        self._backoff = _poll_backoff(config)
+
+    @property
+    def max_image_side(self) -> int | dict[DeepSeekOCRSize, int]:
+        return _max_image_side(self._config)
+
+    async def __aenter__(self) -> "AsyncUnlimitedOCRVendorAdapter":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+    ) -> OCRPageResult:
+        del prompt, size
+        raise_if_aborted(context)
+        encoded = await asyncio.to_thread(encode_upload, image, self._config.encoding)
+
+        async def submit(token: str) -> str:
+            url, kwargs = self._api.submit_request(token, encoded.data, encoded.config.file_name)
+            return self._api.read_task_id(
+                await self._client.post(url, context=context, **kwargs)
             )
 
-        parse_result = self._download_parse_result(parse_url)
-        layouts = parse_unlimited_ocr_layouts(
-            parse_result,
-            source="unlimited-ocr-vendor",
-        )
-        return OCRPageResult(
-            layouts=layouts,
-            source="unlimited-ocr-vendor",
-            structured=build_structured_page(layouts),
-            raw={
-                "task_id": task_id,
-                "status": task_result.get("status"),
-                "file_name": parse_result.get("file_name"),
-            },
+        started = time.perf_counter()
+        task_id = await self._with_token(submit, context)
+        upload = encoded.upload_report(submit_seconds=time.perf_counter() - started)
+        timings = _submit_timings(encoded, upload)
+        with timed(timings, "poll"):
+            task_result = await self._wait_for_task(task_id, context)
+
+        with timed(timings, "download"):
+            parse_url = self._api.parse_result_url(task_id, task_result)
+            url, kwargs = self._api.download_request(parse_url)
+            parse_result = self._api.read_parse_result(
+                await self._client.get(url, context=context, **kwargs)
+            )
+        return self._api.page_result(
+            task_id, task_result, parse_result, upload=upload, timings=timings
         )
 
-    def _get_access_token(self) -> str:
-        if self._access_token:
-            return self._access_token
-        import requests
+    async def _get_access_token(self, context: ExtractionContext | None) -> str:
+        token = self._tokens.current()
+        if token is not None:
+            return token
+        async with self._token_lock:
+            token = self._tokens.current()
+            if token is None:
+                url, kwargs = self._api.token_request()
+                token, expires_in = self._api.read_token(
+                    await self._client.post(url, context=context, **kwargs)
+                )
+                self._tokens.store(token, expires_in)
+            return token
+
+    async def _with_token(
+        self,
+        call: Callable[[str], Awaitable[_T]],
+        context: ExtractionContext | None,
+    ) -> _T:
+        token = await self._get_access_token(context)
+        try:
+            return await call(token)
+        except _UnlimitedAuthError:
+            self._tokens.invalidate(token)
+            return await call(await self._get_access_token(context))
+
+    async def _wait_for_task(
+        self, task_id: str, context: ExtractionContext | None
+    ) -> dict[str, Any]:
+        async def query(token: str) -> dict[str, Any] | None:
+            url, kwargs = self._api.query_request(token, task_id)
+            return self._api.read_task_result(
+                await self._client.post(url, context=context, **kwargs), task_id
+            )
+
+        submitted_at = time.monotonic()
+        deadline = submitted_at + self._config.timeout_seconds
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._backoff.delay(attempt))
+            raise_if_aborted(context)
+            result = await self._with_token(query, context)
+            if result is not None:
+                self._backoff.record(time.monotonic() - submitted_at)
+                return result
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Unlimited OCR task {task_id} timed out.")
+            attempt += 1
 
-        response = requests.post(
-            f"{self._config.base_url.rstrip('/')}/oauth/2.0/token",
-            headers={
+
+def _map_future(future: "Future[_T]", convert: Callable[[_T], _R]) -> "Future[_R]":
+    mapped: Future[_R] = Future()
+
+    def done(source: "Future[_T]") -> None:
+        try:
+            mapped.set_result(convert(source.result()))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            mapped.set_exception(error)
+
+    future.add_done_callback(done)
+    return mapped
+
+
+def _submit_timings(encoded: EncodedImage, upload: dict[str, Any]) -> dict[str, float]:
+    return {"encode": encoded.encode_seconds, "upload": upload["submit_seconds"]}
+
+
+def _max_image_side(config: UnlimitedOCRVendorConfig) -> int | dict[DeepSeekOCRSize, int]:
+    limits = config.encoding.max_image_side
+    if limits is None:
+        return _VENDOR_MAX_IMAGE_SIDE
+    return {
+        size: min(limits.get(size, _VENDOR_MAX_IMAGE_SIDE), _VENDOR_MAX_IMAGE_SIDE)
+        for size in get_args(DeepSeekOCRSize)
+    }
+
+
+def _poll_backoff(config: UnlimitedOCRVendorConfig) -> PollBackoff:
+    return PollBackoff(
+        initial_seconds=config.expected_task_seconds,
+        min_seconds=config.min_poll_interval_seconds,
+        max_seconds=config.max_poll_interval_seconds,
+        interval_seconds=config.poll_interval_seconds,
+    )
+
+
+class _UnlimitedVendorAPI:
+    # 百度云 Unlimited OCR 的请求构造与响应解析，同步与异步 adapter 共用
+    _USER_AGENT = "doc-page-extractor-unlimited-ocr/1.0"
+    _TASK_PATH = "/rest/2.0/brain/online/v2/unlimited-ocr-parser/task"
+    _QUERY_PATH = "/rest/2.0/brain/online/v2/unlimited-ocr-parser/task/query"
+
+    def __init__(self, config: UnlimitedOCRVendorConfig) -> None:
+        self._config = config
+
+    def token_request(self) -> tuple[str, dict[str, Any]]:
+        return f"{self._config.base_url.rstrip('/')}/oauth/2.0/token", {
+            "headers": {
                 "Accept": "application/json",
-                "User-Agent": "doc-page-extractor-unlimited-ocr/1.0",
+                "User-Agent": self._USER_AGENT,
             },
-            data={
+            "data": {
                 "grant_type": "client_credentials",
                 "client_id": self._config.ak,
                 "client_secret": self._config.sk,
             },
-            timeout=self._config.timeout_seconds,
+            "timeout": self._config.timeout_seconds,
+        }
+
+    def token_cache(self) -> AccessTokenCache:
+        return AccessTokenCache(
+            key=f"{self._config.base_url.rstrip('/')}\0{self._config.ak}",
+            path=self._config.token_cache_path,
+            refresh_margin_seconds=self._config.token_refresh_margin_seconds,
         )
+
+    def read_token(self, response: Any) -> tuple[str, float | None]:
         if response.status_code >= 400:
             raise RuntimeError(
                 f"Unlimited OCR token request failed with HTTP {response.status_code}: "
@@ -129,25 +541,22 @@ class UnlimitedOCRVendorAdapter:
             raise RuntimeError(
                 f"Unlimited OCR token response did not include access_token: {data}"
             )
-        self._access_token = token
-        return token
-
-    def _submit_task(self, token: str, image_path: Path) -> str:
-        import requests
-
-        response = requests.post(
-            self._api_url("/rest/2.0/brain/online/v2/unlimited-ocr-parser/task", token),
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json",
-                "User-Agent": "doc-page-extractor-unlimited-ocr/1.0",
-            },
-            data={
-                "file_data": base64.b64encode(image_path.read_bytes()).decode("ascii"),
-                "file_name": image_path.name,
+        expires_in = data.get("expires_in")
+        return token, float(expires_in) if expires_in else None
+
+    def submit_request(
+        self, token: str, file_data: bytes, file_name: str
+    ) -> tuple[str, dict[str, Any]]:
+        return self._api_url(self._TASK_PATH, token), {
+            "headers": self._form_headers(),
+            "data": {
+                "file_data": base64.b64encode(file_data).decode("ascii"),
+                "file_name": file_name,
             },
-            timeout=self._config.timeout_seconds,
-        )
+            "timeout": self._config.timeout_seconds,
+        }
+
+    def read_task_id(self, response: Any) -> str:
         data = self._checked_response(response, "submit")
         task_id = str((data.get("result") or {}).get("task_id") or "")
         if not task_id:
@@ -156,47 +565,39 @@ class UnlimitedOCRVendorAdapter:
             )
         return task_id
 
-    def _wait_for_task(
-        self, token: str, task_id: str, context: ExtractionContext | None
-    ) -> dict[str, Any]:
-        deadline = time.monotonic() + self._config.timeout_seconds
-        while True:
-            if context is not None:
-                context.check_aborted()
-            import requests
-
-            response = requests.post(
-                self._api_url(
-                    "/rest/2.0/brain/online/v2/unlimited-ocr-parser/task/query",
-                    token,
-                ),
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "Accept": "application/json",
-                    "User-Agent": "doc-page-extractor-unlimited-ocr/1.0",
-                },
-                data={"task_id": task_id},
-                timeout=self._config.timeout_seconds,
+    def query_request(self, token: str, task_id: str) -> tuple[str, dict[str, Any]]:
+        return self._api_url(self._QUERY_PATH, token), {
+            "headers": self._form_headers(),
+            "data": {"task_id": task_id},
+            "timeout": self._config.timeout_seconds,
+        }
+
+    def read_task_result(self, response: Any, task_id: str) -> dict[str, Any] | None:
+        # 任务仍在处理中时返回 None
+        data = self._checked_response(response, "query")
+        result = data.get("result") or {}
+        status = result.get("status")
+        if status == "success" or result.get("parse_result_url"):
+            return result
+        if status == "failed":
+            raise RuntimeError(f"Unlimited OCR task {task_id} failed: {result}")
+        return None
+
+    def parse_result_url(self, task_id: str, task_result: dict[str, Any]) -> str:
+        parse_url = str(task_result.get("parse_result_url") or "")
+        if not parse_url:
+            raise RuntimeError(
+                f"Unlimited OCR task {task_id} did not return parse_result_url."
             )
-            data = self._checked_response(response, "query")
-            result = data.get("result") or {}
-            status = result.get("status")
-            if status == "success" or result.get("parse_result_url"):
-                return result
-            if status == "failed":
-                raise RuntimeError(f"Unlimited OCR task {task_id} failed: {result}")
-            if time.monotonic() >= deadline:
-                raise TimeoutError(f"Unlimited OCR task {task_id} timed out.")
-            time.sleep(self._config.poll_interval_seconds)
+        return parse_url
 
-    def _download_parse_result(self, url: str) -> dict[str, Any]:
-        import requests
+    def download_request(self, url: str) -> tuple[str, dict[str, Any]]:
+        return url, {
+            "headers": {"User-Agent": self._USER_AGENT},
+            "timeout": self._config.timeout_seconds,
+        }
 
-        response = requests.get(
-            url,
-            headers={"User-Agent": "doc-page-extractor-unlimited-ocr/1.0"},
-            timeout=self._config.timeout_seconds,
-        )
+    def read_parse_result(self, response: Any) -> dict[str, Any]:
         if response.status_code >= 400:
             raise RuntimeError(
                 f"Unlimited OCR parse result download failed with HTTP {response.status_code}: "
@@ -204,19 +605,109 @@ class UnlimitedOCRVendorAdapter:
             )
         return json.loads(response.content.decode("utf-8"))
 
+    def page_result(
+        self,
+        task_id: str,
+        task_result: dict[str, Any],
+        parse_result: dict[str, Any],
+        upload: dict[str, Any] | None = None,
+        timings: dict[str, float] | None = None,
+    ) -> OCRPageResult:
+        timings = {} if timings is None else timings
+        with timed(timings, "parse"):
+            layouts = parse_unlimited_ocr_layouts(
+                parse_result,
+                source="unlimited-ocr-vendor",
+                raw_retention=self._config.raw_retention,
+            )
+        with timed(timings, "structure"):
+            structured = build_structured_page(layouts)
+        raw = {
+            "task_id": task_id,
+            "status": task_result.get("status"),
+            "file_name": parse_result.get("file_name"),
+        }
+        if upload is not None:
+            raw["upload"] = upload
+        return OCRPageResult(
+            layouts=layouts,
+            source="unlimited-ocr-vendor",
+            structured=structured,
+            raw=raw,
+            timings=timings,
+        )
+
+    def document_results(
+        self,
+        task_id: str,
+        task_result: dict[str, Any],
+        parse_result: dict[str, Any],
+        page_count: int | None = None,
+    ) -> list[OCRPageResult]:
+        # 按供应商返回的 page_num（从 0 开始）放置每页，缺少 page_num 时才按出现顺序
+        pages: dict[int, dict[str, Any]] = {}
+        for position, page in enumerate(parse_result.get("pages") or []):
+            page_num = page.get("page_num")
+            pages[int(page_num) if page_num is not None else position] = page
+        page_count = max([page_count or 0, *(page_index + 1 for page_index in pages)])
+
+        page_results: list[OCRPageResult] = []
+        for page_index in range(page_count):
+            page = pages.get(page_index)
+            layouts = (
+                parse_unlimited_ocr_layouts(
+                    {"pages": [page]},
+                    source="unlimited-ocr-vendor",
+                    raw_retention=self._config.raw_retention,
+                )
+                if page is not None
+                else []
+            )
+            raw: dict[str, Any] = {
+                "task_id": task_id,
+                "status": task_result.get("status"),
+                "file_name": parse_result.get("file_name"),
+                "page_index": page_index,
+            }
+            if page is None:
+                raw["missing"] = True
+            page_results.append(
+                OCRPageResult(
+                    layouts=layouts,
+                    source="unlimited-ocr-vendor",
+                    structured=build_structured_page(layouts),
+                    raw=raw,
+                )
+            )
+        return page_results
+
+    def _form_headers(self) -> dict[str, str]:
+        return {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": "application/json",
+            "User-Agent": self._USER_AGENT,
+        }
+
     def _api_url(self, path: str, token: str) -> str:
         query = urllib.parse.urlencode({"access_token": token})
         return f"{self._config.base_url.rstrip('/')}{path}?{query}"
 
     @staticmethod
     def _checked_response(response: Any, action: str) -> dict[str, Any]:
+        if response.status_code == 401:
+            raise _UnlimitedAuthError(
+                f"Unlimited OCR {action} request was not authorized: {response.text[:500]}"
+            )
         if response.status_code >= 400:
             raise RuntimeError(
                 f"Unlimited OCR {action} request failed with HTTP {response.status_code}: "
                 f"{response.text[:500]}"
             )
         data = response.json()
-        if int(data.get("error_code") or 0) != 0:
+        error_code = int(data.get("error_code") or 0)
+        if error_code in _AUTH_ERROR_CODES:
+            raise _UnlimitedAuthError(f"Unlimited OCR {action} request failed: {data}")
+        if error_code != 0:
             raise RuntimeError(f"Unlimited OCR {action} request failed: {data}")
         return data
 
@@ -225,9 +716,15 @@ class UnlimitedModelOCRAdapter:
     allows_multi_stage = False
     prompt = _LOCAL_PROMPT
 
-    def __init__(self, model: _LocalUnlimitedModel, source: str = "unlimited-ocr") -> None:
+    def __init__(
+        self,
+        model: _LocalUnlimitedModel,
+        source: str = "unlimited-ocr",
+        raw_retention: RawRetention = "keep",
+    ) -> None:
         self._model = model
         self._source = source
+        self._raw_retention = raw_retention
 
     def download(self, revision: str | None) -> None:
         self._model.download(revision)
@@ -244,33 +741,68 @@ class UnlimitedModelOCRAdapter:
         context: ExtractionContext | None,
         device_number: int | None,
     ) -> OCRPageResult:
-        response = self._model.generate(
-            prompt=prompt,
-            image_path=image_path,
-            output_path=output_path,
-            size=size,
-            context=context,
-            device_number=device_number,
-        )
+        timings: dict[str, float] = {}
+        with timed(timings, "inference"):
+            response = self._model.generate(
+                prompt=prompt,
+                image_path=image_path,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
         from PIL import Image
 
         with Image.open(image_path) as image:
+            return self._page_result(image, response, timings)
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        with temporary_image_file(image, output_path) as image_path:
+            add_timing(timings, "encode", time.perf_counter() - started)
+            with timed(timings, "inference"):
+                response = self._model.generate(
+                    prompt=prompt,
+                    image_path=image_path,
+                    output_path=output_path,
+                    size=size,
+                    context=context,
+                    device_number=device_number,
+                )
+        return self._page_result(image, response, timings)
+
+    def _page_result(self, image: Any, response: str, timings: dict[str, float]) -> OCRPageResult:
+        with timed(timings, "parse"):
             layouts = parse_unlimited_ocr_local_layouts(
                 image,
                 response,
                 source=self._source,
+                raw_retention=self._raw_retention,
             )
+        with timed(timings, "structure"):
+            structured = build_structured_page(layouts)
         return OCRPageResult(
             layouts=layouts,
             source=self._source,
-            structured=build_structured_page(layouts),
+            structured=structured,
             raw_text=response,
+            timings=timings,
         )
 
 
 def parse_unlimited_ocr_layouts(
     parse_result: dict[str, Any],
     source: str = "unlimited-ocr-vendor",
+    raw_retention: RawRetention = "keep",
 ) -> list[Layout]:
     layouts: list[Layout] = []
     for page in parse_result.get("pages") or []:
@@ -297,6 +829,7 @@ def parse_unlimited_ocr_layouts(
                     raw=item if isinstance(item, dict) else None,
                 )
             )
+    retain_raw(layouts, raw_retention, _VENDOR_MAPPED_KEYS)
     return layouts
 
 
@@ -304,32 +837,54 @@ def parse_unlimited_ocr_local_layouts(
     image: Any,
     response: str,
     source: str = "unlimited-ocr",
+    raw_retention: RawRetention = "keep",
 ) -> list[Layout]:
     width, height = image.size
     layouts: list[Layout] = []
-    matches = list(_LOCAL_DET_PATTERN.finditer(response))
+    previous: re.Match[str] | None = None
+
+    # 每个 det 的正文到下一个 det 开始为止，所以处理的是上一个匹配
+    for matched in _LOCAL_DET_PATTERN.finditer(response):
+        if previous is not None:
+            body = response[previous.end():matched.start()]
+            _append_local_layouts(layouts, previous, body, width, height, source)
+        previous = matched
+    if previous is not None:
+        _append_local_layouts(layouts, previous, response[previous.end():], width, height, source)
+    retain_raw(layouts, raw_retention, _LOCAL_MAPPED_KEYS)
+    return layouts
 
-    for index, matched in enumerate(matches):
-        next_start = matches[index + 1].start() if index + 1 < len(matches) else len(response)
-        layout_type = matched.group("type")
-        text = response[matched.end():next_start].strip("\n") or None
-        for det in _parse_local_dets(matched.group("coords"), width, height):
-            kind = unlimited_ocr_type_to_kind(layout_type, text)
-            layouts.append(
-                Layout(
-                    det=det,
-                    text=text,
-                    kind=kind,
-                    type=layout_type,
-                    html=text if kind.value == "table" and _looks_like_html_table(text) else None,
-                    source=source,
-                    raw={
-                        "type": layout_type,
-                        "coords": matched.group("coords"),
-                    },
-                )
+
+def _append_local_layouts(
+    layouts: list[Layout],
+    matched: re.Match[str],
+    body: str,
+    width: int,
+    height: int,
+    source: str,
+) -> None:
+    dets = _parse_local_dets(matched.group("coords"), width, height)
+    if not dets:
+        return
+    layout_type = matched.group("type")
+    text = body.strip("\n") or None
+    kind = unlimited_ocr_type_to_kind(layout_type, text)
+    html = text if kind.value == "table" and _looks_like_html_table(text) else None
+    for det in dets:
+        layouts.append(
+            Layout(
+                det=det,
+                text=text,
+                kind=kind,
+                type=layout_type,
+                html=html,
+                source=source,
+                raw={
+                    "type": layout_type,
+                    "coords": matched.group("coords"),
+                },
             )
-    return layouts
+        )
 
 
 def _parse_local_dets(
@@ -342,15 +897,8 @@ def _parse_local_dets(
     raw_coords = raw_coords.strip()
     if not raw_coords:
         return []
-    try:
-        parsed = ast.literal_eval(raw_coords)
-    except (SyntaxError, ValueError):
-        return []
-    if not isinstance(parsed, list):
-        return []
-    boxes = parsed if parsed and isinstance(parsed[0], list) else [parsed]
     dets: list[tuple[int, int, int, int]] = []
-    for box in boxes:
+    for box in _scan_local_boxes(raw_coords):
         if not isinstance(box, list) or len(box) < 4:
             continue
         try:
@@ -368,6 +916,27 @@ def _parse_local_dets(
     return dets
 
 
+def _scan_local_boxes(raw_coords: str) -> list[Any]:
+    # 绝大多数坐标串走正则快速路径，数字保留为字符串交给 float()；
+    # 结果与 ast.literal_eval 一致，但不必为每个框构建一棵语法树
+    # 通过校验后数字之间只有空白和逗号，直接切分即可
+    if _LOCAL_BOX_PATTERN.fullmatch(raw_coords):
+        return [raw_coords[1:-1].replace(",", " ").split()]
+    if _LOCAL_BOXES_PATTERN.fullmatch(raw_coords):
+        return [
+            box[box.index("[") + 1 :].replace(",", " ").split()
+            for box in raw_coords[1:-1].split("]")
+            if "[" in box
+        ]
+    try:
+        parsed = ast.literal_eval(raw_coords)
+    except (SyntaxError, ValueError):
+        return []
+    if not isinstance(parsed, list):
+        return []
+    return parsed if parsed and isinstance(parsed[0], list) else [parsed]
+
+
 def _looks_like_html_table(text: str | None) -> bool:
     return bool(text and text.lstrip().lower().startswith("<table"))
 
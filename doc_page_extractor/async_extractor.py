@@ -0,0 +1,155 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncGenerator
+
+from .adapters.deepseek import (
+    AsyncDeepSeekOCR2VendorAdapter,
+    AsyncDeepSeekOCRVendorAdapter,
+    DeepSeekOCR2VendorConfig,
+    DeepSeekOCRVendorConfig,
+)
+from .adapters.http_client import AsyncVendorHTTPClient
+from .adapters.unlimited import (
+    AsyncUnlimitedOCRVendorAdapter,
+    UnlimitedOCRVendorConfig,
+)
+from .extractor import (
+    _DEFAULT_PROMPT,
+    _PageStages,
+    _adapter_max_image_side,
+    _adapter_span,
+    _complete_page_result,
+    _crop_stage_image,
+    _fit_adapter_image,
+)
+from .tracing import span
+from .types import (
+    AsyncOCRAdapter,
+    AsyncPageExtractor,
+    DeepSeekOCRSize,
+    ExtractionContext,
+    Layout,
+    OCRPageResult,
+    StageMode,
+)
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+def create_async_page_extractor_with_adapter(
+    adapter: AsyncOCRAdapter,
+    stage_mode: StageMode = "redact",
+) -> AsyncPageExtractor:
+    if not isinstance(adapter, AsyncOCRAdapter):
+        raise TypeError("adapter must implement AsyncOCRAdapter protocol")
+    return _AsyncPageExtractorImpls(adapter, stage_mode=stage_mode)
+
+
+def create_async_deepseek_ocr_vendor_page_extractor(
+    config: DeepSeekOCRVendorConfig,
+    client: AsyncVendorHTTPClient | None = None,
+    stage_mode: StageMode = "redact",
+) -> AsyncPageExtractor:
+    return _AsyncPageExtractorImpls(AsyncDeepSeekOCRVendorAdapter(config, client), stage_mode=stage_mode)
+
+
+def create_async_deepseek_ocr2_vendor_page_extractor(
+    config: DeepSeekOCR2VendorConfig,
+    client: AsyncVendorHTTPClient | None = None,
+    stage_mode: StageMode = "redact",
+) -> AsyncPageExtractor:
+    return _AsyncPageExtractorImpls(AsyncDeepSeekOCR2VendorAdapter(config, client), stage_mode=stage_mode)
+
+
+def create_async_unlimited_ocr_vendor_page_extractor(
+    config: UnlimitedOCRVendorConfig,
+    client: AsyncVendorHTTPClient | None = None,
+) -> AsyncPageExtractor:
+    return _AsyncPageExtractorImpls(AsyncUnlimitedOCRVendorAdapter(config, client))
+
+
+class _AsyncPageExtractorImpls(_PageStages):
+    """异步页面抽取器。
+
+    一个事件循环中可以并发抽取多页（例如 asyncio.gather），
+    同一页的各个阶段仍然依次执行。用 async with 或 aclose() 释放 adapter 的连接。
+    """
+
+    def __init__(self, adapter: AsyncOCRAdapter, stage_mode: StageMode = "redact") -> None:
+        self._adapter: AsyncOCRAdapter = adapter
+        self._init_stage_mode(stage_mode)
+
+    async def __aenter__(self) -> "_AsyncPageExtractorImpls":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._adapter.aclose()
+
+    async def extract_page_results(
+        self,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        stages: int = 1,
+        context: ExtractionContext | None = None,
+    ) -> AsyncGenerator[tuple["Image.Image", OCRPageResult], None]:
+        stages = self._effective_stages(stages)
+        fill_color: tuple[int, int, int] | None = None
+        layouts: list[Layout] = []
+        prompt = getattr(self._adapter, "prompt", _DEFAULT_PROMPT)
+
+        with span(
+            "page",
+            context.tracer if context else None,
+            activate=False,
+            size=size,
+            stages=stages,
+        ) as page_span:
+            for i in range(stages):
+                with span("stage", parent=page_span, stage=i + 1):
+                    started = time.perf_counter()
+                    timings: dict[str, float] = {}
+                    # 涂抹、裁剪与缩放都是 CPU 密集的 PIL 操作，放到线程中执行，不阻塞事件循环
+                    image, fill_color, crop_box, adapter_image, scale_x, scale_y = await asyncio.to_thread(
+                        self._prepare_stage_image, image, i, layouts, fill_color, size, timings
+                    )
+                    with _adapter_span(self._adapter, context) as adapter_span:
+                        page_result = await self._adapter.extract_page_image(
+                            prompt=prompt,
+                            image=adapter_image,
+                            size=size,
+                            context=context,
+                        )
+                        adapter_span.set(source=page_result.source, layouts=len(page_result.layouts))
+                    _complete_page_result(page_result, scale_x, scale_y, timings, started, context, crop_box)
+                    layouts = page_result.layouts
+                yield image, page_result
+
+    def _prepare_stage_image(
+        self,
+        image: "Image.Image",
+        stage_index: int,
+        layouts: list[Layout],
+        fill_color: tuple[int, int, int] | None,
+        size: DeepSeekOCRSize,
+        timings: dict[str, float],
+    ) -> tuple[
+        "Image.Image",
+        tuple[int, int, int] | None,
+        tuple[int, int, int, int] | None,
+        "Image.Image",
+        float,
+        float,
+    ]:
+        crop_box: tuple[int, int, int, int] | None = None
+        if stage_index > 0:
+            image, fill_color, crop_box = self._next_stage_image(image, layouts, fill_color, timings)
+        adapter_image, scale_x, scale_y = _fit_adapter_image(
+            image=_crop_stage_image(image, crop_box, timings),
+            max_image_side=_adapter_max_image_side(self._adapter, size),
+            timings=timings,
+        )
+        return image, fill_color, crop_box, adapter_image, scale_x, scale_y
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Hashable, Sequence, TypeVar
+
+_R = TypeVar("_R")
+_T = TypeVar("_T")
+
+
+@dataclass
+class _PendingBatch(Generic[_R, _T]):
+    requests: list[_R] = field(default_factory=list)
+    futures: list["Future[_T]"] = field(default_factory=list)
+    full: threading.Event = field(default_factory=threading.Event)
+
+
+BatchRunner = Callable[[Hashable, Sequence[_R]], Sequence["_T | BaseException"]]
+
+
+class MicroBatcher(Generic[_R, _T]):
+    """把短时间窗口内到达的同类请求合并成一批执行。
+
+    同一个 key 的第一个请求成为这一批的 leader：它最多等待 batch_window_seconds，
+    或者等到凑满 max_batch_size 个请求，然后在自己的线程中调用 run_batch。
+    run_batch 按请求顺序返回结果，某个元素是异常时只有对应的请求抛出它；
+    run_batch 本身抛出异常时，整批请求都抛出该异常。
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        batch_window_seconds: float = 0.01,
+        max_batch_size: int = 8,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if batch_window_seconds < 0:
+            raise ValueError("batch_window_seconds must not be negative")
+        self._run_batch = run_batch
+        self._batch_window_seconds = batch_window_seconds
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._pending: dict[Hashable, _PendingBatch[_R, _T]] = {}
+
+    def submit(self, key: Hashable, request: _R) -> _T:
+        future: Future[_T] = Future()
+        with self._lock:
+            batch = self._pending.get(key)
+            is_leader = batch is None
+            if batch is None:
+                batch = _PendingBatch()
+                self._pending[key] = batch
+            batch.requests.append(request)
+            batch.futures.append(future)
+            if len(batch.requests) >= self._max_batch_size:
+                # 凑满后立即关闭这一批，之后的请求开始新的一批
+                del self._pending[key]
+                batch.full.set()
+
+        if is_leader:
+            self._lead(key, batch)
+        return future.result()
+
+    def _lead(self, key: Hashable, batch: _PendingBatch[_R, _T]) -> None:
+        if self._batch_window_seconds > 0:
+            batch.full.wait(self._batch_window_seconds)
+        with self._lock:
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+
+        try:
+            results = self._run_batch(key, batch.requests)
+            if len(results) != len(batch.requests):
+                raise RuntimeError(
+                    f"Batch returned {len(results)} results for {len(batch.requests)} requests."
+                )
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for future in batch.futures:
+                future.set_exception(error)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,445 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Mapping, Protocol, runtime_checkable
+
+from .adapters.images import temporary_image_file
+from .timings import timed
+from .types import (
+    DeepSeekOCRSize,
+    ExtractionContext,
+    ImageOCRAdapter,
+    Layout,
+    LayoutKind,
+    OCRAdapter,
+    OCRPageResult,
+)
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+_CACHE_FORMAT_VERSION = 1
+# 描述当次请求本身（上传大小、耗时等）的 raw 字段，命中缓存时不再成立，不写入缓存
+_REQUEST_RAW_KEYS = ("upload",)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@runtime_checkable
+class OCRResultStore(Protocol):
+    evictions: int
+
+    def get(self, key: str) -> bytes | None:
+        ...
+
+    def put(self, key: str, value: bytes) -> None:
+        ...
+
+
+class CachedOCRAdapter:
+    """按内容寻址缓存 OCRPageResult 的 adapter 包装。
+
+    缓存键由页面图片内容的哈希、source、prompt、尺寸预设和模型版本组成。
+    命中时不调用被包装的 adapter，也不会增加 context 中的 token 计数。
+    缓存的是 adapter 的原始输出（缩放回原图坐标之前），每次命中都返回新的对象。
+    命中的结果在 raw["cache"] 中标记为 "hit"，timings 只有读取缓存的 cache 阶段；
+    raw["upload"] 等描述原始请求的字段不会写入缓存。
+    """
+
+    def __init__(
+        self,
+        adapter: OCRAdapter,
+        store: OCRResultStore,
+        source: str | None = None,
+        revision: str | None = None,
+    ) -> None:
+        self._adapter = adapter
+        self._store = store
+        self._source = source or f"{type(adapter).__module__}.{type(adapter).__qualname__}"
+        self._revision = revision
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def allows_multi_stage(self) -> bool:
+        return self._adapter.allows_multi_stage
+
+    @property
+    def max_image_side(self) -> int | Mapping[DeepSeekOCRSize, int] | None:
+        return getattr(self._adapter, "max_image_side", None)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._store.evictions,
+            )
+
+    @property
+    def prompt(self) -> str:
+        # 被包装的 adapter 没有自定义 prompt 时抛出 AttributeError，抽取器沿用默认 prompt
+        return getattr(self._adapter, "prompt")
+
+    def download(self, revision: str | None) -> None:
+        self._adapter.download(revision)
+
+    def load(self) -> None:
+        self._adapter.load()
+
+    def extract_page(
+        self,
+        prompt: str,
+        image_path: Path,
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        content_hash = hashlib.sha256(b"file\0" + image_path.read_bytes()).hexdigest()
+        return self._cached(
+            key=self._key(content_hash, prompt, size),
+            extract=lambda: self._adapter.extract_page(
+                prompt=prompt,
+                image_path=image_path,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            ),
+        )
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        return self._cached(
+            key=self._key(image_content_hash(image), prompt, size),
+            extract=lambda: self._extract_image(
+                prompt, image, output_path, size, context, device_number
+            ),
+        )
+
+    def _extract_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        if isinstance(self._adapter, ImageOCRAdapter):
+            return self._adapter.extract_page_image(
+                prompt=prompt,
+                image=image,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
+        with temporary_image_file(image, output_path) as image_path:
+            return self._adapter.extract_page(
+                prompt=prompt,
+                image_path=image_path,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
+
+    def _key(self, content_hash: str, prompt: str, size: DeepSeekOCRSize) -> str:
+        key = json.dumps(
+            [_CACHE_FORMAT_VERSION, content_hash, self._source, prompt, size, self._revision],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str, extract: Callable[[], OCRPageResult]) -> OCRPageResult:
+        timings: dict[str, float] = {}
+        with timed(timings, "cache"):
+            cached = self._store.get(key)
+            page_result = decode_page_result(cached) if cached is not None else None
+        if page_result is not None:
+            with self._lock:
+                self._hits += 1
+            page_result.raw = {**(page_result.raw or {}), "cache": "hit"}
+            page_result.timings = timings
+            return page_result
+
+        with self._lock:
+            self._misses += 1
+        page_result = extract()
+        self._store.put(key, encode_page_result(page_result))
+        return page_result
+
+
+def image_content_hash(image: "Image.Image") -> str:
+    digest = hashlib.sha256()
+    digest.update(f"pixels\0{image.mode}\0{image.size[0]}x{image.size[1]}\0".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def encode_page_result(page_result: OCRPageResult) -> bytes:
+    # structured 由 layouts 推导，读取时交给抽取器重新构造
+    data = {
+        "source": page_result.source,
+        "raw_text": page_result.raw_text,
+        "raw": {key: value for key, value in page_result.raw.items() if key not in _REQUEST_RAW_KEYS}
+        if page_result.raw is not None
+        else None,
+        "layouts": [
+            {
+                "det": list(layout.det),
+                "text": layout.text,
+                "type": layout.type,
+                "polygon": [list(point) for point in layout.polygon]
+                if layout.polygon is not None
+                else None,
+                "html": layout.html,
+                "source": layout.source,
+                "raw": dict(layout.raw) if layout.raw is not None else None,
+                "kind": layout.kind.value,
+            }
+            for layout in page_result.layouts
+        ],
+    }
+    return json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def decode_page_result(value: bytes) -> OCRPageResult:
+    data = json.loads(value.decode("utf-8"))
+    return OCRPageResult(
+        layouts=[
+            Layout(
+                det=tuple(layout["det"]),  # type: ignore[arg-type]
+                text=layout["text"],
+                type=layout["type"],
+                polygon=[tuple(point) for point in layout["polygon"]]  # type: ignore[misc]
+                if layout["polygon"] is not None
+                else None,
+                html=layout["html"],
+                source=layout["source"],
+                raw=layout["raw"],
+                kind=LayoutKind(layout["kind"]),
+            )
+            for layout in data["layouts"]
+        ],
+        source=data["source"],
+        raw_text=data["raw_text"],
+        raw=data["raw"],
+    )
+
+
+class MemoryResultStore:
+    """进程内 LRU 缓存，超出条目数或字节数上限时淘汰最久未使用的条目。"""
+
+    def __init__(self, max_entries: int | None = 1024, max_bytes: int | None = None) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._total_bytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            self._entries[key] = value
+            self._total_bytes += len(value)
+            while self._entries and _over_limit(
+                len(self._entries), self._total_bytes, self._max_entries, self._max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+                self.evictions += 1
+
+
+class SQLiteResultStore:
+    """SQLite 文件缓存，可在多个进程之间共享，按最近访问时间淘汰。"""
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.evictions = 0
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ocr_results_accessed_at "
+                "ON ocr_results (accessed_at)"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value FROM ocr_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE ocr_results SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            return bytes(row[0])
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, value, size, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            if self._max_entries is None and self._max_bytes is None:
+                return
+            entries, total_bytes = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results"
+            ).fetchone()
+            if not _over_limit(entries, total_bytes, self._max_entries, self._max_bytes):
+                return
+            evicted: list[str] = []
+            for old_key, size in self._connection.execute(
+                "SELECT key, size FROM ocr_results ORDER BY accessed_at"
+            ):
+                if not _over_limit(entries, total_bytes, self._max_entries, self._max_bytes):
+                    break
+                evicted.append(old_key)
+                entries -= 1
+                total_bytes -= size
+            self._connection.executemany(
+                "DELETE FROM ocr_results WHERE key = ?", [(old_key,) for old_key in evicted]
+            )
+            self.evictions += len(evicted)
+
+
+class DirectoryResultStore:
+    """每个结果一个 JSON 文件的目录缓存，按最近访问顺序淘汰条目。
+
+    设置了上限时，启动时扫描一次目录，之后在内存中维护条目数、总字节数和访问顺序，
+    写入时只在超出上限后才删除文件。多个进程共享目录时，其他进程写入的文件在下次启动时才计入。
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> 文件字节数，按最近访问排序；未设置上限时不需要
+        self._sizes: OrderedDict[str, int] | None = None
+        self._total_bytes = 0
+        self.evictions = 0
+        if max_entries is not None or max_bytes is not None:
+            self._sizes = self._scan()
+            self._total_bytes = sum(self._sizes.values())
+
+    def get(self, key: str) -> bytes | None:
+        file_path = self._file_path(key)
+        try:
+            value = file_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            pass
+        if self._sizes is not None:
+            with self._lock:
+                if key in self._sizes:
+                    self._sizes.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        file_path = self._file_path(key)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = file_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(value)
+        os.replace(temp_path, file_path)
+        if self._sizes is None:
+            return
+        with self._lock:
+            self._total_bytes += len(value) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(value)
+            while self._sizes and _over_limit(
+                len(self._sizes), self._total_bytes, self._max_entries, self._max_bytes
+            ):
+                evicted_key, size = self._sizes.popitem(last=False)
+                self._file_path(evicted_key).unlink(missing_ok=True)
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def _scan(self) -> "OrderedDict[str, int]":
+        files: list[tuple[float, str, int]] = []
+        for file_path in self._path.glob("*/*.json"):
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, file_path.stem, stat.st_size))
+        files.sort()
+        return OrderedDict((key, size) for _, key, size in files)
+
+    def _file_path(self, key: str) -> Path:
+        return self._path / key[:2] / f"{key}.json"
+
+
+def _over_limit(
+    entries: int,
+    total_bytes: int,
+    max_entries: int | None,
+    max_bytes: int | None,
+) -> bool:
+    return (max_entries is not None and entries > max_entries) or (
+        max_bytes is not None and total_bytes > max_bytes
+    )
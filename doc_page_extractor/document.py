@@ -0,0 +1,223 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, Iterable
+
+from .extraction_context import ExtractionAbortedError, TokenLimitError, raise_if_aborted
+from .timings import add_timings
+from .tracing import Span, span
+from .types import DeepSeekOCRSize, ExtractionContext, OCRPageResult, PageExtractor
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+def extract_document(
+    extractor: PageExtractor,
+    pages: Iterable["Image.Image"],
+    size: DeepSeekOCRSize,
+    stages: int = 1,
+    concurrency: int = 4,
+    ordered: bool = True,
+    context: ExtractionContext | None = None,
+    device_number: int | None = None,
+) -> Generator[tuple[int, OCRPageResult], None, None]:
+    """并发抽取多页文档，产出 (page_index, OCRPageResult)。
+
+    同时在途的页面不超过 concurrency 页，pages 按需读取。ordered 为 True 时按输入顺序产出，
+    否则按完成顺序产出；多阶段抽取时同一页的各阶段结果依次产出。
+    每页使用独立的 ExtractionContext，结束后把 token 计数累加回 context；
+    context 的 max_tokens / max_output_tokens 是整份文档共享的额度，在途页面已用的 token 也计入其中，
+    超出时所有页面都会停止并抛出 TokenLimitError；
+    若 context 设置了 output_dir_path，各页写入其下以 page_index 命名的 page-N 子目录。
+    任何一页失败或调用方提前关闭生成器时，其余页面会被中断。
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    document = _DocumentContext(context)
+    indexed_pages = enumerate(pages)
+    pending: dict[Future[list[OCRPageResult]], int] = {}
+    exhausted = False
+
+    try:
+        with span(
+            "document",
+            context.tracer if context else None,
+            activate=False,
+            size=size,
+            stages=stages,
+            concurrency=concurrency,
+        ) as document_span, ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="doc-page-extractor-page",
+        ) as executor:
+            try:
+                while True:
+                    while not exhausted and len(pending) < concurrency:
+                        raise_if_aborted(context)
+                        next_page = next(indexed_pages, None)
+                        if next_page is None:
+                            exhausted = True
+                            break
+                        index, image = next_page
+                        future = executor.submit(
+                            document.extract_page,
+                            extractor,
+                            index,
+                            image,
+                            size,
+                            stages,
+                            device_number,
+                            document_span,
+                        )
+                        pending[future] = index
+
+                    if not pending:
+                        break
+
+                    future = _next_future(pending, ordered)
+                    index = pending.pop(future)
+                    for page_result in future.result():
+                        yield index, page_result
+            finally:
+                document.stop()
+                for future in pending:
+                    future.cancel()
+
+    except ExtractionAbortedError as error:
+        # 此时所有页面都已结束；抛出最先中断的那一页的错误，token 计数为整份文档的累计值
+        first_error = document.first_error or error
+        first_error.input_tokens, first_error.output_tokens = document.tokens()
+        if first_error is error:
+            raise
+        raise first_error from None
+
+
+def _next_future(
+    pending: dict[Future[list[OCRPageResult]], int], ordered: bool
+) -> Future[list[OCRPageResult]]:
+    if ordered:
+        future = min(pending, key=pending.__getitem__)
+        wait((future,))
+        return future
+
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    return min(done, key=pending.__getitem__)
+
+
+class _DocumentContext:
+    # 整份文档共享的中断标记、token 计数与阶段耗时，各页面线程通过它派生独立的 ExtractionContext。
+    # adapter 在生成过程中就把 token 写入页面的 context，所以在途页面的用量可以随时读到
+    def __init__(self, context: ExtractionContext | None) -> None:
+        self._context = context
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.first_error: ExtractionAbortedError | None = None
+        self._input_tokens = 0
+        self._output_tokens = 0
+        # ExtractionContext 不可哈希，按 id 登记在途页面
+        self._running: dict[int, ExtractionContext] = {}
+        if context is not None:
+            self._input_tokens = context.input_tokens
+            self._output_tokens = context.output_tokens
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def check_aborted(self) -> bool:
+        if self._stopped.is_set():
+            return True
+        if self._context is not None and self._context.check_aborted():
+            return True
+        if self._remaining_tokens(*self.tokens()) < 0:
+            # 已用 token 超出整份文档的额度，先记下 TokenLimitError，再让所有页面停止
+            self._fail(TokenLimitError())
+            return True
+        return False
+
+    def tokens(self) -> tuple[int, int]:
+        # 已结束页面的累计值加上在途页面当前的用量
+        with self._lock:
+            return (
+                self._input_tokens + sum(page.input_tokens for page in self._running.values()),
+                self._output_tokens + sum(page.output_tokens for page in self._running.values()),
+            )
+
+    def _remaining_tokens(self, input_tokens: int, output_tokens: int) -> float:
+        context = self._context
+        remaining = float("inf")
+        if context is not None and context.max_tokens is not None:
+            remaining = min(remaining, context.max_tokens - input_tokens - output_tokens)
+        if context is not None and context.max_output_tokens is not None:
+            remaining = min(remaining, context.max_output_tokens - output_tokens)
+        return remaining
+
+    def _fail(self, error: ExtractionAbortedError) -> None:
+        with self._lock:
+            if self.first_error is None:
+                self.first_error = error
+        self.stop()
+
+    def extract_page(
+        self,
+        extractor: PageExtractor,
+        index: int,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        stages: int,
+        device_number: int | None,
+        document_span: Span,
+    ) -> list[OCRPageResult]:
+        page_context = self._page_context(index)
+        with self._lock:
+            self._running[id(page_context)] = page_context
+        try:
+            if self._remaining_tokens(*self.tokens()) <= 0:
+                raise TokenLimitError()
+            with span("document.page", parent=document_span, page=index):
+                return [
+                    page_result
+                    for _, page_result in extractor.extract_page_results(
+                        image=image,
+                        size=size,
+                        stages=stages,
+                        context=page_context,
+                        device_number=device_number,
+                    )
+                ]
+        except ExtractionAbortedError as error:
+            self._fail(error)
+            raise
+        finally:
+            self._add_usage(page_context)
+
+    def _page_context(self, index: int) -> ExtractionContext:
+        context = self._context
+        page_context = ExtractionContext(check_aborted=self.check_aborted)
+        if context is None:
+            return page_context
+
+        page_context.tracer = context.tracer
+        if context.output_dir_path is not None:
+            page_dir_path = Path(context.output_dir_path) / f"page-{index}"
+            page_dir_path.mkdir(parents=True, exist_ok=True)
+            page_context.output_dir_path = page_dir_path
+
+        # 页面自己的上限是开始时整份文档的剩余额度；并发页面合计超出时由 check_aborted 停止
+        input_tokens, output_tokens = self.tokens()
+        if context.max_tokens is not None:
+            page_context.max_tokens = context.max_tokens - input_tokens - output_tokens
+        if context.max_output_tokens is not None:
+            page_context.max_output_tokens = context.max_output_tokens - output_tokens
+        return page_context
+
+    def _add_usage(self, page_context: ExtractionContext) -> None:
+        with self._lock:
+            self._running.pop(id(page_context), None)
+            self._input_tokens += page_context.input_tokens
+            self._output_tokens += page_context.output_tokens
+            if self._context is not None:
+                self._context.input_tokens = self._input_tokens
+                self._context.output_tokens = self._output_tokens
+                add_timings(self._context.timings, page_context.timings)
@@ -18,6 +18,18 @@ class TokenLimitError(ExtractionAbortedError):
     pass
 
 
+def abort_error(context: ExtractionContext) -> AbortError:
+    error = AbortError()
+    error.input_tokens = context.input_tokens
+    error.output_tokens = context.output_tokens
+    return error
+
+
+def raise_if_aborted(context: ExtractionContext | None) -> None:
+    if context is not None and context.check_aborted():
+        raise abort_error(context)
+
+
 class AbortStoppingCriteria:
     def __init__(self, context: ExtractionContext) -> None:
         super().__init__()
@@ -45,10 +57,7 @@ class AbortStoppingCriteria:
             self._error = error
 
     def notify_finished(self):
-        if self._input_tokens is not None:
-            self._raw_context.input_tokens += self._input_tokens
-        if self._output_tokens is not None:
-            self._raw_context.output_tokens += self._output_tokens
+        # token 在生成过程中已经写入 context，这里只补全错误上的计数
         if self._error:
             self._error.input_tokens = self._raw_context.input_tokens
             self._error.output_tokens = self._raw_context.output_tokens
@@ -61,22 +70,35 @@ class AbortStoppingCriteria:
         tokens_count: int = 0
         for i in range(input_ids.shape[0]):
             tokens_count += input_ids[i].shape[0]
+        return cast(Any, self.update(tokens_count))
+
+    def update(self, tokens_count: int) -> bool:
+        """以当前的 prompt 与已生成 token 总数更新计数，返回是否应停止生成。
+
+        批量生成时由 BatchStoppingCriteria 传入单行去掉填充后的数量。
+        """
+        if self._error:
+            return True
 
         if self._input_tokens is None:
             # 首次调用在接收到第一个 output token 时，故可反推 input_tokens
             self._input_tokens = tokens_count - 1
+            self._raw_context.input_tokens += self._input_tokens
 
-        self._output_tokens = tokens_count - self._input_tokens
+        # 每生成一个 token 就写入 context，共享额度的调用方（extract_document）可以随时看到用量
+        output_tokens = tokens_count - self._input_tokens
+        self._raw_context.output_tokens += output_tokens - (self._output_tokens or 0)
+        self._output_tokens = output_tokens
 
         if (self._max_tokens is not None and tokens_count > self._max_tokens) or (
             self._max_output_tokens is not None
             and self._output_tokens > self._max_output_tokens
         ):
             self._error = TokenLimitError()
-            return cast(Any, True)
+            return True
 
         if self._check_aborted():
             self._error = AbortError()
-            return cast(Any, True)
+            return True
 
-        return cast(Any, False)
+        return False
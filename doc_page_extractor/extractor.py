@@ -1,6 +1,8 @@
 import sys
 import tempfile
+import time
 import warnings
+from contextlib import contextmanager
 from pathlib import Path
 from typing import TYPE_CHECKING, Generator, Iterable
 
@@ -9,25 +11,37 @@ from .adapters.unlimited import (
     UnlimitedOCRVendorAdapter,
     UnlimitedOCRVendorConfig,
 )
+from .adapters.images import resolve_max_image_side
 from .adapters.deepseek import (
     DeepSeekOCR2VendorAdapter,
     DeepSeekOCR2VendorConfig,
     DeepSeekOCRVendorAdapter,
     DeepSeekOCRVendorConfig,
+    DeepSeekLayoutStreamParser,
     _DeepSeekLocalAdapter,
     parse_deepseek_ocr2_layouts,
     parse_deepseek_ocr_layouts,
+    stream_deepseek_ocr2_layouts,
+    stream_deepseek_ocr_layouts,
 )
+from .metrics import MetricsRegistry
 from .types import (
+    AsyncOCRAdapter,
     DeepSeekOCRSize,
     DeepSeekBackend,
     ExtractionContext,
+    ImageOCRAdapter,
     Layout,
     OCRAdapter,
     OCRPageResult,
     PageExtractor,
+    RawRetention,
+    StageMode,
+    StreamingOCRAdapter,
 )
 from .structure import build_structured_page
+from .timings import add_timing, add_timings, timed
+from .tracing import Span, span
 
 if TYPE_CHECKING:
     from PIL import Image
@@ -40,6 +54,10 @@ def create_deepseek_ocr_page_extractor(
     model_path: Path | str | None = None,
     local_only: bool = False,
     enable_devices_numbers: Iterable[int] | None = None,
+    max_batch_size: int = 1,
+    batch_window_seconds: float = 0.01,
+    metrics: MetricsRegistry | None = None,
+    stage_mode: StageMode = "redact",
 ) -> PageExtractor:
     if ocr_model == "deepseek-ocr":
         from .model import DeepSeekOCRHuggingFaceModel
@@ -48,8 +66,12 @@ def create_deepseek_ocr_page_extractor(
             model_path=Path(model_path) if model_path is not None else None,
             local_only=local_only,
             enable_devices_numbers=enable_devices_numbers,
+            max_batch_size=max_batch_size,
+            batch_window_seconds=batch_window_seconds,
+            metrics=metrics,
         )
         parse_layouts = parse_deepseek_ocr_layouts
+        stream_layouts: DeepSeekLayoutStreamParser | None = stream_deepseek_ocr_layouts
     elif ocr_model == "deepseek-ocr2":
         from .model import DeepSeekOCR2HuggingFaceModel
 
@@ -57,8 +79,12 @@ def create_deepseek_ocr_page_extractor(
             model_path=Path(model_path) if model_path is not None else None,
             local_only=local_only,
             enable_devices_numbers=enable_devices_numbers,
+            max_batch_size=max_batch_size,
+            batch_window_seconds=batch_window_seconds,
+            metrics=metrics,
         )
         parse_layouts = parse_deepseek_ocr2_layouts
+        stream_layouts = stream_deepseek_ocr2_layouts
     else:
         raise ValueError(f"Unsupported OCR model: {ocr_model}")
 
@@ -67,7 +93,9 @@ def create_deepseek_ocr_page_extractor(
             model,
             source=ocr_model,
             parse_layouts=parse_layouts,
-        )
+            stream_layouts=stream_layouts,
+        ),
+        stage_mode=stage_mode,
     )
 
 
@@ -75,6 +103,10 @@ def create_unlimited_ocr_page_extractor(
     model_path: Path | str | None = None,
     local_only: bool = False,
     enable_devices_numbers: Iterable[int] | None = None,
+    max_batch_size: int = 1,
+    batch_window_seconds: float = 0.01,
+    metrics: MetricsRegistry | None = None,
+    raw_retention: RawRetention = "keep",
 ) -> PageExtractor:
     from .model import UnlimitedOCRHuggingFaceModel
 
@@ -82,26 +114,34 @@ def create_unlimited_ocr_page_extractor(
         model_path=Path(model_path) if model_path is not None else None,
         local_only=local_only,
         enable_devices_numbers=enable_devices_numbers,
+        max_batch_size=max_batch_size,
+        batch_window_seconds=batch_window_seconds,
+        metrics=metrics,
     )
-    return _PageExtractorImpls(UnlimitedModelOCRAdapter(model))
+    return _PageExtractorImpls(UnlimitedModelOCRAdapter(model, raw_retention=raw_retention))
 
 
-def create_page_extractor_with_adapter(adapter: OCRAdapter) -> PageExtractor:
+def create_page_extractor_with_adapter(
+    adapter: OCRAdapter,
+    stage_mode: StageMode = "redact",
+) -> PageExtractor:
     if not isinstance(adapter, OCRAdapter):
         raise TypeError("adapter must implement OCRAdapter protocol")
-    return _PageExtractorImpls(adapter)
+    return _PageExtractorImpls(adapter, stage_mode=stage_mode)
 
 
 def create_deepseek_ocr_vendor_page_extractor(
     config: DeepSeekOCRVendorConfig,
+    stage_mode: StageMode = "redact",
 ) -> PageExtractor:
-    return _PageExtractorImpls(DeepSeekOCRVendorAdapter(config))
+    return _PageExtractorImpls(DeepSeekOCRVendorAdapter(config), stage_mode=stage_mode)
 
 
 def create_deepseek_ocr2_vendor_page_extractor(
     config: DeepSeekOCR2VendorConfig,
+    stage_mode: StageMode = "redact",
 ) -> PageExtractor:
-    return _PageExtractorImpls(DeepSeekOCR2VendorAdapter(config))
+    return _PageExtractorImpls(DeepSeekOCR2VendorAdapter(config), stage_mode=stage_mode)
 
 
 def create_unlimited_ocr_vendor_page_extractor(
@@ -110,93 +150,60 @@ def create_unlimited_ocr_vendor_page_extractor(
     return _PageExtractorImpls(UnlimitedOCRVendorAdapter(config))
 
 
-class _PageExtractorImpls:
-    def __init__(self, adapter: OCRAdapter) -> None:
-        self._adapter: OCRAdapter = adapter
-
-    def download_ocr_model(self, revision: str | None = None) -> None:
-        self._adapter.download(revision)
+class _PageStages:
+    # 同步与异步抽取器共享的多阶段逻辑：阶段数校验、阶段之间的页面涂抹与裁剪
+    _adapter: OCRAdapter | AsyncOCRAdapter
+    _stage_mode: StageMode = "redact"
 
-    def load_ocr_model(self) -> None:
-        self._adapter.load()
+    def _init_stage_mode(self, stage_mode: StageMode) -> None:
+        if stage_mode not in ("redact", "crop"):
+            raise ValueError(f"Unsupported stage mode: {stage_mode}")
+        self._stage_mode = stage_mode
 
-    def extract_page_results(
-        self,
-        image: "Image.Image",
-        size: DeepSeekOCRSize,
-        stages: int = 1,
-        context: ExtractionContext | None = None,
-        device_number: int | None = None,
-    ) -> Generator[tuple["Image.Image", OCRPageResult], None, None]:
+    def _effective_stages(self, stages: int) -> int:
         assert stages >= 1, "stages must be at least 1"
         if stages > 1 and not self._adapter.allows_multi_stage:
             warnings.warn(
                 "This OCR adapter does not support multi-stage redaction; "
                 "using a single extraction stage.",
                 RuntimeWarning,
-                stacklevel=2,
+                stacklevel=3,
             )
-            stages = 1
-
-        fill_color: tuple[int, int, int] | None = None
-        output_path: Path | None = None
-        temp_dir: tempfile.TemporaryDirectory | None = None
+            return 1
+        return stages
 
-        if context and context.output_dir_path:
-            output_path = Path(context.output_dir_path)
-        else:
-            temp_dir = tempfile.TemporaryDirectory()
-            output_path = Path(temp_dir.name)
-
-        try:
-            for i in range(stages):
-                image_path = output_path / f"raw-{i+1}.png"
-                image.save(image_path, "PNG")
-                prepared_image_path, scale_x, scale_y = _prepare_adapter_image(
+    def _next_stage_image(
+        self,
+        image: "Image.Image",
+        layouts: list[Layout],
+        fill_color: tuple[int, int, int] | None,
+        timings: dict[str, float],
+    ) -> tuple["Image.Image", tuple[int, int, int], tuple[int, int, int, int] | None]:
+        """涂抹上一阶段识别到的区域，返回整页图片、填充色和 crop 模式下要送入 adapter 的区域。
+
+        区域为 None 时送入整页：redact 模式，或者页面已经没有未涂抹的部分。
+        """
+        from .redacter import background_color, redact
+
+        if fill_color is None:
+            with timed(timings, "background"):
+                fill_color = background_color(image)
+        with timed(timings, "redact"):
+            rectangles = list(
+                self._redact_rectangles(
                     image=image,
-                    image_path=image_path,
-                    output_path=output_path,
-                    max_image_side=getattr(self._adapter, "max_image_side", None),
+                    dets=(layout.det for layout in layouts),
                 )
-                try:
-                    page_result = self._adapter.extract_page(
-                        prompt=getattr(self._adapter, "prompt", _DEFAULT_PROMPT),
-                        image_path=prepared_image_path,
-                        output_path=output_path,
-                        size=size,
-                        context=context,
-                        device_number=device_number,
-                    )
-                finally:
-                    if prepared_image_path != image_path:
-                        prepared_image_path.unlink(missing_ok=True)
-                    image_path.unlink(missing_ok=True)
-
-                layouts = page_result.layouts
-                if scale_x != 1.0 or scale_y != 1.0:
-                    _scale_layout_coordinates(layouts, scale_x, scale_y)
-                    if page_result.structured is not None:
-                        page_result.structured = build_structured_page(layouts)
-                if page_result.structured is None:
-                    page_result.structured = build_structured_page(layouts)
-                yield image, page_result
-
-                if i < stages - 1:
-                    from .redacter import background_color, redact
-
-                    if fill_color is None:
-                        fill_color = background_color(image)
-                    image = redact(
-                        image=image.copy(),
-                        fill_color=fill_color,
-                        rectangles=self._redact_rectangles(
-                            image=image,
-                            dets=(layout.det for layout in layouts),
-                        ),
-                    )
-        finally:
-            if temp_dir is not None:
-                temp_dir.cleanup()
+            )
+            redacted = redact(
+                image=image.copy(),
+                fill_color=fill_color,
+                rectangles=rectangles,
+            )
+        crop_box = None
+        if self._stage_mode == "crop":
+            crop_box = _unredacted_box(image.size, rectangles)
+        return redacted, fill_color, crop_box
 
     def _redact_rectangles(
         self, image: "Image.Image", dets: Iterable[tuple[int, int, int, int]]
@@ -220,42 +227,274 @@ class _PageExtractorImpls:
                 parts.append((x1, x2, height))
 
         parts.sort()
-        forbidden: int = -sys.maxsize
+        # 每个区块的右边界会被其后第一个更高的区块截断：按 x1 排序后，
+        # 后面的区块 x1 不会更小，所以第一个更高的区块就是 x1 最小的那个。
+        # 从右向左用单调栈求出它，整体代价是排序的 O(n log n)
+        blockers: list[int | None] = [None] * len(parts)
+        taller: list[int] = []  # 栈中区块的高度从栈底到栈顶严格递减
+        for i in range(len(parts) - 1, -1, -1):
+            height = parts[i][2]
+            while taller and parts[taller[-1]][2] <= height:
+                taller.pop()
+            if taller:
+                blockers[i] = parts[taller[-1]][0]
+            taller.append(i)
 
-        for i, (x1, x2, height) in enumerate(parts):
+        forbidden: int = -sys.maxsize
+        for (x1, x2, height), blocker in zip(parts, blockers):
             left = max(x1, forbidden)
-            right = x2
-            for j in range(i + 1, len(parts)):
-                nx1, _, nheight = parts[j]
-                if nheight > height:
-                    right = min(right, nx1)
+            right = x2 if blocker is None else min(x2, blocker)
             if left < right:
                 yield (left, y_cutted, right, y_cutted + height)
                 forbidden = right
 
 
-def _prepare_adapter_image(
+class _PageExtractorImpls(_PageStages):
+    def __init__(self, adapter: OCRAdapter, stage_mode: StageMode = "redact") -> None:
+        self._adapter: OCRAdapter = adapter
+        self._init_stage_mode(stage_mode)
+
+    def download_ocr_model(self, revision: str | None = None) -> None:
+        self._adapter.download(revision)
+
+    def load_ocr_model(self) -> None:
+        self._adapter.load()
+
+    def extract_page_results(
+        self,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        stages: int = 1,
+        context: ExtractionContext | None = None,
+        device_number: int | None = None,
+    ) -> Generator[tuple["Image.Image", OCRPageResult], None, None]:
+        stages = self._effective_stages(stages)
+        fill_color: tuple[int, int, int] | None = None
+        layouts: list[Layout] = []
+
+        with span(
+            "page",
+            context.tracer if context else None,
+            activate=False,
+            size=size,
+            stages=stages,
+        ) as page_span, _output_directory(context) as output_path:
+            for i in range(stages):
+                with span("stage", parent=page_span, stage=i + 1):
+                    started = time.perf_counter()
+                    timings: dict[str, float] = {}
+                    crop_box: tuple[int, int, int, int] | None = None
+                    if i > 0:
+                        image, fill_color, crop_box = self._next_stage_image(image, layouts, fill_color, timings)
+                    stage_image = _crop_stage_image(image, crop_box, timings)
+                    adapter_image, scale_x, scale_y = _fit_adapter_image(
+                        image=stage_image,
+                        max_image_side=_adapter_max_image_side(self._adapter, size),
+                        timings=timings,
+                    )
+                    image_stem = f"raw-{i+1}" if crop_box is None else f"raw-{i+1}-cropped"
+                    if adapter_image is not stage_image:
+                        image_stem += "-resized"
+                    with _adapter_span(self._adapter, context) as adapter_span:
+                        page_result = self._extract_adapter_page(
+                            image=adapter_image,
+                            image_path=output_path / f"{image_stem}.png",
+                            output_path=output_path,
+                            size=size,
+                            context=context,
+                            device_number=device_number,
+                            timings=timings,
+                        )
+                        adapter_span.set(source=page_result.source, layouts=len(page_result.layouts))
+
+                    _complete_page_result(page_result, scale_x, scale_y, timings, started, context, crop_box)
+                    layouts = page_result.layouts
+                # 当前 span 不能跨越 yield，否则会泄漏到调用方的上下文
+                yield image, page_result
+
+    def stream_page_layouts(
+        self,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None = None,
+        device_number: int | None = None,
+    ) -> Generator[Layout, None, None]:
+        """单阶段抽取，每个版面块生成完毕就立即产出，坐标已换算回原图。
+
+        提前关闭生成器会中断推理。adapter 不支持流式输出时抛出 TypeError。
+        """
+        if not isinstance(self._adapter, StreamingOCRAdapter):
+            raise TypeError("adapter does not support streaming layouts")
+
+        adapter_image, scale_x, scale_y = _fit_adapter_image(
+            image=image,
+            max_image_side=_adapter_max_image_side(self._adapter, size),
+        )
+        with _output_directory(context) as output_path:
+            for layout in self._adapter.stream_page_layouts(
+                prompt=getattr(self._adapter, "prompt", _DEFAULT_PROMPT),
+                image=adapter_image,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            ):
+                if scale_x != 1.0 or scale_y != 1.0:
+                    _scale_layout_coordinates([layout], scale_x, scale_y)
+                yield layout
+
+    def _extract_adapter_page(
+        self,
+        image: "Image.Image",
+        image_path: Path,
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+        timings: dict[str, float],
+    ) -> OCRPageResult:
+        prompt = getattr(self._adapter, "prompt", _DEFAULT_PROMPT)
+        if isinstance(self._adapter, ImageOCRAdapter):
+            return self._adapter.extract_page_image(
+                prompt=prompt,
+                image=image,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
+
+        with timed(timings, "encode"):
+            image.save(image_path, "PNG")
+        try:
+            return self._adapter.extract_page(
+                prompt=prompt,
+                image_path=image_path,
+                output_path=output_path,
+                size=size,
+                context=context,
+                device_number=device_number,
+            )
+        finally:
+            image_path.unlink(missing_ok=True)
+
+
+@contextmanager
+def _output_directory(context: ExtractionContext | None) -> Generator[Path, None, None]:
+    if context and context.output_dir_path:
+        yield Path(context.output_dir_path)
+        return
+    temp_dir = tempfile.TemporaryDirectory()
+    try:
+        yield Path(temp_dir.name)
+    finally:
+        temp_dir.cleanup()
+
+
+def _adapter_max_image_side(adapter: object, size: DeepSeekOCRSize) -> int | None:
+    # adapter 可以给出一个整数，也可以按 size 预设给出不同的上限
+    return resolve_max_image_side(getattr(adapter, "max_image_side", None), size)
+
+
+def _fit_adapter_image(
     image: "Image.Image",
-    image_path: Path,
-    output_path: Path,
     max_image_side: int | None,
-) -> tuple[Path, float, float]:
+    timings: dict[str, float] | None = None,
+) -> tuple["Image.Image", float, float]:
     if max_image_side is None:
-        return image_path, 1.0, 1.0
+        return image, 1.0, 1.0
 
     width, height = image.size
     max_side = max(width, height)
     if max_side <= max_image_side:
-        return image_path, 1.0, 1.0
+        return image, 1.0, 1.0
 
     ratio = max_image_side / max_side
     resized_width = max(1, round(width * ratio))
     resized_height = max(1, round(height * ratio))
-    resized_path = output_path / f"{image_path.stem}-resized.png"
-    resized = image.resize((resized_width, resized_height))
-    resized.save(resized_path, "PNG")
+    with timed({} if timings is None else timings, "resize"):
+        resized = image.resize((resized_width, resized_height))
+
+    return resized, width / resized_width, height / resized_height
+
+
+def _unredacted_box(
+    size: tuple[int, int], rectangles: list[tuple[int, int, int, int]]
+) -> tuple[int, int, int, int] | None:
+    # rectangles 是 _redact_rectangles 的输出：先是上方整块，之后是按 x 递增、互不重叠的下方条带。
+    # 每一列从它被涂抹到的底部开始可见，取所有可见列的外接框
+    width, height = size
+    y_cutted = rectangles[0][3]
+    columns: list[tuple[int, int, int]] = []  # x1, x2, 可见部分的上边界
+    cursor = 0
+    for x1, _, x2, y2 in rectangles[1:]:
+        x1, x2 = max(x1, cursor), min(x2, width)
+        if x1 >= x2:
+            continue
+        if cursor < x1:
+            columns.append((cursor, x1, y_cutted))
+        columns.append((x1, x2, y2))
+        cursor = x2
+    if cursor < width:
+        columns.append((cursor, width, y_cutted))
+
+    visible = [column for column in columns if column[2] < height]
+    if not visible:
+        return None
+    return (visible[0][0], min(top for _, _, top in visible), visible[-1][1], height)
+
+
+def _crop_stage_image(
+    image: "Image.Image",
+    crop_box: tuple[int, int, int, int] | None,
+    timings: dict[str, float],
+) -> "Image.Image":
+    if crop_box is None:
+        return image
+    with timed(timings, "crop"):
+        return image.crop(crop_box)
+
+
+@contextmanager
+def _adapter_span(adapter: object, context: ExtractionContext | None) -> Generator[Span, None, None]:
+    input_tokens, output_tokens = (context.input_tokens, context.output_tokens) if context else (0, 0)
+    with span("adapter.extract_page", adapter=type(adapter).__name__) as current:
+        try:
+            yield current
+        finally:
+            if context is not None:
+                current.set(
+                    input_tokens=context.input_tokens - input_tokens,
+                    output_tokens=context.output_tokens - output_tokens,
+                )
+
 
-    return resized_path, width / resized_width, height / resized_height
+def _complete_page_result(
+    page_result: OCRPageResult,
+    scale_x: float,
+    scale_y: float,
+    timings: dict[str, float],
+    started: float,
+    context: ExtractionContext | None,
+    crop_box: tuple[int, int, int, int] | None = None,
+) -> None:
+    layouts = page_result.layouts
+    rescaled = scale_x != 1.0 or scale_y != 1.0
+    if rescaled:
+        _scale_layout_coordinates(layouts, scale_x, scale_y)
+    # adapter 看到的是裁剪后的区域，坐标平移回整页
+    moved = crop_box is not None and crop_box[:2] != (0, 0)
+    if moved:
+        _translate_layout_coordinates(layouts, crop_box[0], crop_box[1])
+    if rescaled or moved or page_result.structured is None:
+        with timed(timings, "structure"):
+            page_result.structured = build_structured_page(layouts)
+
+    # adapter 记录的阶段与抽取器自己的阶段合并，total 是该阶段的总耗时
+    add_timings(page_result.timings, timings)
+    add_timing(page_result.timings, "total", time.perf_counter() - started)
+    if context is not None:
+        add_timings(context.timings, page_result.timings)
 
 
 def _scale_layout_coordinates(
@@ -273,3 +512,11 @@ def _scale_layout_coordinates(
             layout.polygon = [
                 (round(x * scale_x), round(y * scale_y)) for x, y in layout.polygon
             ]
+
+
+def _translate_layout_coordinates(layouts: list[Layout], dx: int, dy: int) -> None:
+    for layout in layouts:
+        x1, y1, x2, y2 = layout.det
+        layout.det = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+        if layout.polygon is not None:
+            layout.polygon = [(x + dx, y + dy) for x, y in layout.polygon]
@@ -0,0 +1,163 @@
+import heapq
+import math
+from typing import Iterable, Literal
+
+from .types import Layout
+
+# (x1, y1, x2, y2)，与 Layout.det 相同
+Box = tuple[float, float, float, float]
+
+
+def box_intersects(a: Box, b: Box) -> bool:
+    """两个框有正面积的重叠；只共享一条边不算相交。"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def box_contains(outer: Box, inner: Box) -> bool:
+    """outer 完整包含 inner，边界重合也算包含。"""
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def box_distance(a: Box, b: Box) -> float:
+    """两个框之间最近两点的距离，相交或接触时为 0。"""
+    dx = max(a[0] - b[2], b[0] - a[2], 0)
+    dy = max(a[1] - b[3], b[1] - a[3], 0)
+    return math.hypot(dx, dy)
+
+
+class SpatialIndex:
+    """页面上一组框的均匀网格索引，一次性批量构建，之后只读。
+
+    每个框登记在它覆盖的所有网格中，查询只检查与查询区域重叠的网格。
+    网格边长默认取框的平均尺寸与「每格约一个框」两者中较大的一个，
+    目录页这类有数千个小框的页面查询代价与附近的框数成正比，而不是与总框数成正比。
+    查询返回框在输入中的下标，除 nearest 外按下标升序排列。
+    """
+
+    __slots__ = ("_boxes", "_cell_size", "_cells", "_cell_bounds")
+
+    def __init__(self, boxes: Iterable[Box], cell_size: float | None = None) -> None:
+        self._boxes: list[Box] = list(boxes)
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._cell_size = cell_size if cell_size is not None else _default_cell_size(self._boxes)
+        if self._cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+
+        for index, box in enumerate(self._boxes):
+            cx1, cy1, cx2, cy2 = self._cell_range(box)
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    self._cells.setdefault((cx, cy), []).append(index)
+
+        if self._cells:
+            xs = [cx for cx, _ in self._cells]
+            ys = [cy for _, cy in self._cells]
+            self._cell_bounds = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self._cell_bounds = (0, 0, -1, -1)
+
+    @classmethod
+    def from_layouts(cls, layouts: Iterable[Layout], cell_size: float | None = None) -> "SpatialIndex":
+        return cls((layout.det for layout in layouts), cell_size)
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def box(self, index: int) -> Box:
+        return self._boxes[index]
+
+    def intersecting(self, box: Box) -> list[int]:
+        return sorted(i for i in self._candidates(box) if box_intersects(self._boxes[i], box))
+
+    def containing(self, box: Box) -> list[int]:
+        """完整包含 box 的框。"""
+        return sorted(i for i in self._candidates(box) if box_contains(self._boxes[i], box))
+
+    def within(self, box: Box) -> list[int]:
+        """完整落在 box 之内的框。"""
+        return sorted(i for i in self._candidates(box) if box_contains(box, self._boxes[i]))
+
+    def strip(self, start: float, end: float, axis: Literal["x", "y"] = "y") -> list[int]:
+        """与横向（axis="y"，start <= y < end）或纵向（axis="x"）条带重叠的框。"""
+        if axis == "y":
+            query = (-math.inf, start, math.inf, end)
+        elif axis == "x":
+            query = (start, -math.inf, end, math.inf)
+        else:
+            raise ValueError(f"Unsupported strip axis: {axis}")
+        return self.intersecting(query)
+
+    def nearest(self, box: Box, k: int = 1) -> list[int]:
+        """距离 box 最近的 k 个框，按距离、下标排序；相交的框距离为 0。"""
+        if k <= 0 or not self._boxes:
+            return []
+        qx1, qy1, qx2, qy2 = self._cell_range(box)
+        bx1, by1, bx2, by2 = self._cell_bounds
+        seen: set[int] = set()
+        found: list[tuple[float, int]] = []
+        radius = 0
+        while True:
+            # 第 radius 圈之外的框，与 box 的距离都大于 radius 个网格边长
+            for cell in _ring(qx1 - radius, qy1 - radius, qx2 + radius, qy2 + radius, radius):
+                for index in self._cells.get(cell, ()):
+                    if index not in seen:
+                        seen.add(index)
+                        found.append((box_distance(self._boxes[index], box), index))
+            best = heapq.nsmallest(k, found)
+            covered = qx1 - radius <= bx1 and qy1 - radius <= by1 and qx2 + radius >= bx2 and qy2 + radius >= by2
+            if covered or (len(best) == k and best[-1][0] <= radius * self._cell_size):
+                return [index for _, index in best]
+            radius += 1
+
+    def _cell_range(self, box: Box) -> tuple[int, int, int, int]:
+        size = self._cell_size
+        x1, y1, x2, y2 = box
+        return (
+            math.floor(min(x1, x2) / size),
+            math.floor(min(y1, y2) / size),
+            math.floor(max(x1, x2) / size),
+            math.floor(max(y1, y2) / size),
+        )
+
+    def _candidates(self, box: Box) -> set[int]:
+        bx1, by1, bx2, by2 = self._cell_bounds
+        x1, y1, x2, y2 = box
+        size = self._cell_size
+        # 查询区域可以是无界的（strip），先裁剪到有框的网格范围
+        cx1 = bx1 if x1 == -math.inf else max(bx1, math.floor(x1 / size))
+        cy1 = by1 if y1 == -math.inf else max(by1, math.floor(y1 / size))
+        cx2 = bx2 if x2 == math.inf else min(bx2, math.floor(x2 / size))
+        cy2 = by2 if y2 == math.inf else min(by2, math.floor(y2 / size))
+        candidates: set[int] = set()
+        if cx1 > cx2 or cy1 > cy2:
+            return candidates
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self._cells):
+            # 查询覆盖的网格比有框的网格还多时，直接遍历有框的网格
+            for (cx, cy), indexes in self._cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    candidates.update(indexes)
+            return candidates
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                candidates.update(self._cells.get((cx, cy), ()))
+        return candidates
+
+
+def _default_cell_size(boxes: list[Box]) -> float:
+    if not boxes:
+        return 1.0
+    min_x = min(min(box[0], box[2]) for box in boxes)
+    min_y = min(min(box[1], box[3]) for box in boxes)
+    max_x = max(max(box[0], box[2]) for box in boxes)
+    max_y = max(max(box[1], box[3]) for box in boxes)
+    per_box = math.sqrt((max_x - min_x) * (max_y - min_y) / len(boxes))
+    mean_side = sum(max(abs(box[2] - box[0]), abs(box[3] - box[1])) for box in boxes) / len(boxes)
+    return max(per_box, mean_side, 1.0)
+
+
+def _ring(x1: int, y1: int, x2: int, y2: int, radius: int) -> Iterable[tuple[int, int]]:
+    if radius == 0:
+        return ((x, y) for x in range(x1, x2 + 1) for y in range(y1, y2 + 1))
+    horizontal = ((x, y) for x in range(x1, x2 + 1) for y in (y1, y2))
+    vertical = ((x, y) for x in (x1, x2) for y in range(y1 + 1, y2))
+    return (*horizontal, *vertical)
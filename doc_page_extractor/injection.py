@@ -21,6 +21,7 @@ that reads stopping_criteria from thread-local storage. This allows:
 - Clean interruption via StoppingCriteria interface
 - Timeout control for long-running inference
 - User-triggered cancellation
+- Streaming decoded text to the caller while the page is still generating
 - No modification to downloaded model files
 - Tolerates model updates without editing cached files
 
@@ -55,13 +56,14 @@ USAGE:
 """
 
 import threading
-from typing import Any
+from typing import Any, Callable
 
 from .types import ExtractionContext
-from .extraction_context import AbortStoppingCriteria
+from .extraction_context import AbortStoppingCriteria, ExtractionAbortedError
 
 _LOCAL = threading.local()
 _LOCAL_KEY = "value"
+_LOCAL_STREAMER_KEY = "streamer"
 
 
 def preprocess_model(model: Any) -> Any:
@@ -73,29 +75,83 @@ def preprocess_model(model: Any) -> Any:
             stopping: list[Any] = kwargs.get("stopping_criteria", [])
             stopping.append(stopping_criteria)
             kwargs["stopping_criteria"] = stopping
+        streamer = getattr(_LOCAL, _LOCAL_STREAMER_KEY, None)
+        if streamer is not None and kwargs.get("streamer") is None:
+            kwargs["streamer"] = streamer
         return original_generate(*args, **kwargs)
 
     model.generate = thread_safe_generate
     return model
 
 
+class TextStreamer:
+    """transformers generate() 的 streamer，把新生成的 token 增量解码后交给 on_text。
+
+    第一次 put() 收到的是 prompt，直接跳过；EOS token 不输出。解码结果以不完整的
+    UTF-8 字符结尾时暂缓输出；遇到换行后清空缓存，使每次解码的长度不超过一行。
+    """
+
+    def __init__(self, tokenizer: Any, on_text: Callable[[str], None]) -> None:
+        self._tokenizer = tokenizer
+        self._on_text = on_text
+        self._eos_token_id = getattr(tokenizer, "eos_token_id", None)
+        self._prompt_skipped = False
+        self._token_ids: list[int] = []
+        self._emitted = 0
+
+    def put(self, value: Any) -> None:
+        if not self._prompt_skipped:
+            self._prompt_skipped = True
+            return
+        token_ids = value.tolist() if hasattr(value, "tolist") else list(value)
+        if token_ids and isinstance(token_ids[0], list):
+            token_ids = token_ids[0]
+        self._token_ids.extend(
+            token_id for token_id in token_ids if token_id != self._eos_token_id
+        )
+        text = self._decode()
+        if text.endswith("\n"):
+            self._emit(text)
+            self._token_ids = []
+            self._emitted = 0
+        elif not text.endswith("\ufffd"):
+            self._emit(text)
+
+    def end(self) -> None:
+        self._emit(self._decode())
+        self._token_ids = []
+        self._emitted = 0
+
+    def _decode(self) -> str:
+        return self._tokenizer.decode(self._token_ids, skip_special_tokens=False)
+
+    def _emit(self, text: str) -> None:
+        if len(text) > self._emitted:
+            self._on_text(text[self._emitted:])
+            self._emitted = len(text)
+
+
 class InferWithInterruption:
     def __init__(
         self,
         model: Any,
         context: ExtractionContext | None,
+        streamer: TextStreamer | None = None,
     ):
         self._model = model
+        self._streamer = streamer
         self._stopping: AbortStoppingCriteria | None = None
         if context:
             self._stopping = AbortStoppingCriteria(context)
 
     def __enter__(self):
         setattr(_LOCAL, _LOCAL_KEY, self._stopping)
+        setattr(_LOCAL, _LOCAL_STREAMER_KEY, self._streamer)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         setattr(_LOCAL, _LOCAL_KEY, None)
+        setattr(_LOCAL, _LOCAL_STREAMER_KEY, None)
         return False
 
     def __call__(self, *args, **kwargs):
@@ -104,3 +160,101 @@ class InferWithInterruption:
         if self._stopping:
             self._stopping.notify_finished()
         return result
+
+
+class BatchStoppingCriteria:
+    """批量 generate 的 stopping criteria：第 i 行交给第 i 个请求自己的 AbortStoppingCriteria。
+
+    批量输入左侧填充到相同长度。首次调用时按 pad_token_id 数出每行 prompt 开头的填充，
+    之后每行只按「真实 prompt 长度 + 该行已生成的 token 数」计数；某行生成 EOS 后停止计数，
+    之后补在该行末尾的填充不再计入。返回逐行的布尔张量，一行中断或超出 token 限制时只停止该行。
+    """
+
+    def __init__(
+        self,
+        criteria: list[AbortStoppingCriteria | None],
+        pad_token_id: int | None = None,
+        eos_token_id: int | None = None,
+    ) -> None:
+        self._criteria = criteria
+        self._pad_token_id = pad_token_id
+        self._eos_token_id = eos_token_id
+        # 首次调用时的序列长度减一，即生成开始的位置
+        self._prompt_length: int | None = None
+        self._padding: list[int] = []
+        self._finished: list[bool] = [False] * len(criteria)
+
+    def __call__(self, input_ids, scores, **kwargs) -> Any:
+        import torch
+
+        length = input_ids.shape[1]
+        if self._prompt_length is None:
+            self._prompt_length = length - 1
+            self._padding = [
+                _leading_count(row[:self._prompt_length], self._pad_token_id)
+                for row in input_ids.tolist()
+            ]
+        last_tokens = input_ids[:, -1].tolist()
+
+        done: list[bool] = []
+        for i, criteria in enumerate(self._criteria):
+            if not self._finished[i]:
+                tokens_count = length - self._padding[i]
+                stopped = criteria.update(tokens_count) if criteria else False
+                if self._eos_token_id is not None and last_tokens[i] == self._eos_token_id:
+                    self._finished[i] = True
+                done.append(stopped or self._finished[i])
+            else:
+                done.append(True)
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+def _leading_count(token_ids: list[int], token_id: int | None) -> int:
+    if token_id is None:
+        return 0
+    count = 0
+    for value in token_ids:
+        if value != token_id:
+            break
+        count += 1
+    return count
+
+
+class BatchInferWithInterruption:
+    def __init__(
+        self,
+        model: Any,
+        contexts: list[ExtractionContext | None],
+        tokenizer: Any = None,
+    ):
+        self._model = model
+        self._stoppings: list[AbortStoppingCriteria | None] = [
+            AbortStoppingCriteria(context) if context else None for context in contexts
+        ]
+        self._criteria: BatchStoppingCriteria | None = None
+        if any(self._stoppings):
+            self._criteria = BatchStoppingCriteria(
+                self._stoppings,
+                pad_token_id=getattr(tokenizer, "pad_token_id", None),
+                eos_token_id=getattr(tokenizer, "eos_token_id", None),
+            )
+
+    def __enter__(self):
+        setattr(_LOCAL, _LOCAL_KEY, self._criteria)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        setattr(_LOCAL, _LOCAL_KEY, None)
+        return False
+
+    def __call__(self, *args, **kwargs) -> list[Any]:
+        """Direct call to model.infer_batch(); aborted requests get their error in place of a result"""
+        results: list[Any] = list(self._model.infer_batch(*args, **kwargs))
+        for i, stopping in enumerate(self._stoppings):
+            if stopping is None:
+                continue
+            try:
+                stopping.notify_finished()
+            except ExtractionAbortedError as error:
+                results[i] = error
+        return results
@@ -0,0 +1,316 @@
+from array import array
+from os import PathLike
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Sequence, overload
+
+from .types import Layout, LayoutKind, OCRPageResult
+
+if TYPE_CHECKING:
+    import pyarrow
+
+# kind 列保存的是 LayoutKind 在这里的下标
+KINDS: tuple[LayoutKind, ...] = tuple(LayoutKind)
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_SCHEMA_KEY = b"doc_page_extractor.layout_batch"
+_SCHEMA_VERSION = b"1"
+
+
+class StringColumn(Sequence["str | None"]):
+    """UTF-8 字节缓冲区加 N+1 个偏移量的字符串列，布局与 Arrow large_string 相同。
+
+    validity 是按位存储的非空标记（低位在前），None 与空字符串可以区分。
+    """
+
+    __slots__ = ("data", "offsets", "validity", "null_count")
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.validity = bytearray()
+        self.null_count = 0
+
+    def _append(self, value: str | None) -> None:
+        index = len(self.offsets) - 1
+        if index % 8 == 0:
+            self.validity.append(0)
+        if value is None:
+            self.null_count += 1
+        else:
+            self.validity[index >> 3] |= 1 << (index & 7)
+            self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str | None:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str | None]:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string column index out of range")
+        if not self.validity[index >> 3] & (1 << (index & 7)):
+            return None
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str | None]:
+        return (self[i] for i in range(len(self)))
+
+
+class LayoutBatch:
+    """多页抽取结果的列式表示，供分析、去重等批处理使用。
+
+    每个 Layout 占一行：dets 是 (N, 4) 的 int64 坐标，kinds 是 KINDS 中的下标，
+    pages / stages 是页码与阶段（从 1 开始），type、text、html 是 StringColumn。
+    数值列以 memoryview 给出，可以被 numpy.asarray 零拷贝读取。
+    polygon、source、raw 不进入批次。
+    """
+
+    __slots__ = ("_dets", "_kinds", "_pages", "_stages", "types", "texts", "htmls")
+
+    def __init__(self) -> None:
+        self._dets = array("q")
+        self._kinds = array("b")
+        self._pages = array("q")
+        self._stages = array("q")
+        self.types = StringColumn()
+        self.texts = StringColumn()
+        self.htmls = StringColumn()
+
+    @classmethod
+    def from_layouts(cls, layouts: Iterable[Layout], page: int = 0, stage: int = 1) -> "LayoutBatch":
+        batch = cls()
+        batch._extend(layouts, page, stage)
+        return batch
+
+    @classmethod
+    def from_page_results(
+        cls,
+        results: Iterable[OCRPageResult | tuple[int, OCRPageResult]],
+    ) -> "LayoutBatch":
+        """接收 OCRPageResult，或 extract_document 产出的 (page_index, OCRPageResult)。
+
+        单独的 OCRPageResult 按出现顺序编页码；带页码时同一页的第 n 个结果记为第 n 阶段。
+        """
+        batch = cls()
+        stages: dict[int, int] = {}
+        for position, item in enumerate(results):
+            if isinstance(item, OCRPageResult):
+                page, page_result = position, item
+            else:
+                page, page_result = item
+            stage = stages[page] = stages.get(page, 0) + 1
+            batch._extend(page_result.layouts, page, stage)
+        return batch
+
+    def _extend(self, layouts: Iterable[Layout], page: int, stage: int) -> None:
+        for layout in layouts:
+            self._dets.extend(layout.det)
+            self._kinds.append(_KIND_CODES[layout.kind])
+            self._pages.append(page)
+            self._stages.append(stage)
+            self.types._append(layout.type)  # pylint: disable=protected-access
+            self.texts._append(layout.text)  # pylint: disable=protected-access
+            self.htmls._append(layout.html)  # pylint: disable=protected-access
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    @property
+    def dets(self) -> memoryview:
+        view = memoryview(self._dets).toreadonly()
+        # memoryview 不支持含 0 的形状，空批次给出一维的空视图
+        return view.cast("B").cast("q", (len(self), 4)) if self._dets else view
+
+    @property
+    def kinds(self) -> memoryview:
+        return memoryview(self._kinds).toreadonly()
+
+    @property
+    def pages(self) -> memoryview:
+        return memoryview(self._pages).toreadonly()
+
+    @property
+    def stages(self) -> memoryview:
+        return memoryview(self._stages).toreadonly()
+
+    def kind(self, index: int) -> LayoutKind:
+        return KINDS[self._kinds[index]]
+
+    def layout(self, index: int) -> Layout:
+        start = index * 4 if index >= 0 else (len(self) + index) * 4
+        return Layout(
+            det=tuple(self._dets[start:start + 4]),  # type: ignore[arg-type]
+            text=self.texts[index],
+            type=self.types[index],
+            html=self.htmls[index],
+            kind=self.kind(index),
+        )
+
+    def to_layouts(self) -> list[Layout]:
+        return [self.layout(i) for i in range(len(self))]
+
+    def scale(self, scale_x: float, scale_y: float) -> None:
+        """就地缩放全部坐标，取整方式与 round() 相同；安装了 numpy 时是一次向量运算。"""
+        if not self._dets:
+            return
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        if numpy is None:
+            scales = (scale_x, scale_y, scale_x, scale_y)
+            for i, value in enumerate(self._dets):
+                self._dets[i] = round(value * scales[i & 3])
+            return
+        dets = numpy.frombuffer(self._dets, dtype=numpy.int64).reshape(-1, 4)
+        # numpy.rint 与 round() 一样把 .5 舍入到偶数
+        dets[:] = numpy.rint(dets * numpy.array((scale_x, scale_y, scale_x, scale_y)))
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """转换成 pyarrow.Table，数值与字符串列直接引用批次的缓冲区，不做拷贝。"""
+        pa = _import_pyarrow()
+        count = len(self)
+        columns = [
+            _int64_array(pa, self._pages, count),
+            _int64_array(pa, self._stages, count),
+            pa.FixedSizeListArray.from_arrays(_int64_array(pa, self._dets, count * 4), 4),
+            pa.DictionaryArray.from_arrays(
+                pa.Array.from_buffers(pa.int8(), count, [None, pa.py_buffer(self._kinds)]),
+                pa.array([kind.value for kind in KINDS]),
+            ),
+            *(_string_array(pa, column) for column in (self.types, self.texts, self.htmls)),
+        ]
+        return pa.Table.from_arrays(columns, schema=_arrow_schema(pa))
+
+    @classmethod
+    def from_arrow(cls, table: "pyarrow.Table") -> "LayoutBatch":
+        """从 to_arrow 的表（或读回的 Arrow / Parquet 文件）恢复批次，只拷贝缓冲区，不解析文本。"""
+        pa = _import_pyarrow()
+        schema = _arrow_schema(pa)
+        batch = cls()
+        columns = {
+            name: table.column(name).combine_chunks().cast(schema.field(name).type)
+            for name in schema.names
+        }
+        batch._pages = _int64_values(columns["page"])
+        batch._stages = _int64_values(columns["stage"])
+        batch._dets = _int64_values(columns["det"].flatten())
+        batch._kinds = _kind_codes(columns["kind"])
+        batch.types = _string_column(columns["type"])
+        batch.texts = _string_column(columns["text"])
+        batch.htmls = _string_column(columns["html"])
+        return batch
+
+    def write_arrow(self, path: PathLike | str) -> None:
+        """写成 Arrow IPC 文件，read_arrow 可以直接内存映射读取。"""
+        pa = _import_pyarrow()
+        table = self.to_arrow()
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    @classmethod
+    def read_arrow(cls, path: PathLike | str) -> "LayoutBatch":
+        pa = _import_pyarrow()
+        with pa.memory_map(str(path), "r") as source:
+            return cls.from_arrow(pa.ipc.open_file(source).read_all())
+
+    def write_parquet(self, path: PathLike | str, **kwargs: Any) -> None:
+        """写成 Parquet 文件，kwargs 交给 pyarrow.parquet.write_table（如 compression）。"""
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), str(path), **kwargs)
+
+    @classmethod
+    def read_parquet(cls, path: PathLike | str) -> "LayoutBatch":
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        return cls.from_arrow(pq.read_table(str(path), memory_map=True))
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "LayoutBatch Arrow/Parquet export requires pyarrow. Install it with: pip install pyarrow"
+        ) from error
+    return pyarrow
+
+
+def _arrow_schema(pa):
+    return pa.schema(
+        [
+            pa.field("page", pa.int64(), nullable=False),
+            pa.field("stage", pa.int64(), nullable=False),
+            pa.field("det", pa.list_(pa.int64(), 4), nullable=False),
+            pa.field("kind", pa.dictionary(pa.int8(), pa.string()), nullable=False),
+            pa.field("type", pa.large_string()),
+            pa.field("text", pa.large_string()),
+            pa.field("html", pa.large_string()),
+        ],
+        metadata={_SCHEMA_KEY: _SCHEMA_VERSION},
+    )
+
+
+def _int64_array(pa, values: array, count: int):
+    return pa.Array.from_buffers(pa.int64(), count, [None, pa.py_buffer(values)])
+
+
+def _string_array(pa, column: StringColumn):
+    validity = pa.py_buffer(column.validity) if column.null_count else None
+    return pa.Array.from_buffers(
+        pa.large_string(),
+        len(column),
+        [validity, pa.py_buffer(column.offsets), pa.py_buffer(column.data)],
+        null_count=column.null_count,
+    )
+
+
+def _int64_values(arrow_array) -> array:
+    values = array("q")
+    start = arrow_array.offset * 8
+    values.frombytes(memoryview(arrow_array.buffers()[1])[start:start + len(arrow_array) * 8])
+    return values
+
+
+def _kind_codes(arrow_array) -> array:
+    # 其他工具写出的字典顺序可能不同，按字符串重新映射到 KINDS 的下标
+    table = bytearray(range(256))
+    for index, value in enumerate(arrow_array.dictionary.to_pylist()):
+        table[index] = _KIND_CODES[LayoutKind(value)]
+    indices = arrow_array.indices
+    start = indices.offset
+    codes = array("b")
+    codes.frombytes(bytes(memoryview(indices.buffers()[1])[start:start + len(indices)]).translate(table))
+    return codes
+
+
+def _string_column(arrow_array) -> StringColumn:
+    column = StringColumn()
+    count = len(arrow_array)
+    _, offsets_buffer, data_buffer = arrow_array.buffers()
+    start = arrow_array.offset * 8
+    offsets = array("q")
+    offsets.frombytes(memoryview(offsets_buffer)[start:start + (count + 1) * 8])
+    first, last = offsets[0], offsets[-1]
+    column.data = bytearray(memoryview(data_buffer)[first:last]) if data_buffer is not None else bytearray()
+    column.offsets = array("q", (offset - first for offset in offsets)) if first else offsets
+    column.null_count = arrow_array.null_count
+    if column.null_count:
+        # is_valid() 给出偏移为 0 的新数组，它的数据缓冲区就是对齐后的位图
+        column.validity = bytearray(arrow_array.is_valid().buffers()[1])[:(count + 7) // 8]
+    else:
+        column.validity = bytearray(b"\xff" * ((count + 7) // 8))
+    return column
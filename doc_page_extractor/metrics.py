@@ -0,0 +1,341 @@
+import bisect
+import math
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable, Literal
+
+from .tracing import Span
+
+MetricType = Literal["counter", "gauge", "histogram"]
+LabelValues = tuple[str, ...]
+
+# 秒，覆盖从解析（毫秒级）到供应商任务（分钟级）的耗时
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+@dataclass(frozen=True)
+class Sample:
+    name: str
+    labels: dict[str, str]
+    value: float
+
+
+@dataclass(frozen=True)
+class MetricFamily:
+    name: str
+    type: MetricType
+    help: str
+    samples: list[Sample]
+
+
+class _Metric:
+    type: MetricType
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str]) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels: LabelValues = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _sample(self, name: str, values: LabelValues, value: float, **extra: str) -> Sample:
+        return Sample(name=name, labels={**dict(zip(self.labels, values)), **extra}, value=value)
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type: MetricType = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str]) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = dict(self._values)
+        return MetricFamily(
+            name=self.name,
+            type=self.type,
+            help=self.help,
+            samples=[self._sample(f"{self.name}_total", key, value) for key, value in values.items()],
+        )
+
+
+class Gauge(_Metric):
+    """可以直接设置的数值；也可以注册回调，在采集时读取组件的当前状态，平时没有任何开销。"""
+
+    type: MetricType = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str]) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+        self._callbacks: list[Callable[[], dict[LabelValues, float]]] = []
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def add_callback(self, callback: Callable[[], dict[LabelValues, float]]) -> None:
+        # 多个回调给出同一组标签时数值相加
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            for key, value in callback().items():
+                values[key] = values.get(key, 0.0) + value
+        return MetricFamily(
+            name=self.name,
+            type=self.type,
+            help=self.help,
+            samples=[self._sample(self.name, key, value) for key, value in values.items()],
+        )
+
+
+class Histogram(_Metric):
+    type: MetricType = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Iterable[str],
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # 每组标签：各桶（不累计）的计数、最后一个是 +Inf；总和
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: object) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._label_values(labels), ()))
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            counts = {key: list(value) for key, value in self._counts.items()}
+            sums = dict(self._sums)
+        samples: list[Sample] = []
+        for key, bucket_counts in counts.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), bucket_counts):
+                cumulative += bucket_count
+                samples.append(
+                    self._sample(f"{self.name}_bucket", key, cumulative, le=_format_value(bound))
+                )
+            samples.append(self._sample(f"{self.name}_sum", key, sums[key]))
+            samples.append(self._sample(f"{self.name}_count", key, cumulative))
+        return MetricFamily(name=self.name, type=self.type, help=self.help, samples=samples)
+
+
+class MetricsRegistry:
+    """进程内的指标集合。同名指标只创建一次，再次获取时返回已有的实例。
+
+    collect() 给出当前所有指标的快照；export() 把快照交给任意导出函数，
+    例如 render_prometheus 或者写入监控系统的回调。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, help_text, labels, buckets)
+        return self._checked(metric, Histogram, labels)
+
+    def collect(self) -> list[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [metric.collect() for metric in metrics]
+
+    def export(self, exporter: Callable[[list[MetricFamily]], object]) -> None:
+        exporter(self.collect())
+
+    def _get_or_create(self, metric_class, name: str, help_text: str, labels: Iterable[str]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help_text, labels)
+        return self._checked(metric, metric_class, labels)
+
+    def _checked(self, metric: _Metric, metric_class, labels: Iterable[str]):
+        if not isinstance(metric, metric_class) or metric.labels != tuple(labels):
+            raise ValueError(f"Metric {metric.name} is already registered with a different type or labels.")
+        return metric
+
+
+def render_prometheus(families: MetricsRegistry | Iterable[MetricFamily]) -> str:
+    """按 Prometheus text exposition format 0.0.4 输出。"""
+    if isinstance(families, MetricsRegistry):
+        families = families.collect()
+    lines: list[str] = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {_escape_help(family.help)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for sample in family.samples:
+            labels = ",".join(
+                f'{name}="{_escape_label(value)}"' for name, value in sample.labels.items()
+            )
+            name = f"{sample.name}{{{labels}}}" if labels else sample.name
+            lines.append(f"{name} {_format_value(sample.value)}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class MetricsTracer:
+    """把结束的 span 换算成指标的 tracer。
+
+    放在 ExtractionContext.tracer 上即可启用（需要同时导出 span 时配合 MultiTracer）；
+    不设置时抽取过程不打开任何 span，也就没有指标开销。
+    """
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.registry = registry
+        self._span_seconds = registry.histogram(
+            "doc_page_extractor_span_seconds",
+            "Duration of pipeline spans; timing stages share the names of OCRPageResult.timings.",
+            labels=("span",),
+        )
+        self._pages = registry.counter(
+            "doc_page_extractor_pages",
+            "Pages extracted by a page extractor, by outcome.",
+            labels=("size", "status"),
+        )
+        self._aborts = registry.counter(
+            "doc_page_extractor_aborts",
+            "Pages stopped by AbortError or TokenLimitError.",
+            labels=("reason",),
+        )
+        self._input_tokens = registry.counter(
+            "doc_page_extractor_input_tokens",
+            "Input tokens reported by adapters.",
+            labels=("source",),
+        )
+        self._output_tokens = registry.counter(
+            "doc_page_extractor_output_tokens",
+            "Output tokens reported by adapters.",
+            labels=("source",),
+        )
+        self._http_requests = registry.counter(
+            "doc_page_extractor_http_requests",
+            "Vendor HTTP requests by method and status code.",
+            labels=("method", "status"),
+        )
+        self._task_polls = registry.counter(
+            "doc_page_extractor_task_polls",
+            "Unlimited OCR task status queries, by whether the task had finished.",
+            labels=("done",),
+        )
+        self._handlers: dict[str, Callable[[Span], None]] = {
+            "page": self._page,
+            "adapter.extract_page": self._adapter,
+            "http.request": self._http_request,
+            "poll.query": self._poll_query,
+        }
+
+    def export(self, finished: Span) -> None:
+        if finished.duration is not None:
+            self._span_seconds.observe(finished.duration, span=finished.name)
+        handler = self._handlers.get(finished.name)
+        if handler is not None:
+            handler(finished)
+
+    def _page(self, finished: Span) -> None:
+        size = finished.attributes.get("size", "")
+        self._pages.inc(size=size, status="error" if finished.error_type else "ok")
+        if finished.error_type in ("AbortError", "TokenLimitError"):
+            self._aborts.inc(reason=finished.error_type)
+
+    def _adapter(self, finished: Span) -> None:
+        source = finished.attributes.get("source") or finished.attributes.get("adapter", "")
+        input_tokens = finished.attributes.get("input_tokens", 0)
+        output_tokens = finished.attributes.get("output_tokens", 0)
+        if input_tokens > 0:
+            self._input_tokens.inc(input_tokens, source=source)
+        if output_tokens > 0:
+            self._output_tokens.inc(output_tokens, source=source)
+
+    def _http_request(self, finished: Span) -> None:
+        status = finished.attributes.get("status", "error")
+        self._http_requests.inc(method=finished.attributes.get("method", ""), status=status)
+
+    def _poll_query(self, finished: Span) -> None:
+        done = finished.attributes.get("done")
+        self._task_polls.inc(done="error" if done is None else str(done).lower())
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
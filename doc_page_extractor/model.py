@@ -1,9 +1,12 @@
-from contextlib import contextmanager
-from dataclasses import dataclass
+from contextlib import ExitStack, contextmanager
+import contextvars
+from dataclasses import dataclass, replace
 from importlib.util import find_spec
 from pathlib import Path
+import queue
 import threading
-from typing import Iterable
+import weakref
+from typing import Any, Callable, Generator, Iterable, Sequence
 
 from huggingface_hub import snapshot_download
 import huggingface_hub.constants as hf_constants
@@ -13,7 +16,16 @@ from transformers import AutoModel, AutoTokenizer
 from .types import DeepSeekOCRSize
 from .check_env import check_env
 from .extraction_context import ExtractionContext
-from .injection import InferWithInterruption, preprocess_model
+from .batching import MicroBatcher
+from .injection import (
+    BatchInferWithInterruption,
+    InferWithInterruption,
+    TextStreamer,
+    preprocess_model,
+)
+from .scheduler import DeviceScheduler
+from .metrics import MetricsRegistry
+from .tracing import span
 
 
 @dataclass
@@ -54,6 +66,15 @@ class _Models:
     llms: list[AutoModel]
 
 
+@dataclass
+class _BatchRequest:
+    tokenizer: Any
+    llm_model: Any
+    context: ExtractionContext | None
+    inputs: dict[str, str]
+    options: dict[str, Any]
+
+
 @dataclass
 class _DownloadConfig:
     enable_hf_transfer: bool | None = None
@@ -70,6 +91,9 @@ class HuggingFaceBackend:
         default_revision: str,
         attn_implementation: str | None = None,
         download_config: _DownloadConfig | None = None,
+        max_batch_size: int = 1,
+        batch_window_seconds: float = 0.01,
+        metrics: MetricsRegistry | None = None,
     ) -> None:
         if local_only and model_path is None:
             raise ValueError(
@@ -83,8 +107,23 @@ class HuggingFaceBackend:
         self._models: _Models | None = None
         self._enable_devices_numbers: Iterable[int] | None = enable_devices_numbers
         self._device_number_to_index: list[int | None] | None = None
+        self._scheduler: DeviceScheduler | None = None
+        self._scheduler_lock = threading.Lock()
         self._attn_implementation = attn_implementation or _ATTN_IMPLEMENTATION
         self._download_config = download_config or _DownloadConfig()
+        self._batcher: MicroBatcher[_BatchRequest, Any] | None = None
+        if max_batch_size > 1:
+            self._batcher = MicroBatcher(
+                run_batch=_run_batch,
+                batch_window_seconds=batch_window_seconds,
+                max_batch_size=max_batch_size,
+            )
+        if metrics is not None:
+            metrics.gauge(
+                "doc_page_extractor_device_in_flight",
+                "Pages being processed or waiting on each local model replica.",
+                labels=("model", "device"),
+            ).add_callback(_device_in_flight_callback(self))
 
     def download(self, revision: str | None) -> None:
         with self._rwlock.gen_wlock():
@@ -108,6 +147,10 @@ class HuggingFaceBackend:
     def load(self) -> None:
         self._ensure_models()
 
+    def device_queue_depths(self) -> dict[int, int]:
+        # 各设备上正在处理（含等待中）的页面数
+        return self._get_scheduler().queue_depths()
+
     def unload(self) -> None:
         with self._rwlock.gen_wlock():
             if self._models is not None:
@@ -122,41 +165,178 @@ class HuggingFaceBackend:
         context: ExtractionContext | None,
         device_number: int | None,
     ) -> str:
+        # - {output_path}/result.mmd - OCR提取的Markdown格式结果
+        # - {output_path}/result_with_boxes.jpg - 带有边界框标注的可视化图片
+        # - {output_path}/images/{N}.jpg - 从文档中提取的图片（N为索引号）
+        # - {output_path}/geo.jpg - 如果检测到几何图形会生成该文件（条件性）
+        return self._infer(
+            device_number=device_number,
+            context=context,
+            inputs=_infer_inputs(prompt, image_path, output_path),
+            options=self._infer_options(size),
+        )
 
-        tokenizer, llm_model = self._select_model(device_number)
+    def generate_stream(
+        self,
+        prompt: str,
+        image_path: Path,
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> Generator[str, None, None]:
+        """边生成边产出解码文本片段，拼接后与 generate() 的结果一致。
+
+        推理在后台线程中进行；调用方提前关闭生成器时中断推理。token 计数在结束后写回 context。
+        """
+        closed = threading.Event()
+        if context is None:
+            stream_context = ExtractionContext(check_aborted=closed.is_set)
+        else:
+            stream_context = replace(
+                context,
+                check_aborted=lambda: closed.is_set() or context.check_aborted(),
+            )
+        chunks: queue.Queue[str | None] = queue.Queue()
+        errors: list[BaseException] = []
+
+        def run() -> None:
+            try:
+                self._infer(
+                    device_number=device_number,
+                    context=stream_context,
+                    inputs=_infer_inputs(prompt, image_path, output_path),
+                    options=self._infer_options(size),
+                    on_text=chunks.put,
+                )
+            except BaseException as error:  # pylint: disable=broad-exception-caught
+                errors.append(error)
+            finally:
+                chunks.put(None)
+
+        # 推理线程沿用调用方的当前 span，模型相关的 span 挂在它下面
+        thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(run,),
+            name="doc-page-extractor-stream",
+            daemon=True,
+        )
+        thread.start()
+        try:
+            while (chunk := chunks.get()) is not None:
+                yield chunk
+        finally:
+            closed.set()
+            thread.join()
+            if context is not None:
+                context.input_tokens = stream_context.input_tokens
+                context.output_tokens = stream_context.output_tokens
+        if errors:
+            raise errors[0]
+
+    def _infer_options(self, size: DeepSeekOCRSize) -> dict[str, Any]:
         config = _DEEPSEEK_SIZE_CONFIGS[size]
-
-        with self._rwlock.gen_rlock():
-            with InferWithInterruption(llm_model, context) as infer:
-                # - {output_path}/result.mmd - OCR提取的Markdown格式结果
-                # - {output_path}/result_with_boxes.jpg - 带有边界框标注的可视化图片
-                # - {output_path}/images/{N}.jpg - 从文档中提取的图片（N为索引号）
-                # - {output_path}/geo.jpg - 如果检测到几何图形会生成该文件（条件性）
-                text_result = infer(
-                    tokenizer,
-                    prompt=prompt,
-                    image_file=str(image_path),
-                    output_path=str(output_path),
-                    base_size=config.base_size,
-                    image_size=config.image_size,
-                    crop_mode=config.crop_mode,
-                    save_results=True,
-                    test_compress=True,
-                    eval_mode=True,
+        return {
+            "base_size": config.base_size,
+            "image_size": config.image_size,
+            "crop_mode": config.crop_mode,
+            "save_results": True,
+            "test_compress": True,
+            "eval_mode": True,
+        }
+
+    def _infer(
+        self,
+        device_number: int | None,
+        context: ExtractionContext | None,
+        inputs: dict[str, str],
+        options: dict[str, Any],
+        on_text: Callable[[str], None] | None = None,
+    ) -> Any:
+        with ExitStack() as stack:
+            # 未指定设备时由调度器选择在途页面最少的模型副本；首次调用时包含加载模型的时间
+            with span("model.acquire_device") as acquire_span:
+                models = self._ensure_models()
+                assigned_device_number = stack.enter_context(
+                    self._get_scheduler().acquire(device_number)
                 )
-            return text_result
+                acquire_span.set(device_number=assigned_device_number)
+            with span("model.read_lock"):
+                stack.enter_context(self._rwlock.gen_rlock())
+
+            model_index = self._get_device_number_to_index()[assigned_device_number]
+            assert model_index is not None
+            input_tokens, output_tokens = _token_counts(context)
+            with span(
+                "model.generate",
+                model=self._model_name,
+                base_size=options["base_size"],
+                image_size=options["image_size"],
+                crop_mode=options["crop_mode"],
+            ) as generate_span:
+                result = self._generate(
+                    models.tokenizer, models.llms[model_index], context, inputs, options, on_text
+                )
+                if context is not None:
+                    generate_span.set(
+                        input_tokens=context.input_tokens - input_tokens,
+                        output_tokens=context.output_tokens - output_tokens,
+                    )
+                return result
 
-    def _select_model(self, device_number: int | None):
-        models = self._ensure_models()
-        if device_number is None:
-            model_index = self._get_device_number_to_index()[0]
-        else:
-            model_index = self._get_device_number_to_index()[device_number]
+    def _generate(
+        self,
+        tokenizer: Any,
+        llm_model: Any,
+        context: ExtractionContext | None,
+        inputs: dict[str, str],
+        options: dict[str, Any],
+        on_text: Callable[[str], None] | None,
+    ) -> Any:
+        if on_text is not None:
+            streamer = TextStreamer(tokenizer, on_text)
+            with InferWithInterruption(llm_model, context, streamer) as infer:
+                return infer(tokenizer, **inputs, **options)
+
+        if self._batcher is None or not hasattr(llm_model, "infer_batch"):
+            with InferWithInterruption(llm_model, context) as infer:
+                return infer(tokenizer, **inputs, **options)
 
-        if model_index is None:
-            raise ValueError(f"Device number {device_number} is not enabled.")
+        # 同一模型副本、同一尺寸参数的请求才能合并成一批
+        key = (id(llm_model), tuple(sorted(options.items())))
+        return self._batcher.submit(
+            key,
+            _BatchRequest(
+                tokenizer=tokenizer,
+                llm_model=llm_model,
+                context=context,
+                inputs=inputs,
+                options=options,
+            ),
+        )
 
-        return models.tokenizer, models.llms[model_index]
+    def _device_in_flight(self) -> dict[tuple[str, ...], float]:
+        with self._scheduler_lock:
+            scheduler = self._scheduler
+        if scheduler is None:
+            return {}
+        return {
+            (self._model_name, str(device_number)): depth
+            for device_number, depth in scheduler.queue_depths().items()
+        }
+
+    def _get_scheduler(self) -> DeviceScheduler:
+        with self._scheduler_lock:
+            if self._scheduler is None:
+                device_numbers = [
+                    device_number
+                    for device_number, model_index in enumerate(self._get_device_number_to_index())
+                    if model_index is not None
+                ]
+                if not device_numbers:
+                    raise RuntimeError("No CUDA devices available")
+                self._scheduler = DeviceScheduler(device_numbers)
+            return self._scheduler
 
     def _ensure_models(self) -> _Models:
         check_env()
@@ -288,12 +468,18 @@ class DeepSeekOCRHuggingFaceModel(HuggingFaceBackend):
         model_path: Path | None,
         local_only: bool,
         enable_devices_numbers: Iterable[int] | None,
+        max_batch_size: int = 1,
+        batch_window_seconds: float = 0.01,
+        metrics: MetricsRegistry | None = None,
     ) -> None:
         super().__init__(
             model_name="deepseek-ai/DeepSeek-OCR",
             model_path=model_path,
             local_only=local_only,
             enable_devices_numbers=enable_devices_numbers,
+            max_batch_size=max_batch_size,
+            batch_window_seconds=batch_window_seconds,
+            metrics=metrics,
             default_revision=_DEEPSEEK_OCR_REVISION,
         )
 
@@ -304,12 +490,18 @@ class DeepSeekOCR2HuggingFaceModel(HuggingFaceBackend):
         model_path: Path | None,
         local_only: bool,
         enable_devices_numbers: Iterable[int] | None,
+        max_batch_size: int = 1,
+        batch_window_seconds: float = 0.01,
+        metrics: MetricsRegistry | None = None,
     ) -> None:
         super().__init__(
             model_name="deepseek-ai/DeepSeek-OCR-2",
             model_path=model_path,
             local_only=local_only,
             enable_devices_numbers=enable_devices_numbers,
+            max_batch_size=max_batch_size,
+            batch_window_seconds=batch_window_seconds,
+            metrics=metrics,
             default_revision=_DEEPSEEK_OCR2_REVISION,
             attn_implementation="flash_attention_2" if find_spec("flash_attn") is not None else "eager",
         )
@@ -321,12 +513,18 @@ class UnlimitedOCRHuggingFaceModel(HuggingFaceBackend):
         model_path: Path | None,
         local_only: bool,
         enable_devices_numbers: Iterable[int] | None,
+        max_batch_size: int = 1,
+        batch_window_seconds: float = 0.01,
+        metrics: MetricsRegistry | None = None,
     ) -> None:
         super().__init__(
             model_name="baidu/Unlimited-OCR",
             model_path=model_path,
             local_only=local_only,
             enable_devices_numbers=enable_devices_numbers,
+            max_batch_size=max_batch_size,
+            batch_window_seconds=batch_window_seconds,
+            metrics=metrics,
             default_revision=_UNLIMITED_OCR_REVISION,
             download_config=_DownloadConfig(
                 enable_hf_transfer=True,
@@ -343,35 +541,77 @@ class UnlimitedOCRHuggingFaceModel(HuggingFaceBackend):
         context: ExtractionContext | None,
         device_number: int | None,
     ) -> str:
-        if size not in _UNLIMITED_SIZE_CONFIGS:
-            raise ValueError("Unlimited OCR local supports only base and gundam sizes.")
-
-        tokenizer, llm_model = self._select_model(device_number)
-        config = _UNLIMITED_SIZE_CONFIGS[size]
-
-        with self._rwlock.gen_rlock():
-            with InferWithInterruption(llm_model, context) as infer:
-                text_result = infer(
-                    tokenizer,
-                    prompt=prompt,
-                    image_file=str(image_path),
-                    output_path=str(output_path),
-                    base_size=config.base_size,
-                    image_size=config.image_size,
-                    crop_mode=config.crop_mode,
-                    save_results=False,
-                    eval_mode=True,
-                    max_length=32768,
-                    no_repeat_ngram_size=35,
-                    ngram_window=128,
-                    temperature=0.0,
-                )
+        text_result = self._infer(
+            device_number=device_number,
+            context=context,
+            inputs=_infer_inputs(prompt, image_path, output_path),
+            options=self._infer_options(size),
+        )
 
         output_path.mkdir(parents=True, exist_ok=True)
         raw_text = str(text_result[0] if isinstance(text_result, tuple) else text_result)
         (output_path / "result.md").write_text(raw_text, encoding="utf-8")
         return raw_text
 
+    def _infer_options(self, size: DeepSeekOCRSize) -> dict[str, Any]:
+        if size not in _UNLIMITED_SIZE_CONFIGS:
+            raise ValueError("Unlimited OCR local supports only base and gundam sizes.")
+
+        config = _UNLIMITED_SIZE_CONFIGS[size]
+        return {
+            "base_size": config.base_size,
+            "image_size": config.image_size,
+            "crop_mode": config.crop_mode,
+            "save_results": False,
+            "eval_mode": True,
+            "max_length": 32768,
+            "no_repeat_ngram_size": 35,
+            "ngram_window": 128,
+            "temperature": 0.0,
+        }
+
+
+def _device_in_flight_callback(backend: HuggingFaceBackend) -> Callable[[], dict[tuple[str, ...], float]]:
+    # 只持有弱引用，注册指标不会让已丢弃的模型副本一直留在内存中
+    backend_ref = weakref.ref(backend)
+
+    def collect() -> dict[tuple[str, ...], float]:
+        alive = backend_ref()
+        return {} if alive is None else alive._device_in_flight()  # pylint: disable=protected-access
+
+    return collect
+
+
+def _token_counts(context: ExtractionContext | None) -> tuple[int, int]:
+    if context is None:
+        return 0, 0
+    return context.input_tokens, context.output_tokens
+
+
+def _infer_inputs(prompt: str, image_path: Path, output_path: Path) -> dict[str, str]:
+    return {
+        "prompt": prompt,
+        "image_file": str(image_path),
+        "output_path": str(output_path),
+    }
+
+
+def _run_batch(key: Any, requests: Sequence[_BatchRequest]) -> list[Any]:
+    # 模型代码提供的 infer_batch(tokenizer, requests=[{prompt, image_file, output_path}], **options)
+    # 按请求顺序返回结果；每个请求保留自己的 stopping criteria 与 token 统计
+    del key
+    first = requests[0]
+    with BatchInferWithInterruption(
+        first.llm_model,
+        [request.context for request in requests],
+        tokenizer=first.tokenizer,
+    ) as infer:
+        return infer(
+            first.tokenizer,
+            requests=[request.inputs for request in requests],
+            **first.options,
+        )
+
 
 @contextmanager
 def _download_settings(config: _DownloadConfig):
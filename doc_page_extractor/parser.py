@@ -2,8 +2,24 @@ import re
 from enum import Enum, auto
 from typing import Generator
 
-_TAG_PATTERN = re.compile(r"<\|(det|ref)\|>(.+?)<\|/\1\|>")
+# 一次匹配一个完整标签。第一个分支是 det 的常规写法，直接取出坐标，省去对标签内容
+# 再做一次坐标搜索；其余情况由第二个分支按原语义匹配（内容非空、不跨行、最短匹配）。
+# 坐标之间的空白不能包含换行，否则第一个分支会匹配到第二个分支不接受的跨行标签。
+_TAG_PATTERN = re.compile(
+    r"<\|det\|>\[\[(\d+),[^\S\n]*(\d+),[^\S\n]*(\d+),[^\S\n]*(\d+)\]\]<\|/det\|>"
+    r"|<\|(det|ref)\|>(.+?)<\|/\5\|>"
+)
+_OPEN_TAG_PATTERN = re.compile(r"<\|(det|ref)\|>")
 _DET_COORDS_PATTERN = re.compile(r"\[\[(\d+),\s*(\d+),\s*(\d+),\s*(\d+)\]\]")
+_LINE_BLOCK_PATTERN = re.compile(
+    r"^(?P<ref>[A-Za-z_]+)\[\[(?P<x1>\d+),\s*(?P<y1>\d+),\s*(?P<x2>\d+),\s*(?P<y2>\d+)\]\]\s*$",
+    re.MULTILINE,
+)
+# 行块正则里的 \s* 可以跨行。跨越块边界的匹配只可能从这样一段文本的行首开始：
+# 从该行首到已处理文本末尾都只含行块可能用到的字符
+_DETECTION_CARRY_PATTERN = re.compile(r"[A-Za-z_\[\],\d\s]*")
+# str.splitlines 除 \n 之外还会在这些字符处断行
+_OTHER_LINE_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
 
 
 class ParsedItemKind(Enum):
@@ -19,33 +35,181 @@ ParsedItem = (
 )
 
 
+LineBlock = tuple[str, tuple[int, int, int, int], str | None]
+
+
 def parse_ocr_response(
     response: str, width: int, height: int
 ) -> Generator[ParsedItem, None, None]:
-    last_end: int = 0
-    for matched in _TAG_PATTERN.finditer(response):
-        if matched.start() > last_end:
-            plain_text = response[last_end : matched.start()]
-            if plain_text:
-                yield ParsedItemKind.TEXT, plain_text
-        tag_type = matched.group(1)
-        content = matched.group(2)
-        if tag_type == "det":
-            coords_match = _DET_COORDS_PATTERN.search(content)
-            if coords_match:
-                x1_norm, y1_norm, x2_norm, y2_norm = [
-                    int(c) for c in coords_match.groups()
-                ]
-                x1 = round(x1_norm / 1000 * width)
-                y1 = round(y1_norm / 1000 * height)
-                x2 = round(x2_norm / 1000 * width)
-                y2 = round(y2_norm / 1000 * height)
-                yield ParsedItemKind.DET, (x1, y1, x2, y2)
-        elif tag_type == "ref":
-            yield ParsedItemKind.REF, content
-        last_end = matched.end()
-
-    if last_end < len(response):
-        plain_text = response[last_end:]
-        if plain_text:
-            yield ParsedItemKind.TEXT, plain_text
+    parser = IncrementalOCRParser(width, height)
+    yield from parser.feed(response)
+    yield from parser.close()
+
+
+class IncrementalOCRParser:
+    """DeepSeek 标签格式的单遍增量分词器：文本分块送入 feed()，标签一旦确定完整就立即产出。
+
+    标签不会跨越换行，所以已结束的行里的匹配都是确定的；最后一行里，前面还有可能
+    等待闭合的开始标签时先停下，等后续文本到来。已处理的文本不会重新扫描。
+    所有块送完后调用 close()。按任意方式分块，产出的序列都与 parse_ocr_response 相同。
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self._width = width
+        self._height = height
+        self._buffer = ""
+        self._scan_from = 0
+
+    def feed(self, chunk: str) -> list[ParsedItem]:
+        self._buffer += chunk
+        # 标签以 > 结尾：既没有 > 也没有换行的块不会补全标签，也不会结束最后一行
+        if ">" not in chunk and "\n" not in chunk:
+            return []
+        return self._drain(final=False)
+
+    def close(self) -> list[ParsedItem]:
+        items = self._drain(final=True)
+        if self._buffer:
+            items.append((ParsedItemKind.TEXT, self._buffer))
+        self._buffer = ""
+        self._scan_from = 0
+        return items
+
+    def _drain(self, final: bool) -> list[ParsedItem]:
+        items: list[ParsedItem] = []
+        buffer = self._buffer
+        width = self._width
+        height = self._height
+        # buffer[text_start:] 是尚未产出的文本；最后一行之前的匹配不会再因后续文本改变
+        last_line_start = len(buffer) if final else buffer.rfind("\n") + 1
+        text_start = 0
+        position = self._scan_from
+        search = _TAG_PATTERN.search
+        while True:
+            matched = search(buffer, position)
+            if matched is None:
+                position = max(position, last_line_start)
+                break
+            tag_start = matched.start()
+            if tag_start >= last_line_start and _OPEN_TAG_PATTERN.search(
+                buffer, max(position, last_line_start), tag_start
+            ):
+                break
+            if tag_start > text_start:
+                items.append((ParsedItemKind.TEXT, buffer[text_start:tag_start]))
+            x1 = matched.group(1)
+            if x1 is not None:
+                y1, x2, y2 = matched.group(2, 3, 4)
+                items.append((ParsedItemKind.DET, _scaled_det(x1, y1, x2, y2, width, height)))
+            elif matched.group(5) == "ref":
+                items.append((ParsedItemKind.REF, matched.group(6)))
+            else:
+                coords = _DET_COORDS_PATTERN.search(matched.group(6))
+                if coords is not None:
+                    items.append((ParsedItemKind.DET, _scaled_det(*coords.groups(), width, height)))
+            text_start = position = matched.end()
+
+        if text_start:
+            self._buffer = buffer[text_start:]
+        self._scan_from = position - text_start
+        return items
+
+
+class IncrementalLineBlockParser:
+    """DeepSeek OCR 2 行块格式（`label[[x1, y1, x2, y2]]` 独占一行，下面是正文）的增量解析器。
+
+    只要任意一行是行块，整个响应就按行块格式解析，detected 变为 True，此前和之后
+    完成的块才会产出；从未出现行块时什么也不产出，由调用方改用标签格式。
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self._width = width
+        self._height = height
+        self._pending: list[str] = []
+        self._blocks: list[LineBlock] = []
+        self._ref: str | None = None
+        self._det: tuple[int, int, int, int] | None = None
+        self._text_parts: list[str] = []
+        self._detection_carry = ""
+        self.detected = False
+
+    def feed(self, chunk: str) -> list[LineBlock]:
+        self._pending.append(chunk)
+        if "\n" in chunk:
+            text = "".join(self._pending)
+            # 只处理到最后一个 \n 为止的完整行，\r\n 不会被拆开
+            split = text.rfind("\n") + 1
+            self._pending = [text[split:]]
+            self._parse_lines(text[:split])
+        return self._take_blocks()
+
+    def close(self) -> list[LineBlock]:
+        text = "".join(self._pending)
+        self._pending = []
+        self._parse_lines(text)
+        self._flush()
+        return self._take_blocks()
+
+    def _parse_lines(self, text: str) -> None:
+        if not self.detected:
+            searched = self._detection_carry + text
+            if _LINE_BLOCK_PATTERN.search(searched):
+                self.detected = True
+                self._detection_carry = ""
+            else:
+                self._detection_carry = _detection_carry(searched)
+                # 只按 \n 分行时整段搜索不到行块，逐行匹配也不会有结果，标签格式可以跳过逐行
+                if self._ref is None and not any(char in text for char in _OTHER_LINE_BREAKS):
+                    return
+        match = _LINE_BLOCK_PATTERN.match
+        text_parts = self._text_parts
+        for line in text.splitlines():
+            matched = match(line)
+            if matched is not None:
+                self._flush()
+                text_parts = self._text_parts
+                self._ref = matched.group("ref")
+                self._det = _scaled_det(*matched.group(2, 3, 4, 5), self._width, self._height)
+            elif self._ref is not None:
+                text_parts.append(line)
+
+    def _flush(self) -> None:
+        if self._ref is not None and self._det is not None:
+            text = "\n".join(self._text_parts).strip("\n") or None
+            self._blocks.append((self._ref, self._det, text))
+        self._ref = None
+        self._det = None
+        self._text_parts = []
+
+    def _take_blocks(self) -> list[LineBlock]:
+        if not self.detected or not self._blocks:
+            return []
+        blocks, self._blocks = self._blocks, []
+        return blocks
+
+
+def _detection_carry(text: str) -> str:
+    # 行块模式里的 \s* 可以跨行，也可能被分块切开：从末尾往前逐行找出仍可能
+    # 拼成行块开头的最长后缀，留给下一次搜索
+    carry_start = len(text)
+    position = len(text)
+    while True:
+        line_start = text.rfind("\n", 0, position) + 1
+        if _DETECTION_CARRY_PATTERN.fullmatch(text, line_start, position) is None:
+            break
+        carry_start = line_start
+        if line_start == 0:
+            break
+        position = line_start - 1
+    return text[carry_start:]
+
+
+def _scaled_det(
+    x1: str, y1: str, x2: str, y2: str, width: int, height: int
+) -> tuple[int, int, int, int]:
+    return (
+        round(int(x1) / 1000 * width),
+        round(int(y1) / 1000 * height),
+        round(int(x2) / 1000 * width),
+        round(int(y2) / 1000 * height),
+    )
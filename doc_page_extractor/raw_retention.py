@@ -0,0 +1,110 @@
+import json
+import weakref
+from typing import Any, Iterator, Mapping
+
+from .types import Layout, RawRetention
+
+
+class _DecodedItems(list):
+    # 普通 list 不能被弱引用
+    pass
+
+
+class _RawPayload:
+    """一次解析得到的全部 raw，压缩成一段 UTF-8 JSON，由同一批的 LazyRaw 共享。"""
+
+    __slots__ = ("_encoded", "_decoded", "__weakref__")
+
+    def __init__(self, encoded: bytes) -> None:
+        self._encoded = encoded
+        self._decoded: weakref.ref[_DecodedItems] | None = None
+
+    def __reduce__(self):
+        return (_RawPayload, (self._encoded,))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._encoded)
+
+    def decode(self) -> _DecodedItems:
+        # 已解码的列表只要还有 LazyRaw 引用就复用，全部释放后下次读取再解码
+        items = self._decoded() if self._decoded is not None else None
+        if items is None:
+            items = _DecodedItems(json.loads(self._encoded))
+            self._decoded = weakref.ref(items)
+        return items
+
+
+class LazyRaw(Mapping[str, Any]):
+    """raw_retention="lazy" 时 Layout.raw 的取值。
+
+    只保存共享的 JSON 与自己的下标，第一次读取时解码，之后和普通 dict 一样只读使用；
+    与内容相同的 dict 比较相等，需要可修改的副本时用 dict(layout.raw)。
+    """
+
+    __slots__ = ("_payload", "_index", "_items")
+
+    def __init__(self, payload: _RawPayload, index: int) -> None:
+        self._payload = payload
+        self._index = index
+        self._items: _DecodedItems | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._items is not None
+
+    def _item(self) -> dict[str, Any]:
+        if self._items is None:
+            self._items = self._payload.decode()
+        return self._items[self._index]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._item()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._item())
+
+    def __len__(self) -> int:
+        return len(self._item())
+
+    def __repr__(self) -> str:
+        if self._items is None:
+            return f"LazyRaw(<{self._payload.nbytes} bytes shared, index {self._index}>)"
+        return f"LazyRaw({self._item()!r})"
+
+
+def retain_raw(
+    layouts: list[Layout],
+    retention: RawRetention,
+    mapped_keys: frozenset[str] = frozenset(),
+) -> None:
+    """按 retention 就地替换 layouts 的 raw。mapped_keys 是已经解析到 Layout 字段上的键，trim 时去掉。"""
+    if retention == "keep":
+        return
+    if retention == "drop":
+        for layout in layouts:
+            layout.raw = None
+    elif retention == "trim":
+        for layout in layouts:
+            if layout.raw is not None:
+                trimmed = {key: value for key, value in layout.raw.items() if key not in mapped_keys}
+                layout.raw = trimmed or None
+    elif retention == "lazy":
+        retained = [layout for layout in layouts if layout.raw is not None]
+        if not retained:
+            return
+        encoded = json.dumps(
+            [_plain(layout.raw) for layout in retained],
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        ).encode("utf-8")
+        payload = _RawPayload(encoded)
+        for index, layout in enumerate(retained):
+            layout.raw = LazyRaw(payload, index)
+    else:
+        raise ValueError(f"Unsupported raw retention: {retention}")
+
+
+def _plain(raw: Mapping[str, Any] | None) -> Any:
+    return raw if isinstance(raw, dict) else dict(raw or {})
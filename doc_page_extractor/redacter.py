@@ -1,6 +1,9 @@
-from typing import Any, Generator, Iterable, cast
+from math import sqrt
+from typing import Iterable
 
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageStat
+
+_Color = tuple[float, float, float, float]
 
 
 def redact(
@@ -14,65 +17,26 @@ def redact(
     return image
 
 
-class _AveragingColor:
-    def __init__(self) -> None:
-        self._r: float = 0.0
-        self._g: float = 0.0
-        self._b: float = 0.0
-        self._a: float = 0.0
-        self._count: int = 0
-
-    @property
-    def count(self) -> int:
-        return self._count
-
-    @property
-    def average(self) -> tuple[float, float, float, float]:
-        if self._count == 0:
-            return 1.0, 1.0, 1.0, 1.0
-        return (
-            self._r / self._count,
-            self._g / self._count,
-            self._b / self._count,
-            self._a / self._count,
-        )
-
-    def add_color(self, r: float, g: float, b: float, a: float) -> None:
-        self._r += r
-        self._g += g
-        self._b += b
-        self._a += a
-        self._count += 1
-
-
-def background_color(image: Image.Image) -> tuple[int, int, int]:
-    """将像素颜色按灰度排序，取中位颜色。此颜色与纸张的颜色相同，可做背景色"""
-    pixels_count = image.width * image.height
-    if pixels_count == 0:
-        return 255, 255, 255
-
-    bucket: list[_AveragingColor | None] = [None] * 256
-    for r, g, b, a in _iter_pixels(image):
-        gray = round(255 * _gray(r, g, b, a))
-        colors = bucket[gray]
-        if colors is None:
-            colors = _AveragingColor()
-            bucket[gray] = colors
-        colors.add_color(r, g, b, a)
+def background_color(
+    image: Image.Image, max_pixels: int | None = None
+) -> tuple[int, int, int]:
+    """将像素颜色按灰度排序，取中位颜色。此颜色与纸张的颜色相同，可做背景色
 
-    offset: int = 0
-    found_colors: _AveragingColor | None = None
+    max_pixels 不为 None 时，超过该像素数的页面会先最近邻降采样再统计，用于超大扫描页。
+    """
+    if image.width * image.height == 0:
+        return 255, 255, 255
 
-    for colors in bucket:
-        if not colors:
-            continue
-        offset += colors.count
-        if offset > pixels_count // 2:
-            found_colors = colors
-            break
+    if max_pixels is not None:
+        image = _downsample(image, max_pixels)
+    if image.mode not in ("L", "RGB", "RGBA"):
+        # LA 等模式统一转为 RGBA（ImageStat 无法正确统计 LA 的 alpha 通道）
+        image = image.convert("RGBA")
 
-    assert found_colors is not None
-    r, g, b, a = found_colors.average
+    if image.mode == "RGBA" and image.getchannel("A").getextrema()[0] < 255:
+        r, g, b, a = _translucent_median_color(image)
+    else:
+        r, g, b, a = _opaque_median_color(image)
 
     # 背景色为白色
     r = r * a + 1.0 * (1.0 - a)
@@ -82,30 +46,64 @@ def background_color(image: Image.Image) -> tuple[int, int, int]:
     return round(r * 255), round(g * 255), round(b * 255)
 
 
+def _opaque_median_color(image: Image.Image) -> _Color:
+    # 灰度按 ITU-R BT.601 计算 https://en.wikipedia.org/wiki/Rec._601 ，直方图一次扫描得到中位灰度
+    gray = image.convert("L")
+    found_gray = _median_level(gray.histogram(), image.width * image.height)
+
+    # 只统计落在中位灰度桶中的像素，求其平均颜色
+    mask = gray.point(lambda level: 255 if level == found_gray else 0)
+    mean = [value / 255.0 for value in ImageStat.Stat(image, mask).mean]
+    if image.mode == "L":
+        return mean[0], mean[0], mean[0], 1.0
+    return mean[0], mean[1], mean[2], 1.0
+
+
+def _translucent_median_color(image: Image.Image) -> _Color:
+    # 半透明像素的灰度要乘以 alpha，逐通道整数相乘会二次取整，因此按去重后的颜色精确计算
+    pixels_count = image.width * image.height
+    counts: list[int] = [0] * 256
+    sums: list[list[float]] = [[0.0, 0.0, 0.0, 0.0] for _ in range(256)]
+
+    for count, color in image.getcolors(pixels_count) or ():
+        r, g, b, a = (channel / 255.0 for channel in color)
+        gray = round(255 * _gray(r, g, b, a))
+        counts[gray] += count
+        bucket = sums[gray]
+        bucket[0] += r * count
+        bucket[1] += g * count
+        bucket[2] += b * count
+        bucket[3] += a * count
+
+    found_gray = _median_level(counts, pixels_count)
+    count = counts[found_gray]
+    r, g, b, a = (channel / count for channel in sums[found_gray])
+    return r, g, b, a
+
+
+def _median_level(histogram: list[int], pixels_count: int) -> int:
+    offset: int = 0
+    for level, count in enumerate(histogram):
+        offset += count
+        if offset > pixels_count // 2:
+            return level
+    return len(histogram) - 1
+
+
 def _gray(r: float, g: float, b: float, a: float) -> float:
     # ITU-R BT.601 https://en.wikipedia.org/wiki/Rec._601
     gray = 0.299 * r + 0.587 * g + 0.114 * b
     return gray * a
 
 
-def _iter_pixels(
-    image: Image.Image,
-) -> Generator[tuple[float, float, float, float], None, None]:
-    for pixel in cast(Any, image.getdata()):
-        pixel_len = len(cast(tuple, pixel)) if isinstance(pixel, tuple) else 1
-        if pixel_len == 4:
-            # RGBA 格式
-            r, g, b, a = cast(tuple[int, int, int, int], pixel)
-        elif pixel_len == 3:
-            # RGB 格式
-            r, g, b = cast(tuple[int, int, int], pixel)
-            a = 255
-        elif pixel_len == 2:
-            # LA 格式 (灰度 + alpha)
-            l, a = cast(tuple[int, int], pixel)
-            r = g = b = l
-        else:
-            # L 格式 (灰度)
-            r = g = b = cast(int, pixel)
-            a = 255
-        yield (r / 255.0, g / 255.0, b / 255.0, a / 255.0)
+def _downsample(image: Image.Image, max_pixels: int) -> Image.Image:
+    if max_pixels <= 0:
+        raise ValueError("max_pixels must be positive")
+    width, height = image.size
+    pixels_count = width * height
+    if pixels_count <= max_pixels:
+        return image
+    # 最近邻采样保留原始像素颜色，不会把文字与纸张混合成新的灰度
+    ratio = sqrt(max_pixels / pixels_count)
+    size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+    return image.resize(size, Image.Resampling.NEAREST)
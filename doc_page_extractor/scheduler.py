@@ -0,0 +1,49 @@
+import threading
+from contextlib import contextmanager
+from typing import Generator, Iterable
+
+
+class DeviceScheduler:
+    """把页面分配给在途请求最少的设备。
+
+    acquire() 未指定设备时选择在途请求数最少的设备，负载相同时选择累计分配次数最少的设备，
+    因此顺序调用也会在各设备之间轮流分配。指定设备时只做计数，不改变分配结果。
+    """
+
+    def __init__(self, device_numbers: Iterable[int]) -> None:
+        self._device_numbers: tuple[int, ...] = tuple(sorted(set(device_numbers)))
+        if not self._device_numbers:
+            raise ValueError("DeviceScheduler needs at least one device")
+        self._lock = threading.Lock()
+        self._in_flight: dict[int, int] = dict.fromkeys(self._device_numbers, 0)
+        self._assigned: dict[int, int] = dict.fromkeys(self._device_numbers, 0)
+
+    @property
+    def device_numbers(self) -> tuple[int, ...]:
+        return self._device_numbers
+
+    @contextmanager
+    def acquire(self, device_number: int | None = None) -> Generator[int, None, None]:
+        device_number = self._reserve(device_number)
+        try:
+            yield device_number
+        finally:
+            with self._lock:
+                self._in_flight[device_number] -= 1
+
+    def queue_depths(self) -> dict[int, int]:
+        with self._lock:
+            return dict(self._in_flight)
+
+    def _reserve(self, device_number: int | None) -> int:
+        with self._lock:
+            if device_number is None:
+                device_number = min(
+                    self._device_numbers,
+                    key=lambda number: (self._in_flight[number], self._assigned[number]),
+                )
+            elif device_number not in self._in_flight:
+                raise ValueError(f"Device number {device_number} is not enabled.")
+            self._in_flight[device_number] += 1
+            self._assigned[device_number] += 1
+            return device_number
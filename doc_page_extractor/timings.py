@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from typing import Generator, Mapping
+
+from .tracing import span
+
+# OCRPageResult.timings 中各阶段的名称，单位为秒。除 total 外各阶段互不重叠：
+# resize      抽取器按 max_image_side 缩小页面
+# encode      写 PNG 临时文件，或供应商上传前编码图片
+# inference   本地模型生成
+# request     DeepSeek 供应商请求（上传、服务端处理直到收到响应；流式时到响应头为止）
+# stream      DeepSeek 供应商流式接收输出
+# upload      Unlimited 供应商提交任务
+# poll        Unlimited 供应商等待任务完成（服务端处理与轮询）
+# download    Unlimited 供应商下载解析结果
+# parse       解析模型输出为 Layout
+# structure   build_structured_page
+# background  多阶段抽取时计算背景色（记在下一阶段的结果上）
+# redact      多阶段抽取时涂抹页面（记在下一阶段的结果上）
+# crop        stage_mode="crop" 时裁剪出未涂抹的区域（记在下一阶段的结果上）
+# cache       CachedOCRAdapter 命中时读取并解码缓存的结果
+# total       抽取器中该阶段从开始到产出结果的总耗时
+#
+# timed() 同时在当前 span 下打开同名的子 span，未启用 tracing 时不记录。
+
+
+@contextmanager
+def timed(timings: dict[str, float], stage: str) -> Generator[None, None, None]:
+    started = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        add_timing(timings, stage, time.perf_counter() - started)
+
+
+def add_timing(timings: dict[str, float], stage: str, seconds: float) -> None:
+    timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def add_timings(timings: dict[str, float], other: Mapping[str, float]) -> None:
+    for stage, seconds in other.items():
+        add_timing(timings, stage, seconds)
@@ -0,0 +1,211 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from os import PathLike
+from typing import Any, Generator, Protocol, TextIO, runtime_checkable
+
+# span 名称：
+# document / document.page       extract_document 整份文档与其中一页（page 为页码）
+# page / stage                   抽取器处理一张页面与其中一个阶段（stage 从 1 开始）
+# adapter.extract_page           一次 adapter 调用，结束时记录 source 与 token 增量
+# model.acquire_device           等待调度器分配 GPU 副本
+# model.read_lock                等待模型读锁（下载、卸载时持有写锁）
+# model.generate                 本地模型推理
+# http.request                   供应商 HTTP 请求（url 不含查询参数）
+# poll.query / poll.fetch        Unlimited 供应商在轮询线程中查询任务状态、下载结果
+# 其余 span 与 timings 模块中的阶段同名（encode、parse、structure 等）
+
+_current_span: ContextVar["Span | None"] = ContextVar("doc_page_extractor_span", default=None)
+
+
+@runtime_checkable
+class Tracer(Protocol):
+    def export(self, finished: "Span") -> None:
+        ...
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration: float | None = None
+    error: str | None = None
+    error_type: str | None = None
+    thread: str | None = None
+    _tracer: Tracer | None = field(default=None, repr=False, compare=False)
+    _started: float = field(default=0.0, repr=False, compare=False)
+
+    @property
+    def recording(self) -> bool:
+        return self._tracer is not None
+
+    def set(self, **attributes: Any) -> None:
+        if self._tracer is not None:
+            self.attributes.update(attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "thread": self.thread,
+            "error": self.error,
+            "error_type": self.error_type,
+            "attributes": self.attributes,
+        }
+
+
+class NoopTracer:
+    """默认的 tracer，不记录任何 span；span() 对它直接返回不记录的占位 span。"""
+
+    def export(self, finished: Span) -> None:
+        del finished
+
+
+class MultiTracer:
+    """把每个 span 依次交给多个 tracer，例如同时写 JSON Lines 与统计指标。"""
+
+    def __init__(self, *tracers: Tracer) -> None:
+        self._tracers = tracers
+
+    def export(self, finished: Span) -> None:
+        for tracer in self._tracers:
+            tracer.export(finished)
+
+
+class InMemoryTracer:
+    """把结束的 span 保存在内存中，供测试和交互式排查使用。子 span 先于父 span 结束。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._spans: list[Span] = []
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def export(self, finished: Span) -> None:
+        with self._lock:
+            self._spans.append(finished)
+
+    def find(self, name: str) -> list[Span]:
+        return [found for found in self.spans if found.name == name]
+
+    def children(self, parent: Span) -> list[Span]:
+        return [found for found in self.spans if found.parent_id == parent.span_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class JSONLinesTracer:
+    """每个结束的 span 写成一行 JSON，可追加到文件或写入已打开的文本流。"""
+
+    def __init__(self, file: PathLike | str | TextIO) -> None:
+        self._lock = threading.Lock()
+        if isinstance(file, (str, PathLike)):
+            self._file: TextIO = open(file, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+
+    def __enter__(self) -> "JSONLinesTracer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def export(self, finished: Span) -> None:
+        line = json.dumps(finished.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._owns_file and not self._file.closed:
+                self._file.close()
+
+
+_UNRECORDED = Span(name="", trace_id="", span_id="", parent_id=None, start_time=0.0)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(
+    name: str,
+    tracer: Tracer | None = None,
+    parent: Span | None = None,
+    activate: bool = True,
+    **attributes: Any,
+) -> Generator[Span, None, None]:
+    """打开一个 span，结束时交给 tracer 导出。
+
+    父 span 依次取 parent、当前上下文中的 span；有父 span 时沿用它的 tracer，
+    否则使用 tracer 参数，两者都没有（或是 NoopTracer）时返回不记录的占位 span。
+    activate 为 False 时不把它设为当前 span，生成器跨 yield 持有的 span 需要这样打开，
+    其子 span 通过 parent 参数显式指定。
+    """
+    opened = _start_span(name, tracer, parent, attributes)
+    if not opened.recording:
+        yield opened
+        return
+
+    token = _current_span.set(opened) if activate else None
+    try:
+        yield opened
+    except Exception as error:
+        opened.error_type = type(error).__name__
+        opened.error = f"{opened.error_type}: {error}"
+        raise
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+        opened.duration = time.perf_counter() - opened._started  # pylint: disable=protected-access
+        opened._tracer.export(opened)  # pylint: disable=protected-access
+
+
+def _start_span(
+    name: str,
+    tracer: Tracer | None,
+    parent: Span | None,
+    attributes: dict[str, Any],
+) -> Span:
+    if parent is None:
+        parent = _current_span.get()
+    if parent is not None and parent.recording:
+        tracer = parent._tracer  # pylint: disable=protected-access
+    elif tracer is None or isinstance(tracer, NoopTracer):
+        return _UNRECORDED
+    else:
+        parent = None
+
+    span_id = f"{random.getrandbits(64):016x}"
+    return Span(
+        name=name,
+        trace_id=span_id if parent is None else parent.trace_id,
+        span_id=span_id,
+        parent_id=None if parent is None else parent.span_id,
+        start_time=time.time(),
+        attributes=attributes,
+        thread=threading.current_thread().name,
+        _tracer=tracer,
+        _started=time.perf_counter(),
+    )
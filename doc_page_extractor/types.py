@@ -2,7 +2,20 @@ from dataclasses import dataclass, field
 from enum import Enum
 from os import PathLike
 from pathlib import Path
-from typing import Any, TYPE_CHECKING, runtime_checkable, Protocol, Generator, Literal, Callable
+from typing import (
+    Any,
+    AsyncGenerator,
+    TYPE_CHECKING,
+    runtime_checkable,
+    Protocol,
+    Generator,
+    Iterable,
+    Literal,
+    Callable,
+    Mapping,
+)
+
+from .tracing import NoopTracer, Tracer
 
 if TYPE_CHECKING:
     from PIL import Image
@@ -10,6 +23,11 @@ if TYPE_CHECKING:
 
 DeepSeekOCRSize = Literal["tiny", "small", "base", "large", "gundam"]
 DeepSeekBackend = Literal["deepseek-ocr", "deepseek-ocr2"]
+# adapter 如何保留 Layout.raw：keep 原样引用供应商数据，trim 只留下未映射到 Layout 字段的键，
+# drop 丢弃，lazy 压缩成 JSON 并在首次读取时解码（见 raw_retention 模块）
+RawRetention = Literal["keep", "trim", "drop", "lazy"]
+# 多阶段抽取中后续阶段的页面：redact 涂抹后送入整页，crop 只送入未涂抹的下方区域
+StageMode = Literal["redact", "crop"]
 
 
 class LayoutKind(str, Enum):
@@ -29,7 +47,8 @@ class LayoutKind(str, Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+# 一个批次可能持有数十万个 Layout，slots 省去每个实例的 __dict__
+@dataclass(slots=True)
 class Layout:
     det: tuple[int, int, int, int]
     text: str | None
@@ -37,11 +56,11 @@ class Layout:
     polygon: list[tuple[int, int]] | None = None
     html: str | None = None
     source: str | None = None
-    raw: dict[str, Any] | None = field(default=None, repr=False)
+    raw: Mapping[str, Any] | None = field(default=None, repr=False)
     kind: LayoutKind = LayoutKind.UNKNOWN
 
 
-@dataclass
+@dataclass(slots=True)
 class PageBlock:
     kind: LayoutKind
     det: tuple[int, int, int, int]
@@ -51,7 +70,7 @@ class PageBlock:
     children: list["PageBlock"] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class StructuredPage:
     blocks: list[PageBlock]
     ignored: list[Layout] = field(default_factory=list)
@@ -64,6 +83,8 @@ class OCRPageResult:
     raw_text: str | None = None
     raw: dict[str, Any] | None = field(default=None, repr=False)
     structured: StructuredPage | None = None
+    # 各阶段耗时（秒），阶段名称见 timings 模块
+    timings: dict[str, float] = field(default_factory=dict)
 
 
 @dataclass
@@ -74,6 +95,10 @@ class ExtractionContext:
     max_output_tokens: int | None = None
     input_tokens: int = 0
     output_tokens: int = 0
+    # 抽取器把每个阶段结果的 timings 累加到这里
+    timings: dict[str, float] = field(default_factory=dict)
+    # 抽取过程中打开的 span 交给它导出，见 tracing 模块
+    tracer: Tracer = field(default_factory=NoopTracer)
 
 
 @runtime_checkable
@@ -115,3 +140,67 @@ class OCRAdapter(Protocol):
         device_number: int | None,
     ) -> OCRPageResult:
         ...
+
+
+@runtime_checkable
+class ImageOCRAdapter(OCRAdapter, Protocol):
+    """可直接接收内存中 PIL 图片的 adapter，抽取器会优先调用它，避免把页面写成 PNG 文件。"""
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        ...
+
+
+@runtime_checkable
+class StreamingOCRAdapter(OCRAdapter, Protocol):
+    """可以在生成过程中逐个产出 Layout 的 adapter，坐标相对于传入的图片。"""
+
+    def stream_page_layouts(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        output_path: Path,
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> Iterable[Layout]:
+        ...
+
+
+@runtime_checkable
+class AsyncPageExtractor(Protocol):
+    def extract_page_results(
+        self,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        stages: int = 1,
+        context: ExtractionContext | None = None,
+    ) -> AsyncGenerator[tuple["Image.Image", OCRPageResult], None]:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+@runtime_checkable
+class AsyncOCRAdapter(Protocol):
+    allows_multi_stage: bool
+
+    async def extract_page_image(
+        self,
+        prompt: str,
+        image: "Image.Image",
+        size: DeepSeekOCRSize,
+        context: ExtractionContext | None,
+    ) -> OCRPageResult:
+        ...
+
+    async def aclose(self) -> None:
+        ...
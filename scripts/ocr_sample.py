@@ -203,6 +203,10 @@ def _unlimited_ocr_vendor_config_from_env() -> UnlimitedOCRVendorConfig:
             "UNLIMITED_OCR_POLL_INTERVAL_SECONDS",
             UnlimitedOCRVendorConfig.poll_interval_seconds,
         ),
+        expected_task_seconds=_optional_float_env(
+            "UNLIMITED_OCR_EXPECTED_TASK_SECONDS",
+            UnlimitedOCRVendorConfig.expected_task_seconds,
+        ),
         timeout_seconds=_optional_int_env(
             "UNLIMITED_OCR_TIMEOUT_SECONDS", UnlimitedOCRVendorConfig.timeout_seconds
         ),
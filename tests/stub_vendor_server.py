@@ -0,0 +1,136 @@
+import json
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes
+    connection_id: int
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+    def form(self) -> dict[str, list[str]]:
+        return parse_qs(self.body.decode("utf-8"))
+
+
+@dataclass
+class StubResponse:
+    status: int = 200
+    body: bytes | str | dict | list = b""
+    headers: dict[str, str] = field(default_factory=dict)
+    # 按块发送的响应体（例如 SSE），每块之间会 flush；可以是生成器，用来模拟逐步生成
+    chunks: Iterable[bytes] | None = None
+
+
+StubHandler = Callable[[StubRequest], StubResponse]
+
+
+class StubVendorServer:
+    """在本地线程中运行的供应商 HTTP 替身，用于测试 adapter 的真实网络路径。"""
+
+    def __init__(self, handler: StubHandler) -> None:
+        self.handler = handler
+        self.requests: list[StubRequest] = []
+        self._connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        with self._lock:
+            return self._connections
+
+    def __enter__(self) -> "StubVendorServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server._connections += 1
+                    self.connection_id = server._connections
+
+            def do_GET(self) -> None:
+                self._dispatch()
+
+            def do_POST(self) -> None:
+                self._dispatch()
+
+            def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+                del format, args
+
+            def _dispatch(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                parts = urlsplit(self.path)
+                request = StubRequest(
+                    method=self.command,
+                    path=parts.path,
+                    query=parse_qs(parts.query),
+                    headers=dict(self.headers.items()),
+                    body=self.rfile.read(length) if length else b"",
+                    connection_id=self.connection_id,
+                )
+                with server._lock:
+                    server.requests.append(request)
+                response = server.handler(request)
+                self._write(response)
+
+            def _write(self, response: StubResponse) -> None:
+                self.send_response(response.status)
+                for name, value in response.headers.items():
+                    self.send_header(name, value)
+                if response.chunks is not None:
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    try:
+                        for chunk in response.chunks:
+                            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                            self.wfile.flush()
+                        self.wfile.write(b"0\r\n\r\n")
+                    except (BrokenPipeError, ConnectionResetError):
+                        # 客户端提前断开，即放弃剩余输出
+                        self.close_connection = True
+                    return
+                body = response.body
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode("utf-8")
+                    if "Content-Type" not in response.headers:
+                        self.send_header("Content-Type", "application/json")
+                elif isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return _Handler
@@ -0,0 +1,217 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from PIL import Image
+
+from doc_page_extractor.adapters.access_token import AccessTokenCache
+from doc_page_extractor.adapters.unlimited import (
+    AsyncUnlimitedOCRVendorAdapter,
+    UnlimitedOCRVendorAdapter,
+    UnlimitedOCRVendorConfig,
+)
+from stub_vendor_server import StubRequest, StubResponse, StubVendorServer
+
+
+class TestAccessTokenCache(unittest.TestCase):
+    def test_token_is_refreshed_ahead_of_expiry(self):
+        cache = AccessTokenCache("key", refresh_margin_seconds=60)
+        now = time.time()
+        with patch("time.time", return_value=now):
+            cache.store("token", expires_in=100)
+            self.assertEqual(cache.current(), "token")
+        with patch("time.time", return_value=now + 41):
+            self.assertIsNone(cache.current())
+
+    def test_invalidate_keeps_a_newer_token(self):
+        cache = AccessTokenCache("key")
+        cache.store("new", expires_in=3600)
+
+        cache.invalidate("old")
+        self.assertEqual(cache.current(), "new")
+        cache.invalidate("new")
+        self.assertIsNone(cache.current())
+
+    def test_file_is_shared_per_key(self):
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "tokens.json"
+            AccessTokenCache("a", path).store("token-a", expires_in=3600)
+            AccessTokenCache("b", path).store("token-b", expires_in=3600)
+
+            self.assertEqual(AccessTokenCache("a", path).current(), "token-a")
+            self.assertEqual(AccessTokenCache("b", path).current(), "token-b")
+            self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+            self.assertNotIn("sk", path.read_text(encoding="utf-8"))
+
+
+    def test_invalidate_keeps_a_token_refreshed_by_another_process(self):
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "tokens.json"
+            stale = AccessTokenCache("key", path)
+            stale.store("old", expires_in=3600)
+            AccessTokenCache("key", path).store("new", expires_in=3600)
+
+            stale.invalidate("old")
+            self.assertEqual(AccessTokenCache("key", path).current(), "new")
+
+    @unittest.skipUnless(os.name == "posix", "flock is only used on POSIX")
+    def test_concurrent_processes_do_not_lose_updates(self):
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "tokens.json"
+            context = multiprocessing.get_context("fork")
+            processes = [
+                context.Process(target=_store_tokens, args=(path, f"worker-{i}", 30))
+                for i in range(6)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(timeout=30)
+                self.assertEqual(process.exitcode, 0)
+
+            for i in range(6):
+                self.assertEqual(AccessTokenCache(f"worker-{i}", path).current(), "token-29")
+
+
+def _store_tokens(path: Path, key: str, times: int) -> None:
+    cache = AccessTokenCache(key, path)
+    for index in range(times):
+        cache.store(f"token-{index}", expires_in=3600)
+
+
+class _TokenServer:
+    """每次请求 token 都发一个新的；revoked 中的 token 调用接口时返回 111。"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.issued: list[str] = []
+        self.revoked: set[str] = set()
+        self.submitted = 0
+        self.base_url = ""
+
+    def handle(self, request: StubRequest) -> StubResponse:
+        if request.path == "/oauth/2.0/token":
+            time.sleep(0.05)
+            with self.lock:
+                token = f"token-{len(self.issued)}"
+                self.issued.append(token)
+            return StubResponse(body={"access_token": token, "expires_in": 2592000})
+        if request.path.startswith("/result/"):
+            return StubResponse(
+                body={"pages": [{"layouts": [{"text": "page", "position": [1, 2, 3, 4]}]}]}
+            )
+        token = request.query["access_token"][0]
+        if token in self.revoked:
+            return StubResponse(body={"error_code": 111, "error_msg": "Access token expired"})
+        if request.path.endswith("/task"):
+            with self.lock:
+                self.submitted += 1
+                task_id = f"t-{self.submitted}"
+            return StubResponse(body={"error_code": 0, "result": {"task_id": task_id}})
+        if request.path.endswith("/task/query"):
+            return StubResponse(
+                body={
+                    "error_code": 0,
+                    "result": {
+                        "status": "success",
+                        "parse_result_url": f"{self.base_url}/result/t.json",
+                    },
+                }
+            )
+        return StubResponse(status=404, body="not found")
+
+
+def _config(base_url: str, **kwargs) -> UnlimitedOCRVendorConfig:
+    return UnlimitedOCRVendorConfig(
+        ak="ak",
+        sk="sk",
+        base_url=base_url,
+        expected_task_seconds=0.01,
+        min_poll_interval_seconds=0.01,
+        **kwargs,
+    )
+
+
+def _token_requests(server: StubVendorServer) -> int:
+    return sum(request.path == "/oauth/2.0/token" for request in server.requests)
+
+
+class TestUnlimitedAccessToken(unittest.TestCase):
+    def test_concurrent_pages_share_one_token_request(self):
+        tokens = _TokenServer()
+        with StubVendorServer(tokens.handle) as server:
+            tokens.base_url = server.base_url
+            with UnlimitedOCRVendorAdapter(_config(server.base_url)) as adapter:
+                barrier = threading.Barrier(10)
+
+                def submit():
+                    barrier.wait()
+                    return adapter.submit_page_image(Image.new("RGB", (20, 20), "white"))
+
+                futures: list = []
+                threads = [
+                    threading.Thread(target=lambda: futures.append(submit())) for _ in range(10)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                for future in futures:
+                    future.result(timeout=5)
+
+        self.assertEqual(_token_requests(server), 1)
+
+    def test_token_file_is_reused_by_another_adapter(self):
+        tokens = _TokenServer()
+        with TemporaryDirectory() as temp_dir, StubVendorServer(tokens.handle) as server:
+            tokens.base_url = server.base_url
+            config = _config(server.base_url, token_cache_path=Path(temp_dir) / "tokens.json")
+            for _ in range(2):
+                with UnlimitedOCRVendorAdapter(config) as adapter:
+                    adapter.submit_page_image(Image.new("RGB", (20, 20))).result(timeout=5)
+
+        self.assertEqual(_token_requests(server), 1)
+
+    def test_revoked_token_is_refreshed_once(self):
+        tokens = _TokenServer()
+        with StubVendorServer(tokens.handle) as server:
+            tokens.base_url = server.base_url
+            with UnlimitedOCRVendorAdapter(_config(server.base_url)) as adapter:
+                adapter.submit_page_image(Image.new("RGB", (20, 20))).result(timeout=5)
+                tokens.revoked.add("token-0")
+                adapter.submit_page_image(Image.new("RGB", (20, 20))).result(timeout=5)
+
+                self.assertEqual(_token_requests(server), 2)
+
+                tokens.revoked.add("token-1")
+                tokens.revoked.add("token-2")
+                with self.assertRaisesRegex(RuntimeError, "111"):
+                    adapter.submit_page_image(Image.new("RGB", (20, 20)))
+
+    def test_async_adapter_refreshes_revoked_token(self):
+        tokens = _TokenServer()
+
+        async def run(base_url: str) -> None:
+            async with AsyncUnlimitedOCRVendorAdapter(_config(base_url)) as adapter:
+                await adapter.extract_page_image("", Image.new("RGB", (20, 20)), "base", None)
+                tokens.revoked.add("token-0")
+                await adapter.extract_page_image("", Image.new("RGB", (20, 20)), "base", None)
+
+        with StubVendorServer(tokens.handle) as server:
+            tokens.base_url = server.base_url
+            try:
+                asyncio.run(run(server.base_url))
+            except ImportError as error:
+                self.skipTest(str(error))
+
+        self.assertEqual(tokens.issued, ["token-0", "token-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
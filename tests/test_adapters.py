@@ -1,6 +1,9 @@
+import ast
+import random
 import unittest
 
 from doc_page_extractor.adapters.unlimited import (
+    _parse_local_dets,
     parse_unlimited_ocr_layouts,
     parse_unlimited_ocr_local_layouts,
 )
@@ -14,6 +17,36 @@ from doc_page_extractor.structure import build_structured_page
 from doc_page_extractor.types import LayoutKind
 
 
+def _literal_eval_dets(raw_coords: str, width: int, height: int):
+    # 快速扫描器之前的实现，作为对照
+    raw_coords = raw_coords.strip()
+    if not raw_coords:
+        return []
+    try:
+        parsed = ast.literal_eval(raw_coords)
+    except (SyntaxError, ValueError):
+        return []
+    if not isinstance(parsed, list):
+        return []
+    dets = []
+    for box in parsed if parsed and isinstance(parsed[0], list) else [parsed]:
+        if not isinstance(box, list) or len(box) < 4:
+            continue
+        try:
+            x1, y1, x2, y2 = [float(part) for part in box[:4]]
+        except (TypeError, ValueError):
+            continue
+        det = (
+            round(x1 / 999 * width),
+            round(y1 / 999 * height),
+            round(x2 / 999 * width),
+            round(y2 / 999 * height),
+        )
+        if det[2] > det[0] and det[3] > det[1]:
+            dets.append(det)
+    return dets
+
+
 class _StubImage:
     def __init__(self, width: int, height: int) -> None:
         self.size = (width, height)
@@ -269,6 +302,42 @@ class TestAdapters(unittest.TestCase):
         self.assertEqual(len(structured.ignored), 1)
         self.assertEqual(structured.ignored[0].kind, LayoutKind.PAGE_NUMBER)
 
+    def test_unlimited_ocr_local_coords_match_literal_eval(self):
+        cases = [
+            "[100, 200, 300, 400]",
+            " [[1,2,3,4],[5, 6, 700, 800],]",
+            "[[1.5, 2e2, +3, 400.], [ ], [1, 2, 3]]",
+            "[10, 20, 30, 40, 50]",
+            "[[10,\n 20,\t30, 40]]",
+            "[-5, 0, 00, 10]",
+            "[007, 1, 2, 3]",
+            "[007.5, 1e1, 500, 600]",
+            "['1', '2', '300', '400']",
+            "[[1, 2, 3, 4], 5]",
+            "[(1, 2, 3, 4)]",
+            "(1, 2, 3, 4)",
+            "[True, 1, 500, 500]",
+            "[None, 1, 2, 3]",
+            "[1, 2, 3, 4",
+            "[1,, 2, 3, 4]",
+            "[1 2 3 4]",
+            "[1_0, 2, 300, 400]",
+            "[- 5, 2, 300, 400]",
+            "[]",
+            "[[]]",
+            "text",
+        ]
+        rng = random.Random(16)
+        pieces = ["[", "]", ",", " ", "\n", "1", "23", "0", "-", ".", "e", "x", "'"]
+        cases.extend("".join(rng.choice(pieces) for _ in range(rng.randint(1, 20))) for _ in range(2000))
+
+        for raw_coords in cases:
+            with self.subTest(raw_coords=raw_coords):
+                self.assertEqual(
+                    _parse_local_dets(raw_coords, 1000, 800),
+                    _literal_eval_dets(raw_coords, 1000, 800),
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
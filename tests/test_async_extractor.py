@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from doc_page_extractor import async_extractor
+from doc_page_extractor import (
+    AbortError,
+    AsyncVendorHTTPClient,
+    DeepSeekOCRVendorConfig,
+    ExtractionContext,
+    UnlimitedOCRVendorConfig,
+    create_async_deepseek_ocr_vendor_page_extractor,
+    create_async_unlimited_ocr_vendor_page_extractor,
+)
+from stub_vendor_server import StubRequest, StubResponse, StubVendorServer
+from test_vendor_adapters import _chat_completion, _unlimited_handler
+
+
+class _InFlightCounter:
+    def __init__(self, delay_seconds: float) -> None:
+        self.delay_seconds = delay_seconds
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: StubRequest) -> StubResponse:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay_seconds)
+            return _chat_completion(request)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+async def _collect(extractor, image, context=None):
+    return [
+        page_result
+        async for _, page_result in extractor.extract_page_results(
+            image, size="base", context=context
+        )
+    ]
+
+
+class TestAsyncPageExtractor(unittest.TestCase):
+    def test_pages_share_client_with_bounded_concurrency(self):
+        handler = _InFlightCounter(delay_seconds=0.1)
+        images = [Image.new("RGB", (1000, 500), "white") for _ in range(6)]
+
+        async def run(base_url: str):
+            config = DeepSeekOCRVendorConfig(
+                base_url=base_url, api_key="key", model="deepseek-ocr", pool_size=3
+            )
+            async with AsyncVendorHTTPClient.from_config(config) as client:
+                extractor = create_async_deepseek_ocr_vendor_page_extractor(config, client)
+                return await asyncio.gather(
+                    *(_collect(extractor, image) for image in images)
+                )
+
+        with StubVendorServer(handler) as server:
+            pages = asyncio.run(run(server.base_url))
+
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(pages[0][0].layouts[0].det, (100, 100, 300, 200))
+        self.assertIsNotNone(pages[0][0].structured)
+        self.assertEqual(handler.max_in_flight, 3)
+        self.assertLessEqual(server.connections, 3)
+
+    def test_abort_interrupts_pending_request(self):
+        aborted = threading.Event()
+        context = ExtractionContext(check_aborted=aborted.is_set)
+
+        async def run(base_url: str):
+            config = DeepSeekOCRVendorConfig(
+                base_url=base_url, api_key="key", model="deepseek-ocr"
+            )
+            async with create_async_deepseek_ocr_vendor_page_extractor(config) as extractor:
+                asyncio.get_running_loop().call_later(0.1, aborted.set)
+                started_at = time.monotonic()
+                with self.assertRaises(AbortError):
+                    await _collect(extractor, Image.new("RGB", (100, 100)), context)
+                return time.monotonic() - started_at
+
+        with StubVendorServer(_InFlightCounter(delay_seconds=2)) as server:
+            elapsed = asyncio.run(run(server.base_url))
+
+        self.assertLess(elapsed, 1.5)
+
+    def test_abandoned_request_keeps_its_slot_until_it_finishes(self):
+        release = threading.Event()
+
+        def handle(request: StubRequest) -> StubResponse:
+            if request.path == "/slow":
+                release.wait(5)
+            return StubResponse(body={"ok": True})
+
+        async def run(base_url: str):
+            aborted = threading.Event()
+            context = ExtractionContext(check_aborted=aborted.is_set)
+            async with AsyncVendorHTTPClient(max_concurrency=1) as client:
+                asyncio.get_running_loop().call_later(0.1, aborted.set)
+                with self.assertRaises(AbortError):
+                    await client.get(f"{base_url}/slow", context)
+
+                # 被放弃的请求仍在线程中执行，它结束之前不归还并发名额
+                held_while_running = client._semaphore.locked()  # pylint: disable=protected-access
+                release.set()
+                response = await client.get(f"{base_url}/fast")
+                return held_while_running, response.status_code
+
+        with StubVendorServer(handle) as server:
+            held_while_running, status = asyncio.run(run(server.base_url))
+
+        self.assertTrue(held_while_running)
+        self.assertEqual(status, 200)
+        self.assertEqual([request.path for request in server.requests], ["/slow", "/fast"])
+
+    def test_unlimited_vendor_task_flow(self):
+        server_url: list[str] = []
+
+        async def run(base_url: str):
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=base_url, poll_interval_seconds=0
+            )
+            async with create_async_unlimited_ocr_vendor_page_extractor(config) as extractor:
+                return await asyncio.gather(
+                    _collect(extractor, Image.new("RGB", (100, 100), "white")),
+                    _collect(extractor, Image.new("RGB", (100, 100), "white")),
+                )
+
+        with StubVendorServer(_unlimited_handler(server_url)) as server:
+            server_url.append(server.base_url)
+            pages = asyncio.run(run(server.base_url))
+
+        paths = [request.path.rsplit("/", 1)[-1] for request in server.requests]
+        self.assertEqual(paths.count("token"), 1)
+        self.assertEqual(paths.count("task"), 2)
+        self.assertEqual(pages[1][0].layouts[0].det, (10, 20, 40, 60))
+
+    def test_crop_stage_maps_coordinates_back_to_page(self):
+        async def run(base_url: str):
+            config = DeepSeekOCRVendorConfig(
+                base_url=base_url, api_key="key", model="deepseek-ocr"
+            )
+            async with create_async_deepseek_ocr_vendor_page_extractor(config, stage_mode="crop") as extractor:
+                return [
+                    (image.size, page_result)
+                    async for image, page_result in extractor.extract_page_results(
+                        Image.new("RGB", (1000, 500), "white"), size="base", stages=2
+                    )
+                ]
+
+        with StubVendorServer(_chat_completion) as server:
+            (first_size, first), (second_size, second) = asyncio.run(run(server.base_url))
+
+        # 第一阶段的区块在 2/3 线之上，第二阶段只上传 y >= 333 的 1000x167 区域
+        self.assertEqual((first_size, second_size), ((1000, 500), (1000, 500)))
+        self.assertEqual(first.layouts[0].det, (100, 100, 300, 200))
+        self.assertEqual(second.layouts[0].det, (100, 366, 300, 400))
+        self.assertIn("crop", second.timings)
+
+    def test_stage_images_are_prepared_off_the_event_loop(self):
+        threads: dict[str, set[int]] = {"crop": set(), "fit": set()}
+        crop_stage_image = async_extractor._crop_stage_image  # pylint: disable=protected-access
+        fit_adapter_image = async_extractor._fit_adapter_image  # pylint: disable=protected-access
+
+        def crop(*args, **kwargs):
+            threads["crop"].add(threading.get_ident())
+            return crop_stage_image(*args, **kwargs)
+
+        def fit(*args, **kwargs):
+            threads["fit"].add(threading.get_ident())
+            return fit_adapter_image(*args, **kwargs)
+
+        async def run(base_url: str):
+            config = DeepSeekOCRVendorConfig(
+                base_url=base_url, api_key="key", model="deepseek-ocr"
+            )
+            async with create_async_deepseek_ocr_vendor_page_extractor(config) as extractor:
+                async for _ in extractor.extract_page_results(
+                    Image.new("RGB", (1000, 500), "white"), size="base", stages=2
+                ):
+                    pass
+            return threading.get_ident()
+
+        with patch.object(async_extractor, "_crop_stage_image", crop):
+            with patch.object(async_extractor, "_fit_adapter_image", fit):
+                with StubVendorServer(_chat_completion) as server:
+                    loop_thread = asyncio.run(run(server.base_url))
+
+        self.assertTrue(threads["crop"] and threads["fit"])
+        self.assertNotIn(loop_thread, threads["crop"] | threads["fit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
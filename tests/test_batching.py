@@ -0,0 +1,276 @@
+import importlib
+import sys
+import threading
+import types
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from doc_page_extractor import ExtractionContext, TokenLimitError
+from doc_page_extractor.batching import MicroBatcher
+from doc_page_extractor.injection import BatchInferWithInterruption, preprocess_model
+from test_scheduler import _FakeLLM, _local_runtime_modules
+
+
+def _submit_concurrently(batcher: MicroBatcher, items: list[tuple[str, int]]) -> list:
+    results: list = [None] * len(items)
+
+    def submit(index: int, key: str, request: int) -> None:
+        try:
+            results[index] = batcher.submit(key, request)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            results[index] = error
+
+    threads = [
+        threading.Thread(target=submit, args=(index, key, request))
+        for index, (key, request) in enumerate(items)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_merges_concurrent_requests_and_splits_results(self):
+        batches: list[tuple[str, list[int]]] = []
+
+        def run_batch(key, requests):
+            batches.append((key, list(requests)))
+            return [request * 10 for request in requests]
+
+        batcher = MicroBatcher(run_batch, batch_window_seconds=5, max_batch_size=4)
+        results = _submit_concurrently(batcher, [("base", i) for i in range(4)])
+
+        self.assertEqual(results, [0, 10, 20, 30])
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(sorted(batches[0][1]), [0, 1, 2, 3])
+
+    def test_batches_are_keyed_and_bounded(self):
+        batches: list[tuple[str, list[int]]] = []
+        lock = threading.Lock()
+
+        def run_batch(key, requests):
+            with lock:
+                batches.append((key, list(requests)))
+            return list(requests)
+
+        batcher = MicroBatcher(run_batch, batch_window_seconds=0.2, max_batch_size=2)
+        items = [("base", 0), ("base", 1), ("base", 2), ("gundam", 3)]
+        results = _submit_concurrently(batcher, items)
+
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertEqual(sorted(len(requests) for _, requests in batches), [1, 1, 2])
+        for key, requests in batches:
+            self.assertEqual({items[request][0] for request in requests}, {key})
+
+    def test_errors_are_delivered_per_request(self):
+        def run_batch(key, requests):
+            del key
+            return [ValueError(request) if request == 1 else request for request in requests]
+
+        batcher = MicroBatcher(run_batch, batch_window_seconds=0.2, max_batch_size=3)
+        results = _submit_concurrently(batcher, [("base", 0), ("base", 1), ("base", 2)])
+
+        self.assertEqual(results[0], 0)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 2)
+
+    def test_batch_failure_reaches_every_request(self):
+        def run_batch(key, requests):
+            del key, requests
+            raise RuntimeError("out of memory")
+
+        batcher = MicroBatcher(run_batch, batch_window_seconds=0.2, max_batch_size=2)
+        results = _submit_concurrently(batcher, [("base", 0), ("base", 1)])
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+
+class _FakeRow:
+    def __init__(self, token_ids: list[int]) -> None:
+        self._token_ids = token_ids
+        self.shape = (len(token_ids),)
+
+    def tolist(self) -> list[int]:
+        return list(self._token_ids)
+
+
+class _FakeInputIds:
+    device = "cpu"
+
+    def __init__(self, rows: int, length: int, token_rows: list[list[int]] | None = None) -> None:
+        if token_rows is None:
+            token_rows = [[1] * length for _ in range(rows)]
+        self._token_rows = token_rows
+        self.shape = (len(token_rows), length)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            rows, column = index
+            return _FakeRow([row[column] for row in self._token_rows[rows]])
+        if isinstance(index, slice):
+            token_rows = self._token_rows[index]
+            return _FakeInputIds(len(token_rows), self.shape[1], token_rows)
+        return _FakeRow(self._token_rows[index])
+
+    def tolist(self) -> list[list[int]]:
+        return [list(row) for row in self._token_rows]
+
+
+_PAD = 0
+_EOS = 2
+
+
+class _BatchModel:
+    """按 transformers 的方式左填充 prompt；某行生成 EOS 后，其后补 pad。"""
+
+    def __init__(
+        self,
+        steps: int,
+        prompt_lengths: list[int] | None = None,
+        output_lengths: list[int] | None = None,
+    ) -> None:
+        self.steps = steps
+        self.prompt_lengths = prompt_lengths
+        self.output_lengths = output_lengths
+        self.batch_sizes: list[int] = []
+
+    def generate(self, rows: int, stopping_criteria=None) -> None:
+        prompt_lengths = self.prompt_lengths or [5] * rows
+        width = max(prompt_lengths)
+        token_rows = [[_PAD] * (width - length) + [5] * length for length in prompt_lengths]
+        stopped = [False] * rows
+        for step in range(1, self.steps + 1):
+            for i, row in enumerate(token_rows):
+                output_length = self.output_lengths[i] if self.output_lengths else None
+                if output_length is None or step < output_length:
+                    row.append(7)
+                elif step == output_length:
+                    row.append(_EOS)
+                else:
+                    row.append(_PAD)
+            input_ids = _FakeInputIds(rows, width + step, token_rows)
+            for criteria in stopping_criteria or []:
+                done = criteria(input_ids, None)
+                stopped = [old or new for old, new in zip(stopped, done)]
+            if all(stopped):
+                break
+
+    def infer_batch(self, tokenizer, requests, **options) -> list[str]:
+        del tokenizer, options
+        self.batch_sizes.append(len(requests))
+        self.generate(len(requests))
+        return [f"text of {request['image_file']}" for request in requests]
+
+
+def _fake_torch() -> types.ModuleType:
+    fake_torch = types.ModuleType("torch")
+    fake_torch.bool = "bool"
+    fake_torch.tensor = lambda data, dtype, device: list(data)
+    return fake_torch
+
+
+class TestBatchInferWithInterruption(unittest.TestCase):
+    def test_stopping_criteria_and_tokens_are_per_request(self):
+        model = preprocess_model(_BatchModel(steps=4))
+        contexts = [
+            ExtractionContext(check_aborted=lambda: False),
+            ExtractionContext(check_aborted=lambda: False, max_output_tokens=2),
+            None,
+        ]
+
+        with patch.dict(sys.modules, {"torch": _fake_torch()}):
+            with BatchInferWithInterruption(model, contexts) as infer:
+                results = infer(
+                    "tokenizer",
+                    requests=[{"image_file": f"{i}.png"} for i in range(3)],
+                )
+
+        self.assertEqual(results[0], "text of 0.png")
+        self.assertIsInstance(results[1], TokenLimitError)
+        self.assertEqual(results[2], "text of 2.png")
+        self.assertEqual((contexts[0].input_tokens, contexts[0].output_tokens), (5, 4))
+        self.assertEqual((contexts[1].input_tokens, contexts[1].output_tokens), (5, 3))
+        self.assertEqual((results[1].input_tokens, results[1].output_tokens), (5, 3))
+
+    def test_padding_and_tokens_after_eos_are_not_counted(self):
+        model = preprocess_model(_BatchModel(steps=4, prompt_lengths=[5, 3], output_lengths=[2, 4]))
+        contexts = [
+            ExtractionContext(check_aborted=lambda: False),
+            ExtractionContext(check_aborted=lambda: False, max_output_tokens=4),
+        ]
+        tokenizer = types.SimpleNamespace(pad_token_id=_PAD, eos_token_id=_EOS)
+
+        with patch.dict(sys.modules, {"torch": _fake_torch()}):
+            with BatchInferWithInterruption(model, contexts, tokenizer=tokenizer) as infer:
+                results = infer(
+                    tokenizer,
+                    requests=[{"image_file": f"{i}.png"} for i in range(2)],
+                )
+
+        self.assertEqual(results, ["text of 0.png", "text of 1.png"])
+        self.assertEqual((contexts[0].input_tokens, contexts[0].output_tokens), (5, 2))
+        self.assertEqual((contexts[1].input_tokens, contexts[1].output_tokens), (3, 4))
+
+
+class _FakeBatchLLM(_FakeLLM):
+    def infer_batch(self, tokenizer, requests, **options) -> list[str]:
+        del tokenizer
+        assert options["base_size"] == 1024
+        self.calls += 1
+        return [f"text of {Path(request['image_file']).name}" for request in requests]
+
+
+class TestHuggingFaceBackendBatching(unittest.TestCase):
+    def test_concurrent_pages_share_one_batched_call(self):
+        modules, llms = _local_runtime_modules(
+            device_count=1,
+            infer_started=threading.Barrier(1),
+            llm_class=_FakeBatchLLM,
+        )
+        results: dict[int, str] = {}
+
+        with patch.dict(sys.modules, modules):
+            sys.modules.pop("doc_page_extractor.model", None)
+            model_module = importlib.import_module("doc_page_extractor.model")
+            try:
+                backend = model_module.DeepSeekOCRHuggingFaceModel(
+                    model_path=None,
+                    local_only=False,
+                    enable_devices_numbers=None,
+                    max_batch_size=3,
+                    batch_window_seconds=5,
+                )
+                backend._cache_dir = lambda: None  # type: ignore[method-assign]
+
+                def generate(index: int, temp_dir: str) -> None:
+                    results[index] = backend.generate(
+                        prompt="prompt",
+                        image_path=Path(temp_dir) / f"{index}.png",
+                        output_path=Path(temp_dir),
+                        size="base",
+                        context=None,
+                        device_number=None,
+                    )
+
+                with TemporaryDirectory() as temp_dir:
+                    threads = [
+                        threading.Thread(target=generate, args=(index, temp_dir))
+                        for index in range(3)
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+            finally:
+                sys.modules.pop("doc_page_extractor.model", None)
+
+        self.assertEqual(results, {i: f"text of {i}.png" for i in range(3)})
+        self.assertEqual(llms[0].calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
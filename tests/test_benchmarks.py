@@ -0,0 +1,32 @@
+import json
+import unittest
+
+from benchmarks.suite import BenchmarkCase, build_cases, build_report, measure
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_quick_cases_run(self):
+        cases = build_cases(quick=True)
+        names = {case.name for case in cases}
+        self.assertIn("extractor.extract_page_results[2 stages]", names)
+        self.assertIn("unlimited.parse_local_layouts", names)
+        for case in cases:
+            with self.subTest(name=case.name, input=case.input):
+                case.run()
+
+    def test_report_is_json_with_latency_percentiles(self):
+        calls = []
+        case = BenchmarkCase("noop", "none", lambda: calls.append(bytearray(4096)))
+        result = measure(case, min_seconds=0, min_iterations=10)
+        report = json.loads(json.dumps(build_report([result])))
+
+        self.assertEqual(len(calls), 12)
+        entry = report["results"][0]
+        self.assertEqual(entry["iterations"], 10)
+        self.assertGreater(entry["ops_per_sec"], 0)
+        self.assertLessEqual(entry["p50_ms"], entry["p99_ms"])
+        self.assertGreaterEqual(entry["peak_memory_bytes"], 4096)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from PIL import Image
+
+from doc_page_extractor import (
+    CachedOCRAdapter,
+    CacheStats,
+    DirectoryResultStore,
+    ExtractionContext,
+    Layout,
+    LayoutKind,
+    MemoryResultStore,
+    OCRPageResult,
+    SQLiteResultStore,
+)
+from doc_page_extractor.extractor import create_page_extractor_with_adapter
+
+
+class _CountingAdapter:
+    allows_multi_stage = True
+    max_image_side = 500
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def download(self, revision: str | None) -> None:
+        del revision
+
+    def load(self) -> None:
+        pass
+
+    def extract_page(
+        self,
+        prompt: str,
+        image_path: Path,
+        output_path: Path,
+        size: str,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        del prompt, output_path, size, device_number
+        assert image_path.exists()
+        self.calls += 1
+        if context is not None:
+            context.output_tokens += 5
+        return OCRPageResult(
+            layouts=[
+                Layout(
+                    det=(10, 20, 110, 220),
+                    text=f"call {self.calls}",
+                    polygon=[(10, 20), (110, 220)],
+                    raw={"score": 0.5},
+                    kind=LayoutKind.TITLE,
+                )
+            ],
+            source="counting",
+            raw_text="<|ref|>title<|/ref|>",
+            raw={"usage": {"completion_tokens": 5}, "upload": {"bytes": 100}},
+            timings={"inference": 1.0},
+        )
+
+
+def _extract(extractor, image, size="base", context=None) -> OCRPageResult:
+    return list(extractor.extract_page_results(image=image, size=size, context=context))[0][1]
+
+
+class TestCachedOCRAdapter(unittest.TestCase):
+    def test_repeated_page_is_served_from_cache(self):
+        adapter = _CountingAdapter()
+        cached = CachedOCRAdapter(adapter, MemoryResultStore())
+        extractor = create_page_extractor_with_adapter(cached)
+        context = ExtractionContext(check_aborted=lambda: False)
+
+        first = _extract(extractor, Image.new("RGB", (1000, 800), "white"), context=context)
+        second = _extract(extractor, Image.new("RGB", (1000, 800), "white"), context=context)
+
+        self.assertEqual(adapter.calls, 1)
+        self.assertEqual(cached.stats, CacheStats(hits=1, misses=1, evictions=0))
+        self.assertEqual(context.output_tokens, 5)
+        # 两次结果都从 adapter 坐标缩放回原图，缓存中保存的是未缩放的输出
+        self.assertEqual(first.layouts[0].det, (20, 40, 220, 440))
+        self.assertEqual(second.layouts, first.layouts)
+        self.assertEqual(second.raw_text, first.raw_text)
+        # 命中的结果标记为缓存命中，不带原始请求的上传记录与耗时
+        self.assertEqual(first.raw, {"usage": {"completion_tokens": 5}, "upload": {"bytes": 100}})
+        self.assertEqual(second.raw, {"usage": {"completion_tokens": 5}, "cache": "hit"})
+        self.assertIn("inference", first.timings)
+        self.assertNotIn("inference", second.timings)
+        self.assertIn("cache", second.timings)
+        self.assertIsNotNone(second.structured)
+
+    def test_key_covers_content_prompt_size_and_revision(self):
+        adapter = _CountingAdapter()
+        store = MemoryResultStore()
+        extractor = create_page_extractor_with_adapter(CachedOCRAdapter(adapter, store))
+
+        _extract(extractor, Image.new("RGB", (100, 100), "white"))
+        _extract(extractor, Image.new("RGB", (100, 100), "black"))
+        _extract(extractor, Image.new("RGB", (100, 100), "white"), size="gundam")
+        revised = create_page_extractor_with_adapter(
+            CachedOCRAdapter(adapter, store, revision="v2")
+        )
+        _extract(revised, Image.new("RGB", (100, 100), "white"))
+
+        self.assertEqual(adapter.calls, 4)
+        self.assertEqual(len(store), 4)
+
+    def test_memory_store_evicts_least_recently_used(self):
+        store = MemoryResultStore(max_entries=2)
+        store.put("a", b"1")
+        store.put("b", b"2")
+        store.get("a")
+        store.put("c", b"3")
+
+        self.assertEqual(store.get("b"), None)
+        self.assertEqual(store.get("a"), b"1")
+        self.assertEqual(store.evictions, 1)
+
+        bounded = MemoryResultStore(max_entries=None, max_bytes=5)
+        bounded.put("a", b"123")
+        bounded.put("b", b"456")
+        self.assertIsNone(bounded.get("a"))
+        self.assertEqual(bounded.evictions, 1)
+
+    def test_sqlite_store_persists_and_evicts(self):
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cache.sqlite3"
+            store = SQLiteResultStore(path, max_entries=2)
+            store.put("a", b"1")
+            time.sleep(0.01)
+            store.put("b", b"2")
+            time.sleep(0.01)
+            store.get("a")
+            time.sleep(0.01)
+            store.put("c", b"3")
+            store.close()
+
+            reopened = SQLiteResultStore(path)
+            self.assertEqual(reopened.get("a"), b"1")
+            self.assertIsNone(reopened.get("b"))
+            self.assertEqual(reopened.get("c"), b"3")
+            self.assertEqual(store.evictions, 1)
+            reopened.close()
+
+    def test_directory_store_shares_results_between_adapters(self):
+        with TemporaryDirectory() as temp_dir:
+            adapter = _CountingAdapter()
+            for _ in range(2):
+                extractor = create_page_extractor_with_adapter(
+                    CachedOCRAdapter(adapter, DirectoryResultStore(temp_dir))
+                )
+                result = _extract(extractor, Image.new("RGB", (100, 100), "white"))
+
+            self.assertEqual(adapter.calls, 1)
+            self.assertEqual(result.layouts[0].kind, LayoutKind.TITLE)
+            self.assertEqual(result.layouts[0].polygon, [(10, 20), (110, 220)])
+
+            time.sleep(0.01)
+            store = DirectoryResultStore(temp_dir, max_entries=1)
+            store.put("ff" + "0" * 62, b"{}")
+            self.assertEqual(store.evictions, 1)
+            self.assertEqual(len(list(Path(temp_dir).glob("*/*.json"))), 1)
+
+    def test_directory_store_tracks_size_without_rescanning(self):
+        with TemporaryDirectory() as temp_dir:
+            store = DirectoryResultStore(temp_dir, max_entries=2, max_bytes=8)
+            keys = [f"{name}{'0' * 63}" for name in "abcd"]
+            store.put(keys[0], b"111")
+            store.put(keys[1], b"222")
+            store.get(keys[0])
+            with patch.object(Path, "glob", side_effect=AssertionError("rescanned")):
+                store.put(keys[2], b"333")
+                store.put(keys[0], b"1")
+
+            self.assertIsNone(store.get(keys[1]))
+            self.assertEqual(store.get(keys[0]), b"1")
+            self.assertEqual(store.get(keys[2]), b"333")
+            self.assertEqual(store.evictions, 1)
+
+            store.put(keys[3], b"44444")
+            self.assertIsNone(store.get(keys[0]))
+            self.assertEqual(store.evictions, 2)
+
+            reopened = DirectoryResultStore(temp_dir, max_bytes=8)
+            reopened.put(keys[1], b"2")
+            self.assertEqual(reopened.evictions, 1)
+            self.assertEqual(len(list(Path(temp_dir).glob("*/*.json"))), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
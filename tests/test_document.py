@@ -0,0 +1,229 @@
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from doc_page_extractor import (
+    AbortError,
+    ExtractionContext,
+    Layout,
+    OCRPageResult,
+    TokenLimitError,
+    extract_document,
+)
+from doc_page_extractor.extractor import create_page_extractor_with_adapter
+
+
+class _Page:
+    def __init__(self, index: int, delay_seconds: float) -> None:
+        self.index = index
+        self.delay_seconds = delay_seconds
+        self.size = (100, 100)
+
+
+class _PageAdapter:
+    allows_multi_stage = False
+
+    def __init__(self, token_limit_page: int | None = None) -> None:
+        self.token_limit_page = token_limit_page
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.output_paths: list[Path] = []
+        self._lock = threading.Lock()
+
+    def download(self, revision: str | None) -> None:
+        del revision
+
+    def load(self) -> None:
+        pass
+
+    def extract_page(self, *args, **kwargs) -> OCRPageResult:
+        raise AssertionError("pages should be passed in memory")
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: _Page,
+        output_path: Path,
+        size: str,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        del prompt, size, device_number
+        assert context is not None
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.output_paths.append(output_path)
+        try:
+            deadline = time.monotonic() + image.delay_seconds
+            while time.monotonic() < deadline:
+                if context.check_aborted():
+                    raise AbortError()
+                time.sleep(0.005)
+            context.input_tokens += 10
+            context.output_tokens += image.index
+            if image.index == self.token_limit_page:
+                raise TokenLimitError()
+            return OCRPageResult(
+                layouts=[Layout(det=(0, 0, 10, 10), text=str(image.index))],
+                source="pages",
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class _GeneratingAdapter(_PageAdapter):
+    """每页逐个生成 tokens 个 token，生成过程中就写入 context，像本地模型的 stopping criteria 一样。"""
+
+    def __init__(self, tokens: int) -> None:
+        super().__init__()
+        self.tokens = tokens
+
+    def extract_page_image(self, prompt, image, output_path, size, context, device_number) -> OCRPageResult:
+        del prompt, image, size, device_number
+        assert context is not None
+        with self._lock:
+            self.output_paths.append(output_path)
+        context.input_tokens += 10
+        for _ in range(self.tokens):
+            time.sleep(0.002)
+            context.output_tokens += 1
+            if context.check_aborted():
+                raise AbortError()
+        return OCRPageResult(layouts=[], source="generating")
+
+
+def _pages(count: int) -> list[_Page]:
+    # 前面的页面更慢，使完成顺序与输入顺序相反
+    return [_Page(index, 0.02 * (count - index)) for index in range(count)]
+
+
+class TestExtractDocument(unittest.TestCase):
+    def test_yields_pages_in_input_order_with_bounded_concurrency(self):
+        adapter = _PageAdapter()
+        context = ExtractionContext(check_aborted=lambda: False)
+
+        results = list(
+            extract_document(
+                create_page_extractor_with_adapter(adapter),
+                _pages(6),
+                size="base",
+                concurrency=3,
+                context=context,
+            )
+        )
+
+        self.assertEqual([index for index, _ in results], list(range(6)))
+        self.assertEqual(
+            [result.layouts[0].text for _, result in results],
+            [str(index) for index in range(6)],
+        )
+        self.assertEqual(adapter.max_in_flight, 3)
+        self.assertEqual(context.input_tokens, 60)
+        self.assertEqual(context.output_tokens, 15)
+
+    def test_completion_order(self):
+        results = list(
+            extract_document(
+                create_page_extractor_with_adapter(_PageAdapter()),
+                _pages(3),
+                size="base",
+                concurrency=3,
+                ordered=False,
+            )
+        )
+
+        self.assertEqual([index for index, _ in results], [2, 1, 0])
+
+    def test_pages_get_their_own_output_directory(self):
+        adapter = _PageAdapter()
+        with TemporaryDirectory() as temp_dir:
+            context = ExtractionContext(
+                check_aborted=lambda: False, output_dir_path=temp_dir
+            )
+            list(
+                extract_document(
+                    create_page_extractor_with_adapter(adapter),
+                    _pages(2),
+                    size="base",
+                    context=context,
+                )
+            )
+
+            self.assertEqual(
+                sorted(path.name for path in adapter.output_paths),
+                ["page-0", "page-1"],
+            )
+            self.assertTrue((Path(temp_dir) / "page-1").is_dir())
+
+    def test_failure_stops_remaining_pages(self):
+        adapter = _PageAdapter(token_limit_page=4)
+        context = ExtractionContext(check_aborted=lambda: False)
+        started_at = time.monotonic()
+
+        with self.assertRaises(TokenLimitError) as raised:
+            for _ in extract_document(
+                create_page_extractor_with_adapter(adapter),
+                [_Page(index, 5.0 if index < 4 else 0.0) for index in range(8)],
+                size="base",
+                concurrency=5,
+                context=context,
+            ):
+                pass
+
+        self.assertLess(time.monotonic() - started_at, 2.0)
+        self.assertEqual(raised.exception.input_tokens, 10)
+        self.assertEqual(raised.exception.output_tokens, 4)
+        self.assertEqual(len(adapter.output_paths), 5)
+
+    def test_concurrent_pages_share_the_token_budget(self):
+        adapter = _GeneratingAdapter(tokens=40)
+        context = ExtractionContext(check_aborted=lambda: False, max_output_tokens=50)
+
+        with self.assertRaises(TokenLimitError) as raised:
+            for _ in extract_document(
+                create_page_extractor_with_adapter(adapter),
+                _pages(8),
+                size="base",
+                concurrency=4,
+                context=context,
+            ):
+                pass
+
+        # 每页单独看都没有超出 50，合计超出后各页最多再多生成一个 token
+        self.assertGreater(raised.exception.output_tokens, 50)
+        self.assertLessEqual(raised.exception.output_tokens, 50 + 4)
+        self.assertEqual(context.output_tokens, raised.exception.output_tokens)
+        self.assertEqual(raised.exception.input_tokens, 10 * len(adapter.output_paths))
+
+    def test_exhausted_budget_stops_pages_before_extraction(self):
+        for limits in ({"max_tokens": 0}, {"max_output_tokens": 5, "output_tokens": 5}):
+            context = ExtractionContext(check_aborted=lambda: False, **limits)
+            adapter = _PageAdapter()
+            with self.subTest(**limits), self.assertRaises(TokenLimitError):
+                for _ in extract_document(
+                    create_page_extractor_with_adapter(adapter),
+                    _pages(3),
+                    size="base",
+                    context=context,
+                ):
+                    pass
+            self.assertEqual(adapter.output_paths, [])
+
+    def test_rejects_non_positive_concurrency(self):
+        with self.assertRaises(ValueError):
+            next(
+                extract_document(
+                    create_page_extractor_with_adapter(_PageAdapter()),
+                    [],
+                    size="base",
+                    concurrency=0,
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import random
 import sys
 import types
 import unittest
@@ -6,8 +7,12 @@ from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from PIL import Image
+
 from doc_page_extractor import ExtractionContext, Layout, OCRPageResult
 from doc_page_extractor.extractor import (
+    _PageStages,
+    _unredacted_box,
     create_deepseek_ocr_page_extractor,
     create_page_extractor_with_adapter,
     create_unlimited_ocr_page_extractor,
@@ -122,6 +127,31 @@ class _MaxSideAdapter:
         )
 
 
+class _ImageAdapter(_MaxSideAdapter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.image: object | None = None
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: object,
+        output_path: Path,
+        size: str,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        self.image = image
+        return self.extract_page(
+            prompt=prompt,
+            image_path=output_path / "unused.png",
+            output_path=output_path,
+            size=size,
+            context=context,
+            device_number=device_number,
+        )
+
+
 class TestExtractor(unittest.TestCase):
     def test_single_stage_adapter_ignores_multi_stage_request(self):
         adapter = _SingleStageAdapter()
@@ -177,6 +207,27 @@ class TestExtractor(unittest.TestCase):
             [(110, 220), (439, 220), (439, 659), (110, 659)],
         )
 
+    def test_image_adapter_receives_live_image_without_png_round_trip(self):
+        adapter = _ImageAdapter()
+        image = _FakeResizableImage()
+        extractor = create_page_extractor_with_adapter(adapter)
+
+        results = list(
+            extractor.extract_page_results(
+                image=image,  # type: ignore[arg-type]
+                size="tiny",
+                stages=1,
+                context=ExtractionContext(check_aborted=lambda: False),
+            )
+        )
+
+        self.assertEqual(image.saved_paths, [])
+        self.assertIsInstance(adapter.image, _FakeResizedImage)
+        assert isinstance(adapter.image, _FakeResizedImage)
+        self.assertEqual(adapter.image.size, (8192, 4096))
+        self.assertEqual(adapter.image.saved_paths, [])
+        self.assertEqual(results[0][1].layouts[0].det, (110, 220, 439, 659))
+
     def test_deepseek_page_extractor_selects_requested_model(self):
         class _DeepSeek1Model:
             def __init__(self, *args, **kwargs) -> None:
@@ -296,5 +347,162 @@ class TestExtractor(unittest.TestCase):
         self.assertEqual(result.layouts[0].det, (10, 10, 50, 20))
 
 
+
+def _nested_loop_redact_button_rectangles(y_cutted, dets):
+    # 单调栈之前的实现：每个区块与其后的全部区块比较，O(n²)
+    parts = []
+    for x1, _, x2, y2 in dets:
+        height = y2 - y_cutted
+        if height > 0:
+            parts.append((x1, x2, height))
+    parts.sort()
+    forbidden = -sys.maxsize
+    for i, (x1, x2, height) in enumerate(parts):
+        left = max(x1, forbidden)
+        right = x2
+        for j in range(i + 1, len(parts)):
+            nx1, _, nheight = parts[j]
+            if nheight > height:
+                right = min(right, nx1)
+        if left < right:
+            yield (left, y_cutted, right, y_cutted + height)
+            forbidden = right
+
+
+def _random_dets(rng: random.Random, count: int, spread: int, y_cutted: int):
+    # spread 越小，x1、宽度与底边重复得越多，覆盖排序与高度相同的分支；
+    # 也包含 2/3 线以上、负坐标、零宽和左右颠倒的框
+    dets = []
+    for _ in range(count):
+        x1 = rng.randint(-spread // 10, spread)
+        width = rng.choice((0, -rng.randint(1, spread // 4 + 1), rng.randint(1, spread // 2 + 1)))
+        y2 = y_cutted + rng.randint(-spread // 5, spread // 2 + 1)
+        dets.append((x1, rng.randint(0, y_cutted), x1 + width, y2))
+    return dets
+
+
+class TestRedactionPlanning(unittest.TestCase):
+    def test_sweep_matches_nested_loop(self):
+        rng = random.Random(20240611)
+        stages = _PageStages()
+        for case in range(600):
+            count = rng.choice((0, 1, 2, 3, 5, 8, 30, 200))
+            spread = rng.choice((3, 10, 100, 2000))
+            y_cutted = rng.choice((0, 100, 1500))
+            dets = _random_dets(rng, count, spread, y_cutted)
+            if case % 7 == 0:
+                dets = [(float(x1) + 0.5, y1, x2 + 0.25, y2 - 0.5) for x1, y1, x2, y2 in dets]
+            with self.subTest(case=case, count=count, spread=spread):
+                self.assertEqual(
+                    list(stages._redact_button_rectangles(y_cutted, dets)),
+                    list(_nested_loop_redact_button_rectangles(y_cutted, dets)),
+                )
+
+    def test_taller_part_cuts_earlier_strip(self):
+        stages = _PageStages()
+        dets = [(0, 0, 100, 120), (50, 0, 150, 160), (60, 0, 90, 110), (200, 0, 260, 105)]
+        self.assertEqual(
+            list(stages._redact_button_rectangles(100, dets)),
+            [(0, 100, 50, 120), (50, 100, 150, 160), (200, 100, 260, 105)],
+        )
+
+
+class _StagedImageAdapter:
+    """每个阶段返回预先给定的版面（坐标相对于收到的图片），并记录收到的图片尺寸。"""
+
+    allows_multi_stage = True
+
+    def __init__(self, *stage_layouts: Layout) -> None:
+        self.stage_layouts = list(stage_layouts)
+        self.sizes: list[tuple[int, int]] = []
+
+    def download(self, revision: str | None) -> None:
+        del revision
+
+    def load(self) -> None:
+        pass
+
+    def extract_page(self, *args, **kwargs) -> OCRPageResult:
+        raise NotImplementedError
+
+    def extract_page_image(
+        self,
+        prompt: str,
+        image: Image.Image,
+        output_path: Path,
+        size: str,
+        context: ExtractionContext | None,
+        device_number: int | None,
+    ) -> OCRPageResult:
+        del prompt, output_path, size, context, device_number
+        self.sizes.append(image.size)
+        layout = self.stage_layouts[len(self.sizes) - 1]
+        return OCRPageResult(
+            layouts=[Layout(det=layout.det, text=layout.text, polygon=layout.polygon)],
+            source="staged",
+        )
+
+
+class TestStageModes(unittest.TestCase):
+    def _extract(self, stage_mode: str, stages: int = 2):
+        # 400x300 的页面 2/3 线在 y=200；第一阶段的区块从左边一直涂到页面底部
+        adapter = _StagedImageAdapter(
+            Layout(det=(0, 210, 100, 300), text="left column"),
+            Layout(det=(5, 10, 50, 40), text="footnote", polygon=[(5, 10), (50, 10), (50, 40), (5, 40)]),
+            Layout(det=(0, 0, 10, 10), text="again"),
+        )
+        extractor = create_page_extractor_with_adapter(adapter, stage_mode=stage_mode)  # type: ignore[arg-type]
+        results = list(
+            extractor.extract_page_results(
+                image=Image.new("RGB", (400, 300), "white"),
+                size="tiny",
+                stages=stages,
+                context=ExtractionContext(check_aborted=lambda: False),
+            )
+        )
+        return adapter, results
+
+    def test_crop_mode_sends_unredacted_region_and_maps_back(self):
+        adapter, results = self._extract("crop")
+        (first_image, _), (second_image, second) = results
+
+        self.assertEqual(adapter.sizes, [(400, 300), (300, 100)])
+        self.assertEqual(first_image.size, (400, 300))
+        self.assertEqual(second_image.size, (400, 300))
+        layout = second.layouts[0]
+        self.assertEqual(layout.det, (105, 210, 150, 240))
+        self.assertEqual(layout.polygon, [(105, 210), (150, 210), (150, 240), (105, 240)])
+        assert second.structured is not None
+        self.assertEqual(second.structured.blocks[0].det, (105, 210, 150, 240))
+        self.assertIn("crop", second.timings)
+
+    def test_redact_mode_sends_full_page(self):
+        adapter, results = self._extract("redact")
+
+        self.assertEqual(adapter.sizes, [(400, 300), (400, 300)])
+        self.assertEqual(results[1][1].layouts[0].det, (5, 10, 50, 40))
+        self.assertNotIn("crop", results[1][1].timings)
+
+    def test_unknown_stage_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            create_page_extractor_with_adapter(_StagedImageAdapter(), stage_mode="shrink")  # type: ignore[arg-type]
+
+    def test_unredacted_box(self):
+        stages = _PageStages()
+        image = SimpleNamespace(size=(400, 300))
+        cases = [
+            ([], (0, 200, 400, 300)),
+            ([(0, 0, 100, 250), (300, 0, 400, 220)], (0, 200, 400, 300)),
+            ([(0, 0, 100, 300), (300, 0, 400, 320)], (100, 200, 300, 300)),
+            ([(-50, 0, 150, 300), (150, 0, 250, 260), (250, 0, 450, 300)], (150, 260, 250, 300)),
+            # 整个下方都被涂抹时没有可裁剪的区域，回退为送入整页
+            ([(0, 0, 400, 300)], None),
+        ]
+        for dets, expected in cases:
+            with self.subTest(dets=dets):
+                rectangles = list(stages._redact_rectangles(image, dets))  # type: ignore[arg-type]
+                self.assertEqual(_unredacted_box(image.size, rectangles), expected)
+
+
 if __name__ == "__main__":
     unittest.main()
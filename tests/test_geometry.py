@@ -0,0 +1,62 @@
+import math
+import random
+import unittest
+
+from doc_page_extractor import Layout, LayoutKind
+from doc_page_extractor.geometry import SpatialIndex, box_contains, box_distance, box_intersects
+
+
+def _random_boxes(rng: random.Random, count: int, width: int, height: int) -> list[tuple[int, int, int, int]]:
+    boxes = []
+    for _ in range(count):
+        x1 = rng.randrange(width)
+        y1 = rng.randrange(height)
+        boxes.append((x1, y1, x1 + rng.randrange(0, width // 4), y1 + rng.randrange(0, height // 20)))
+    return boxes
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_queries_match_linear_scans(self):
+        rng = random.Random(7)
+        # 目录页尺寸与数千个小框
+        boxes = _random_boxes(rng, 3000, 5106, 7750)
+        index = SpatialIndex(boxes)
+        for _ in range(50):
+            query = _random_boxes(rng, 1, 5106, 7750)[0]
+            every = range(len(boxes))
+            self.assertEqual(index.intersecting(query), [i for i in every if box_intersects(boxes[i], query)])
+            self.assertEqual(index.containing(query), [i for i in every if box_contains(boxes[i], query)])
+            self.assertEqual(index.within(query), [i for i in every if box_contains(query, boxes[i])])
+            distances = sorted((box_distance(boxes[i], query), i) for i in every)
+            self.assertEqual(index.nearest(query, k=5), [i for _, i in distances[:5]])
+
+        band = [i for i, box in enumerate(boxes) if box[1] < 1200 and 1000 < box[3]]
+        self.assertEqual(index.strip(1000, 1200), band)
+        column = [i for i, box in enumerate(boxes) if box[0] < 40 and 0 < box[2]]
+        self.assertEqual(index.strip(0, 40, axis="x"), column)
+
+    def test_layouts_points_and_empty_index(self):
+        layouts = [
+            Layout(det=(0, 0, 100, 20), text="a", kind=LayoutKind.TITLE),
+            Layout(det=(0, 30, 100, 200), text="b", kind=LayoutKind.TEXT),
+            Layout(det=(10, 40, 90, 60), text="c", kind=LayoutKind.TEXT),
+        ]
+        index = SpatialIndex.from_layouts(layouts)
+        self.assertEqual(index.containing((20, 45, 30, 50)), [1, 2])
+        self.assertEqual(index.intersecting((0, 20, 100, 30)), [])
+        self.assertEqual(index.nearest((200, 10, 210, 15), k=2), [0, 1])
+
+        points = SpatialIndex([(5, 5, 5, 5), (50, 50, 50, 50)])
+        self.assertEqual(points.within((0, 0, 10, 10)), [0])
+        self.assertEqual(points.nearest((49, 49, 49, 49)), [1])
+        self.assertAlmostEqual(box_distance((0, 0, 0, 0), (3, 4, 5, 5)), 5.0)
+
+        empty = SpatialIndex([])
+        self.assertEqual(empty.intersecting((0, 0, math.inf, math.inf)), [])
+        self.assertEqual(empty.nearest((0, 0, 1, 1)), [])
+        with self.assertRaises(ValueError):
+            SpatialIndex([(0, 0, 1, 1)], cell_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
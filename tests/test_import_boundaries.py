@@ -29,6 +29,7 @@ class TestImportBoundaries(unittest.TestCase):
                 ExtractionAbortedError,
                 TokenLimitError,
                 UnlimitedOCRVendorConfig,
+                create_async_deepseek_ocr_vendor_page_extractor,
                 create_deepseek_ocr_vendor_page_extractor,
                 create_unlimited_ocr_vendor_page_extractor,
             )
@@ -46,6 +47,13 @@ class TestImportBoundaries(unittest.TestCase):
             create_unlimited_ocr_vendor_page_extractor(
                 UnlimitedOCRVendorConfig(ak="ak", sk="sk")
             )
+            create_async_deepseek_ocr_vendor_page_extractor(
+                DeepSeekOCRVendorConfig(
+                    base_url="https://example.test",
+                    api_key="key",
+                    model="deepseek-ocr",
+                )
+            )
             """
         )
         env = os.environ.copy()
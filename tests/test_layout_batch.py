@@ -0,0 +1,97 @@
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from doc_page_extractor import Layout, LayoutBatch, LayoutKind, OCRPageResult
+from doc_page_extractor.extractor import _scale_layout_coordinates
+
+
+def _results() -> list[tuple[int, OCRPageResult]]:
+    def page_result(*layouts: Layout) -> OCRPageResult:
+        return OCRPageResult(layouts=list(layouts), source="test")
+
+    return [
+        (
+            0,
+            page_result(
+                Layout(det=(10, 20, 110, 40), text="标题", type="title", kind=LayoutKind.TITLE),
+                Layout(det=(10, 50, 300, 90), text="", kind=LayoutKind.TEXT),
+            ),
+        ),
+        (1, page_result(Layout(det=(5, 5, 7, 9), text=None, html="<table></table>", kind=LayoutKind.TABLE))),
+        (0, page_result(Layout(det=(0, 0, 3, 3), text="第二阶段", kind=LayoutKind.FOOTNOTE))),
+    ]
+
+
+def _columns(batch: LayoutBatch) -> dict:
+    return {
+        "dets": batch.dets.tolist(),
+        "kinds": [batch.kind(i) for i in range(len(batch))],
+        "pages": batch.pages.tolist(),
+        "stages": batch.stages.tolist(),
+        "types": list(batch.types),
+        "texts": list(batch.texts),
+        "htmls": list(batch.htmls),
+    }
+
+
+class TestLayoutBatch(unittest.TestCase):
+    def test_columns_from_page_results(self):
+        batch = LayoutBatch.from_page_results(_results())
+
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(
+            _columns(batch),
+            {
+                "dets": [[10, 20, 110, 40], [10, 50, 300, 90], [5, 5, 7, 9], [0, 0, 3, 3]],
+                "kinds": [LayoutKind.TITLE, LayoutKind.TEXT, LayoutKind.TABLE, LayoutKind.FOOTNOTE],
+                "pages": [0, 0, 1, 0],
+                "stages": [1, 1, 1, 2],
+                "types": ["title", None, None, None],
+                "texts": ["标题", "", None, "第二阶段"],
+                "htmls": [None, None, "<table></table>", None],
+            },
+        )
+        self.assertEqual(batch.layout(-1), Layout(det=(0, 0, 3, 3), text="第二阶段", kind=LayoutKind.FOOTNOTE))
+        self.assertEqual(LayoutBatch.from_layouts(batch.to_layouts()).texts[:2], ["标题", ""])
+        self.assertEqual(LayoutBatch().dets.tolist(), [])
+
+    def test_scale_matches_per_layout_scaling(self):
+        layouts = [
+            Layout(det=(i, i * 3, i * 7 + 5, i * 11 + 9), text=None, kind=LayoutKind.TEXT) for i in range(200)
+        ]
+        expected = [Layout(det=layout.det, text=None, kind=LayoutKind.TEXT) for layout in layouts]
+        _scale_layout_coordinates(expected, 1.5, 0.75)
+
+        for numpy_module in ([], [None]):
+            with self.subTest(numpy=bool(numpy_module)), patch.dict(sys.modules, {"numpy": None} if numpy_module else {}):
+                batch = LayoutBatch.from_layouts(layouts)
+                batch.scale(1.5, 0.75)
+                self.assertEqual([list(layout.det) for layout in expected], batch.dets.tolist())
+
+    def test_arrow_and_parquet_round_trip(self):
+        try:
+            table = LayoutBatch.from_page_results(_results()).to_arrow()
+        except ImportError as error:
+            self.skipTest(str(error))
+
+        batch = LayoutBatch.from_page_results(_results())
+        self.assertEqual(table.column("kind").to_pylist(), ["title", "text", "table", "footnote"])
+        self.assertEqual(table.column("text").to_pylist(), ["标题", "", None, "第二阶段"])
+        with TemporaryDirectory() as temp_dir:
+            arrow_path = Path(temp_dir) / "layouts.arrow"
+            parquet_path = Path(temp_dir) / "layouts.parquet"
+            batch.write_arrow(arrow_path)
+            batch.write_parquet(parquet_path)
+            for restored in (LayoutBatch.read_arrow(arrow_path), LayoutBatch.read_parquet(parquet_path)):
+                self.assertEqual(_columns(restored), _columns(batch))
+
+        sliced = LayoutBatch.from_arrow(table.slice(1, 2))
+        self.assertEqual(sliced.texts[:], ["", None])
+        self.assertEqual(sliced.dets.tolist(), [[10, 50, 300, 90], [5, 5, 7, 9]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import importlib
+import sys
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from PIL import Image
+
+from doc_page_extractor import (
+    AbortError,
+    ExtractionContext,
+    InMemoryTracer,
+    MetricsRegistry,
+    MetricsTracer,
+    MultiTracer,
+    render_prometheus,
+)
+from doc_page_extractor.adapters.deepseek import DeepSeekOCRVendorAdapter, DeepSeekOCRVendorConfig
+from doc_page_extractor.adapters.unlimited import UnlimitedOCRVendorAdapter, UnlimitedOCRVendorConfig
+from doc_page_extractor.extractor import create_page_extractor_with_adapter
+from stub_vendor_server import StubVendorServer
+from test_scheduler import _local_runtime_modules
+from test_vendor_adapters import _chat_completion, _unlimited_handler
+
+
+class _Gate:
+    # 代替 _FakeLLM 的 infer_started：推理开始后阻塞，直到测试放行
+    def __init__(self) -> None:
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def wait(self, timeout: float) -> None:
+        self.entered.set()
+        self.release.wait(timeout)
+
+
+def _extract(adapter, context: ExtractionContext, stages: int = 1) -> None:
+    extractor = create_page_extractor_with_adapter(adapter)
+    list(
+        extractor.extract_page_results(
+            Image.new("RGB", (400, 300), "white"), size="base", stages=stages, context=context
+        )
+    )
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        pages = registry.counter("pages", "Pages done.", labels=("status",))
+        pages.inc(status="ok")
+        pages.inc(2, status="ok")
+        registry.gauge("queue", 'Queue "depth".').set(3)
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        self.assertIs(registry.counter("pages", "Pages done.", labels=("status",)), pages)
+        self.assertEqual(
+            render_prometheus(registry),
+            "# HELP pages Pages done.\n"
+            "# TYPE pages counter\n"
+            'pages_total{status="ok"} 3\n'
+            '# HELP queue Queue "depth".\n'
+            "# TYPE queue gauge\n"
+            "queue 3\n"
+            "# HELP latency_seconds Latency.\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{le="0.1"} 1\n'
+            'latency_seconds_bucket{le="1"} 2\n'
+            'latency_seconds_bucket{le="+Inf"} 3\n'
+            "latency_seconds_sum 5.55\n"
+            "latency_seconds_count 3\n",
+        )
+
+    def test_rejects_mismatched_labels_and_registrations(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("requests", "Requests.", labels=("status",))
+        with self.assertRaises(ValueError):
+            counter.inc(code="200")
+        with self.assertRaises(ValueError):
+            counter.inc(-1, status="200")
+        with self.assertRaises(ValueError):
+            registry.gauge("requests", "Requests.", labels=("status",))
+
+    def test_export_passes_snapshot_to_callback(self):
+        registry = MetricsRegistry()
+        registry.gauge("depth", "Depth.", labels=("device",)).add_callback(
+            lambda: {("0",): 2, ("1",): 0}
+        )
+        exported = []
+        registry.export(exported.append)
+
+        (families,) = exported
+        self.assertEqual(
+            [(sample.labels, sample.value) for sample in families[0].samples],
+            [({"device": "0"}, 2), ({"device": "1"}, 0)],
+        )
+
+
+class TestMetricsTracer(unittest.TestCase):
+    def test_pages_tokens_http_and_stage_latency(self):
+        registry = MetricsRegistry()
+        spans = InMemoryTracer()
+        context = ExtractionContext(
+            check_aborted=lambda: False, tracer=MultiTracer(MetricsTracer(registry), spans)
+        )
+
+        with StubVendorServer(_chat_completion) as server:
+            config = DeepSeekOCRVendorConfig(
+                base_url=server.base_url, api_key="key", model="deepseek-ocr"
+            )
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                _extract(adapter, context, stages=2)
+
+        tracer = MetricsTracer(registry)
+        self.assertEqual(tracer._pages.value(size="base", status="ok"), 1)
+        self.assertEqual(tracer._input_tokens.value(source="deepseek-ocr-vendor"), 14)
+        self.assertEqual(tracer._output_tokens.value(source="deepseek-ocr-vendor"), 6)
+        self.assertEqual(tracer._http_requests.value(method="POST", status="200"), 2)
+        self.assertEqual(tracer._span_seconds.count(span="redact"), 1)
+        self.assertEqual(tracer._span_seconds.count(span="parse"), 2)
+        self.assertTrue(spans.find("page"))
+
+    def test_counts_aborted_pages(self):
+        registry = MetricsRegistry()
+        context = ExtractionContext(check_aborted=lambda: True, tracer=MetricsTracer(registry))
+        config = UnlimitedOCRVendorConfig(ak="ak", sk="sk", base_url="http://127.0.0.1:9")
+        with UnlimitedOCRVendorAdapter(config) as adapter, self.assertRaises(AbortError):
+            _extract(adapter, context)
+
+        text = render_prometheus(registry)
+        self.assertIn('doc_page_extractor_pages_total{size="base",status="error"} 1', text)
+        self.assertIn('doc_page_extractor_aborts_total{reason="AbortError"} 1', text)
+
+    def test_counts_unlimited_task_polls(self):
+        registry = MetricsRegistry()
+        context = ExtractionContext(check_aborted=lambda: False, tracer=MetricsTracer(registry))
+        server_url: list[str] = []
+
+        with StubVendorServer(_unlimited_handler(server_url)) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, poll_interval_seconds=0
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                _extract(adapter, context)
+
+        text = render_prometheus(registry)
+        self.assertIn('doc_page_extractor_task_polls_total{done="true"} 1', text)
+        self.assertIn('doc_page_extractor_http_requests_total{method="POST",status="200"} 3', text)
+        self.assertIn('doc_page_extractor_http_requests_total{method="GET",status="200"} 1', text)
+
+
+class TestDeviceMetrics(unittest.TestCase):
+    def test_in_flight_gauge_reads_scheduler(self):
+        registry = MetricsRegistry()
+        gate = _Gate()
+        modules, _ = _local_runtime_modules(device_count=2, infer_started=gate)  # type: ignore[arg-type]
+        with patch.dict(sys.modules, modules):
+            sys.modules.pop("doc_page_extractor.model", None)
+            model_module = importlib.import_module("doc_page_extractor.model")
+            try:
+                backend = model_module.DeepSeekOCRHuggingFaceModel(
+                    model_path=None, local_only=False, enable_devices_numbers=None, metrics=registry
+                )
+                backend._cache_dir = lambda: None  # type: ignore[method-assign]
+                self.assertNotIn("device_in_flight{", render_prometheus(registry))
+                with TemporaryDirectory() as temp_dir:
+                    thread = threading.Thread(
+                        target=backend.generate,
+                        kwargs={
+                            "prompt": "prompt",
+                            "image_path": Path(temp_dir) / "page.png",
+                            "output_path": Path(temp_dir),
+                            "size": "base",
+                            "context": None,
+                            "device_number": 1,
+                        },
+                    )
+                    thread.start()
+                    self.assertTrue(gate.entered.wait(timeout=5))
+                    during = render_prometheus(registry)
+                    gate.release.set()
+                    thread.join()
+                after = render_prometheus(registry)
+            finally:
+                sys.modules.pop("doc_page_extractor.model", None)
+
+        device = 'doc_page_extractor_device_in_flight{model="deepseek-ai/DeepSeek-OCR",device="1"}'
+        self.assertIn(f"{device} 1", during)
+        self.assertIn(f"{device} 0", after)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,95 @@
+import random
+import re
 import unittest
-from doc_page_extractor.parser import parse_ocr_response, ParsedItemKind
+from doc_page_extractor.parser import (
+    IncrementalLineBlockParser,
+    IncrementalOCRParser,
+    ParsedItemKind,
+    parse_ocr_response,
+)
+
+# 改为单遍分词器之前的正则实现，作为等价性测试的参照
+_LEGACY_TAG_PATTERN = re.compile(r"<\|(det|ref)\|>(.+?)<\|/\1\|>")
+_LEGACY_COORDS_PATTERN = re.compile(r"\[\[(\d+),\s*(\d+),\s*(\d+),\s*(\d+)\]\]")
+_LEGACY_LINE_BLOCK_PATTERN = re.compile(
+    r"^(?P<ref>[A-Za-z_]+)\[\[(?P<x1>\d+),\s*(?P<y1>\d+),\s*(?P<x2>\d+),\s*(?P<y2>\d+)\]\]\s*$",
+    re.MULTILINE,
+)
+
+
+def _legacy_parse(response, width, height):
+    items = []
+    last_end = 0
+    for matched in _LEGACY_TAG_PATTERN.finditer(response):
+        if matched.start() > last_end:
+            items.append((ParsedItemKind.TEXT, response[last_end : matched.start()]))
+        if matched.group(1) == "ref":
+            items.append((ParsedItemKind.REF, matched.group(2)))
+        else:
+            coords = _LEGACY_COORDS_PATTERN.search(matched.group(2))
+            if coords:
+                x1, y1, x2, y2 = [int(c) for c in coords.groups()]
+                items.append(
+                    (
+                        ParsedItemKind.DET,
+                        (
+                            round(x1 / 1000 * width),
+                            round(y1 / 1000 * height),
+                            round(x2 / 1000 * width),
+                            round(y2 / 1000 * height),
+                        ),
+                    )
+                )
+        last_end = matched.end()
+    if last_end < len(response):
+        items.append((ParsedItemKind.TEXT, response[last_end:]))
+    return items
+
+
+def _legacy_line_blocks(response, width, height):
+    if not _LEGACY_LINE_BLOCK_PATTERN.search(response):
+        return None
+    blocks = []
+    ref, det, parts = None, None, []
+    for line in response.splitlines() + [None]:
+        matched = _LEGACY_LINE_BLOCK_PATTERN.match(line) if line is not None else None
+        if line is None or matched:
+            if ref is not None and det is not None:
+                blocks.append((ref, det, "\n".join(parts).strip("\n") or None))
+            ref, det, parts = None, None, []
+            if matched:
+                ref = matched.group("ref")
+                x1, y1, x2, y2 = [int(v) for v in matched.group("x1", "y1", "x2", "y2")]
+                det = (
+                    round(x1 / 1000 * width),
+                    round(y1 / 1000 * height),
+                    round(x2 / 1000 * width),
+                    round(y2 / 1000 * height),
+                )
+        elif ref is not None:
+            parts.append(line)
+    return blocks
+
+
+_PIECES = [
+    "<|ref|>", "<|/ref|>", "<|det|>", "<|/det|>", "[[1, 2, 3, 4]]", "[[10,20,30,40]]",
+    "[[ 1, 2, 3, 4]]", "[[1,\n 2, 3, 4]]", "[[1,\r2,\t3, 4]]", "[[1, 2, 3]]", "[[١, 2, 3, 4]]", "text", "title", "表格", "\n",
+    "\r\n", "\r", "\x0b", " ", "<|", "|>", "]]", "[[",
+]
+
+
+def _random_response(rng: random.Random) -> str:
+    return "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, 40)))
+
+
+def _random_chunks(text: str, rng: random.Random) -> list[str]:
+    chunks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 9)
+        chunks.append(text[position : position + size])
+        position += size
+    return chunks
 
 
 class TestParseOCRResponse(unittest.TestCase):
@@ -136,5 +226,47 @@ class TestParseOCRResponse(unittest.TestCase):
         self.assertEqual(results[0][1], "包含特殊字符!@#$%和中文")
 
 
+
+class TestSinglePassTokenizer(unittest.TestCase):
+    def test_matches_legacy_regex_parser(self):
+        rng = random.Random(15)
+        for _ in range(3000):
+            response = _random_response(rng)
+            expected = _legacy_parse(response, 1000, 800)
+            self.assertEqual(list(parse_ocr_response(response, 1000, 800)), expected, response)
+
+            parser = IncrementalOCRParser(1000, 800)
+            items = []
+            for chunk in _random_chunks(response, rng):
+                items.extend(parser.feed(chunk))
+            items.extend(parser.close())
+            self.assertEqual(items, expected, response)
+
+    def test_line_blocks_match_legacy_parser(self):
+        rng = random.Random(16)
+        pieces = _PIECES + ["text[[1, 2, 3, 4]]", "table[[5,6,700,800]]  ", "\n\n"]
+        for _ in range(3000):
+            response = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            expected = _legacy_line_blocks(response, 1000, 800)
+
+            parser = IncrementalLineBlockParser(1000, 800)
+            blocks = []
+            for chunk in _random_chunks(response, rng):
+                blocks.extend(parser.feed(chunk))
+            blocks.extend(parser.close())
+
+            self.assertEqual(parser.detected, expected is not None, response)
+            self.assertEqual(blocks, expected or [], response)
+
+    def test_line_blocks_are_emitted_when_the_next_block_starts(self):
+        parser = IncrementalLineBlockParser(1000, 1000)
+
+        self.assertEqual(parser.feed("title[[1, 2, 3, 4]]\n# Title\n"), [])
+        self.assertEqual(
+            parser.feed("text[[5, 6, 7, 8]]\nbody"), [("title", (1, 2, 3, 4), "# Title")]
+        )
+        self.assertEqual(parser.close(), [("text", (5, 6, 7, 8), "body")])
+
+
 if __name__ == '__main__':
     unittest.main()
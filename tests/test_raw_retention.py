@@ -0,0 +1,124 @@
+import dataclasses
+import pickle
+import unittest
+
+from PIL import Image
+
+from doc_page_extractor import Layout, LazyRaw, PageBlock, StructuredPage, UnlimitedOCRVendorConfig
+from doc_page_extractor.adapters.unlimited import (
+    UnlimitedOCRVendorAdapter,
+    parse_unlimited_ocr_layouts,
+    parse_unlimited_ocr_local_layouts,
+)
+from doc_page_extractor.cache import decode_page_result, encode_page_result
+from doc_page_extractor.types import LayoutKind, OCRPageResult
+from stub_vendor_server import StubVendorServer
+from test_vendor_adapters import _unlimited_handler
+
+
+def _parse_result() -> dict:
+    return {
+        "pages": [
+            {
+                "layouts": [
+                    {
+                        "text": "标题",
+                        "position": [10, 10, 100, 20],
+                        "type": "title",
+                        "layout_id": "l-1",
+                    },
+                    {
+                        "text": "正文",
+                        "polygon": [[10, 40], [110, 40], [110, 80], [10, 80]],
+                        "type": "text",
+                        "table_html": "",
+                    },
+                    {"text": "无坐标", "type": "text"},
+                ]
+            }
+        ]
+    }
+
+
+class _StubImage:
+    size = (999, 999)
+
+
+class TestSlottedTypes(unittest.TestCase):
+    def test_types_have_no_instance_dict(self):
+        layout = Layout(det=(0, 0, 10, 10), text="a", kind=LayoutKind.TEXT)
+        block = PageBlock(kind=LayoutKind.TEXT, det=layout.det, layouts=[layout])
+        page = StructuredPage(blocks=[block])
+        for value in (layout, block, page):
+            self.assertFalse(hasattr(value, "__dict__"))
+        with self.assertRaises(AttributeError):
+            layout.extra = 1  # type: ignore[attr-defined]
+
+        moved = dataclasses.replace(layout, det=(1, 1, 11, 11))
+        self.assertEqual(moved.text, "a")
+        self.assertEqual(pickle.loads(pickle.dumps(page)), page)
+
+
+class TestRawRetention(unittest.TestCase):
+    def test_vendor_modes(self):
+        parse_result = _parse_result()
+        keep = parse_unlimited_ocr_layouts(parse_result)
+        self.assertIs(keep[0].raw, parse_result["pages"][0]["layouts"][0])
+
+        trim = parse_unlimited_ocr_layouts(parse_result, raw_retention="trim")
+        self.assertEqual([layout.raw for layout in trim], [{"layout_id": "l-1"}, None])
+
+        drop = parse_unlimited_ocr_layouts(parse_result, raw_retention="drop")
+        self.assertEqual([layout.raw for layout in drop], [None, None])
+        self.assertEqual([layout.det for layout in drop], [layout.det for layout in keep])
+
+        with self.assertRaises(ValueError):
+            parse_unlimited_ocr_layouts(parse_result, raw_retention="zip")  # type: ignore[arg-type]
+
+    def test_lazy_raw_decodes_on_first_access(self):
+        parse_result = _parse_result()
+        lazy = parse_unlimited_ocr_layouts(parse_result, raw_retention="lazy")
+        parse_result["pages"][0]["layouts"][0]["text"] = "修改后"
+
+        first, second = (layout.raw for layout in lazy)
+        self.assertIsInstance(first, LazyRaw)
+        self.assertFalse(first.loaded)
+        self.assertEqual(first["text"], "标题")
+        self.assertTrue(first.loaded)
+        self.assertEqual(second, parse_unlimited_ocr_layouts(_parse_result())[1].raw)
+        self.assertEqual(pickle.loads(pickle.dumps(first)), first)
+
+        page_result = OCRPageResult(layouts=lazy, source="unlimited-ocr-vendor")
+        restored = decode_page_result(encode_page_result(page_result))
+        self.assertEqual(restored.layouts[0].raw["layout_id"], "l-1")
+
+    def test_local_trim_keeps_coordinates(self):
+        response = "<|det|>title [[100, 100, 500, 200], [600, 100, 900, 200]]<|/det|>Chapter"
+        layouts = parse_unlimited_ocr_local_layouts(_StubImage(), response, raw_retention="trim")
+        coords = " [[100, 100, 500, 200], [600, 100, 900, 200]]"
+        self.assertEqual([layout.raw for layout in layouts], [{"coords": coords}] * 2)
+
+    def test_vendor_config_applies_to_page_results(self):
+        server_url: list[str] = []
+        with StubVendorServer(_unlimited_handler(server_url)) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, poll_interval_seconds=0, raw_retention="drop"
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                result = adapter.extract_page_image(
+                    prompt="prompt",
+                    image=Image.new("RGB", (100, 100), "white"),
+                    output_path=None,  # type: ignore[arg-type]
+                    size="base",
+                    context=None,
+                    device_number=None,
+                )
+
+        self.assertTrue(result.layouts)
+        self.assertTrue(all(layout.raw is None for layout in result.layouts))
+        self.assertIn("task_id", result.raw)
+
+
+if __name__ == "__main__":
+    unittest.main()
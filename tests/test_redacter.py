@@ -0,0 +1,95 @@
+import random
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from doc_page_extractor.redacter import background_color
+
+_IMAGES_DIR = Path(__file__).parent / "images"
+
+
+def _reference_background_color(image: Image.Image) -> tuple[int, int, int]:
+    # 逐像素的原始实现，用于校验批量实现的结果
+    buckets: list[list[float]] = [[0.0, 0.0, 0.0, 0.0, 0] for _ in range(256)]
+    data = image.convert("RGBA").tobytes()
+    for i in range(0, len(data), 4):
+        r, g, b, a = data[i:i + 4]
+        r, g, b, a = r / 255.0, g / 255.0, b / 255.0, a / 255.0
+        gray = round(255 * (0.299 * r + 0.587 * g + 0.114 * b) * a)
+        bucket = buckets[gray]
+        bucket[0] += r
+        bucket[1] += g
+        bucket[2] += b
+        bucket[3] += a
+        bucket[4] += 1
+
+    offset = 0
+    for bucket in buckets:
+        offset += bucket[4]
+        if offset > image.width * image.height // 2:
+            break
+    count = bucket[4]
+    r, g, b, a = (value / count for value in bucket[:4])
+    return (
+        round((r * a + 1.0 - a) * 255),
+        round((g * a + 1.0 - a) * 255),
+        round((b * a + 1.0 - a) * 255),
+    )
+
+
+def _paper_image(mode: str, size: tuple[int, int], seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    paper = (236, 228, 205, 255)
+    ink = (30, 30, 40, 255)
+    bands = len(mode)
+    data = bytearray()
+    for _ in range(size[0] * size[1]):
+        color = ink if rng.random() < 0.15 else paper
+        if mode in ("L", "LA"):
+            gray = round(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])
+            pixel = [gray + rng.randint(-3, 3), color[3]]
+        else:
+            pixel = [channel + rng.randint(-3, 3) for channel in color[:3]] + [color[3]]
+        if mode.endswith("A"):
+            pixel[-1] = 255 if rng.random() < 0.7 else rng.randint(0, 255)
+            data.extend(pixel[:bands - 1] + pixel[-1:])
+        else:
+            data.extend(pixel[:bands])
+    return Image.frombytes(mode, size, bytes(data))
+
+
+class TestBackgroundColor(unittest.TestCase):
+    def test_matches_reference_on_image_corpus(self):
+        for path in sorted(_IMAGES_DIR.glob("*.png")):
+            with Image.open(path) as image:
+                image.thumbnail((240, 240))
+                with self.subTest(image=path.name):
+                    self.assertEqual(
+                        background_color(image),
+                        _reference_background_color(image),
+                    )
+
+    def test_matches_reference_for_supported_modes(self):
+        for seed, mode in enumerate(("L", "LA", "RGB", "RGBA")):
+            image = _paper_image(mode, (64, 48), seed)
+            with self.subTest(mode=mode):
+                self.assertEqual(
+                    background_color(image),
+                    _reference_background_color(image),
+                )
+
+    def test_downsampling_keeps_paper_color(self):
+        image = _paper_image("RGB", (400, 300), seed=7)
+
+        color = background_color(image, max_pixels=10_000)
+
+        for channel, expected in zip(color, background_color(image)):
+            self.assertLessEqual(abs(channel - expected), 2)
+
+    def test_empty_image_is_white(self):
+        self.assertEqual(background_color(Image.new("RGB", (0, 0))), (255, 255, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
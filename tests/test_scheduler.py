@@ -0,0 +1,181 @@
+import importlib
+import sys
+import threading
+import types
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from doc_page_extractor import DeviceScheduler
+
+
+class TestDeviceScheduler(unittest.TestCase):
+    def test_assigns_least_loaded_device(self):
+        scheduler = DeviceScheduler([2, 0, 1])
+
+        with scheduler.acquire() as first, scheduler.acquire() as second:
+            with scheduler.acquire() as third:
+                self.assertEqual((first, second, third), (0, 1, 2))
+                self.assertEqual(scheduler.queue_depths(), {0: 1, 1: 1, 2: 1})
+            with scheduler.acquire() as fourth:
+                self.assertEqual(fourth, 2)
+
+        self.assertEqual(scheduler.queue_depths(), {0: 0, 1: 0, 2: 0})
+
+    def test_sequential_calls_rotate_across_devices(self):
+        scheduler = DeviceScheduler([0, 1])
+        assigned = []
+        for _ in range(4):
+            with scheduler.acquire() as device_number:
+                assigned.append(device_number)
+
+        self.assertEqual(assigned, [0, 1, 0, 1])
+
+    def test_explicit_device_is_counted(self):
+        scheduler = DeviceScheduler([0, 1])
+
+        with scheduler.acquire(0):
+            with scheduler.acquire() as device_number:
+                self.assertEqual(device_number, 1)
+
+        with self.assertRaisesRegex(ValueError, "not enabled"):
+            with scheduler.acquire(3):
+                pass
+
+    def test_requires_devices(self):
+        with self.assertRaises(ValueError):
+            DeviceScheduler([])
+
+
+class _FakeLLM:
+    def __init__(self, infer_started: threading.Barrier) -> None:
+        self.device_number: int | None = None
+        self.infer_started = infer_started
+        self.calls = 0
+
+    def to(self, dtype):
+        del dtype
+        return self
+
+    def cuda(self, device_number: int):
+        self.device_number = device_number
+        return self
+
+    def generate(self, *args, **kwargs):
+        del args, kwargs
+
+    def infer(self, tokenizer, **kwargs) -> str:
+        del tokenizer, kwargs
+        self.calls += 1
+        # 所有页面都进入推理后才返回，确保分配时各设备的在途数真实存在
+        self.infer_started.wait(timeout=5)
+        return f"device {self.device_number}"
+
+
+class _FakeRWLock:
+    @contextmanager
+    def gen_rlock(self):
+        yield
+
+    @contextmanager
+    def gen_wlock(self):
+        yield
+
+
+def _local_runtime_modules(
+    device_count: int,
+    infer_started: threading.Barrier,
+    llm_class: type[_FakeLLM] = _FakeLLM,
+):
+    llms: list[_FakeLLM] = []
+
+    def from_pretrained(**kwargs):
+        del kwargs
+        llm = llm_class(infer_started)
+        llms.append(llm)
+        return llm
+
+    torch = types.ModuleType("torch")
+    torch.bfloat16 = "bfloat16"
+    torch.cuda = SimpleNamespace(
+        is_available=lambda: True,
+        device_count=lambda: device_count,
+    )
+    transformers = types.ModuleType("transformers")
+    transformers.AutoModel = SimpleNamespace(from_pretrained=from_pretrained)
+    transformers.AutoTokenizer = SimpleNamespace(from_pretrained=lambda **kwargs: "tokenizer")
+    huggingface_hub = types.ModuleType("huggingface_hub")
+    huggingface_hub.snapshot_download = lambda **kwargs: None
+    hf_constants = types.ModuleType("huggingface_hub.constants")
+    huggingface_hub.constants = hf_constants
+    readerwriterlock = types.ModuleType("readerwriterlock")
+    readerwriterlock.rwlock = SimpleNamespace(RWLockFair=_FakeRWLock)
+
+    modules = {
+        "torch": torch,
+        "transformers": transformers,
+        "huggingface_hub": huggingface_hub,
+        "huggingface_hub.constants": hf_constants,
+        "readerwriterlock": readerwriterlock,
+    }
+    return modules, llms
+
+
+class TestHuggingFaceBackendScheduling(unittest.TestCase):
+    def _generate_pages(self, pages: int, enable_devices_numbers, device_count: int = 3):
+        infer_started = threading.Barrier(pages)
+        modules, llms = _local_runtime_modules(device_count, infer_started)
+        with patch.dict(sys.modules, modules):
+            sys.modules.pop("doc_page_extractor.model", None)
+            model_module = importlib.import_module("doc_page_extractor.model")
+            try:
+                backend = model_module.DeepSeekOCRHuggingFaceModel(
+                    model_path=None,
+                    local_only=False,
+                    enable_devices_numbers=enable_devices_numbers,
+                )
+                backend._cache_dir = lambda: None  # type: ignore[method-assign]
+                with TemporaryDirectory() as temp_dir:
+                    threads = [
+                        threading.Thread(
+                            target=backend.generate,
+                            kwargs={
+                                "prompt": "prompt",
+                                "image_path": Path(temp_dir) / "page.png",
+                                "output_path": Path(temp_dir),
+                                "size": "base",
+                                "context": None,
+                                "device_number": None,
+                            },
+                        )
+                        for _ in range(pages)
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                depths = backend.device_queue_depths()
+            finally:
+                sys.modules.pop("doc_page_extractor.model", None)
+        return llms, depths
+
+    def test_pages_spread_across_replicas(self):
+        llms, depths = self._generate_pages(pages=6, enable_devices_numbers=None)
+
+        self.assertEqual([llm.device_number for llm in llms], [0, 1, 2])
+        self.assertEqual([llm.calls for llm in llms], [2, 2, 2])
+        self.assertEqual(depths, {0: 0, 1: 0, 2: 0})
+
+    def test_only_enabled_devices_are_scheduled(self):
+        llms, depths = self._generate_pages(pages=4, enable_devices_numbers=[2, 0])
+
+        self.assertEqual([llm.device_number for llm in llms], [0, 2])
+        self.assertEqual([llm.calls for llm in llms], [2, 2])
+        self.assertEqual(depths, {0: 0, 2: 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
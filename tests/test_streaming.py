@@ -0,0 +1,315 @@
+import importlib
+import random
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from PIL import Image
+
+from doc_page_extractor import ExtractionContext
+from doc_page_extractor.adapters import (
+    parse_deepseek_ocr2_layouts,
+    parse_deepseek_ocr_layouts,
+    stream_deepseek_ocr2_layouts,
+    stream_deepseek_ocr_layouts,
+)
+from doc_page_extractor.adapters.deepseek import _DeepSeekLocalAdapter
+from doc_page_extractor.extractor import _PageExtractorImpls
+from doc_page_extractor.injection import TextStreamer
+from doc_page_extractor.parser import IncrementalOCRParser, parse_ocr_response
+from test_batching import _FakeInputIds
+from test_scheduler import _FakeLLM, _local_runtime_modules
+
+_RESPONSE = (
+    "<|ref|>title<|/ref|><|det|>[[10, 20, 500, 80]]<|/det|>\n# 标题\n\n"
+    "<|ref|>text<|/ref|><|det|>[[10, 100, 900, 300]]<|/det|>\n第一段，包含 <|ref 伪标签。\n\n"
+    "<|ref|>table<|/ref|><|det|>[[10, 320, 900, 600]]<|/det|>\n<table><tr><td>1</td></tr></table>\n\n"
+    "<|det|>未闭合<|ref|>image<|/ref|><|det|>[[0, 0, 0, 0]]<|/det|>\n"
+    "<|ref|>text<|/ref|><|det|>[[10, 700, 900, 990]]<|/det|>\n结尾"
+)
+
+_EDGE_CASES = [
+    "",
+    "只有文本",
+    "<|ref|>a<|/ref|>",
+    "<|ref|>a<|det|>b<|/det|><|/ref|>",
+    "<|ref|>a\n<|det|>[[1, 2, 3, 4]]<|/det|>",
+    "<|det|>[[1, 2, 3, 4]]<|/det|><|det|>[[5, 6, 7, 8]]<|/det|>text",
+    "<|ref|><|/ref|><|ref|>x<|/ref|>",
+    "<|det|>no coords<|/det|>tail<|ref|>",
+    "<|ref|>a<|/det|>b<|/ref|>",
+]
+
+
+def _chunked(text: str, rng: random.Random) -> list[str]:
+    chunks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 12)
+        chunks.append(text[position : position + size])
+        position += size
+    return chunks
+
+
+def _parse_incrementally(chunks: list[str], width: int, height: int) -> list:
+    parser = IncrementalOCRParser(width, height)
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items
+
+
+class TestIncrementalOCRParser(unittest.TestCase):
+    def test_matches_batch_parser_for_any_chunking(self):
+        rng = random.Random(7)
+        for response in [_RESPONSE, *_EDGE_CASES]:
+            expected = list(parse_ocr_response(response, 1000, 800))
+            for _ in range(50):
+                with self.subTest(response=response):
+                    chunks = _chunked(response, rng)
+                    self.assertEqual(_parse_incrementally(chunks, 1000, 800), expected)
+            self.assertEqual(_parse_incrementally(list(response), 1000, 800), expected)
+
+    def test_tags_are_emitted_before_the_line_ends(self):
+        parser = IncrementalOCRParser(1000, 1000)
+
+        self.assertEqual(list(parser.feed("<|ref|>title<|/re")), [])
+        items = list(parser.feed("f|><|det|>[[1, 2, 3, 4]]<|/det|>"))
+
+        self.assertEqual([content for _, content in items], ["title", (1, 2, 3, 4)])
+
+
+class TestStreamDeepSeekLayouts(unittest.TestCase):
+    def test_streamed_layouts_match_batch_layouts(self):
+        image = Image.new("RGB", (1000, 800), "white")
+        expected = parse_deepseek_ocr_layouts(image, _RESPONSE, "deepseek-ocr")
+        chunks = _chunked(_RESPONSE, random.Random(3))
+
+        layouts = list(stream_deepseek_ocr_layouts(image, iter(chunks), "deepseek-ocr"))
+
+        self.assertEqual(layouts, expected)
+
+    def test_first_layout_arrives_before_generation_finishes(self):
+        image = Image.new("RGB", (1000, 800), "white")
+        consumed = 0
+
+        def chunks():
+            nonlocal consumed
+            for chunk in _chunked(_RESPONSE, random.Random(5)):
+                consumed += len(chunk)
+                yield chunk
+
+        first = next(iter(stream_deepseek_ocr_layouts(image, chunks())))
+
+        self.assertEqual(first.text, "\n# 标题\n\n")
+        self.assertLess(consumed, len(_RESPONSE) // 2)
+
+    def test_ocr2_line_blocks_stream_and_tag_format_falls_back(self):
+        image = Image.new("RGB", (1000, 800), "white")
+        line_blocks = "".join(
+            f"text[[10, {i * 10}, 900, {i * 10 + 8}]]\n第 {i} 段\n\n" for i in range(1, 50)
+        )
+        consumed = 0
+
+        def chunks(response: str):
+            nonlocal consumed
+            for chunk in _chunked(response, random.Random(9)):
+                consumed += len(chunk)
+                yield chunk
+
+        stream = stream_deepseek_ocr2_layouts(image, chunks(line_blocks))
+        self.assertEqual(next(stream).text, "第 1 段")
+        self.assertLess(consumed, len(line_blocks) // 10)
+        self.assertEqual(
+            [next(stream)] + list(stream),
+            parse_deepseek_ocr2_layouts(image, line_blocks, "deepseek-ocr2")[1:],
+        )
+
+        self.assertEqual(
+            list(stream_deepseek_ocr2_layouts(image, chunks(_RESPONSE))),
+            parse_deepseek_ocr2_layouts(image, _RESPONSE, "deepseek-ocr2"),
+        )
+
+
+class _StreamingModel:
+    def __init__(self, response: str) -> None:
+        self.response = response
+
+    def download(self, revision: str | None) -> None:
+        del revision
+
+    def load(self) -> None:
+        pass
+
+    def generate(self, **kwargs) -> str:
+        del kwargs
+        return self.response
+
+    def generate_stream(self, **kwargs):
+        assert kwargs["image_path"].exists()
+        yield from _chunked(self.response, random.Random(11))
+
+
+class TestPageExtractorStreaming(unittest.TestCase):
+    def test_layouts_are_scaled_back_to_the_original_image(self):
+        adapter = _DeepSeekLocalAdapter(_StreamingModel(_RESPONSE))
+        adapter.max_image_side = 500  # type: ignore[attr-defined]
+        extractor = _PageExtractorImpls(adapter)
+        image = Image.new("RGB", (1000, 800), "white")
+
+        streamed = list(extractor.stream_page_layouts(image, size="base"))
+        _, page_result = next(extractor.extract_page_results(image, size="base"))
+
+        self.assertEqual(streamed, page_result.layouts)
+        self.assertEqual(streamed[0].det, (10, 16, 500, 64))
+
+    def test_adapters_without_streaming_are_rejected(self):
+        class _PlainAdapter:
+            allows_multi_stage = True
+
+            def download(self, revision):
+                del revision
+
+            def load(self):
+                pass
+
+            def extract_page(self, **kwargs):
+                del kwargs
+
+        extractor = _PageExtractorImpls(_PlainAdapter())
+        with self.assertRaises(TypeError):
+            next(extractor.stream_page_layouts(Image.new("RGB", (10, 10)), size="base"))
+
+
+class _FakeTokenizer:
+    eos_token_id = 0
+    _PIECES = {1: "<|ref|>", 2: "text", 3: "<|/ref|>", 4: "\n", 5: "中", 6: "文"}
+
+    def decode(self, token_ids: list[int], skip_special_tokens: bool) -> str:
+        assert not skip_special_tokens
+        text = ""
+        for index, token_id in enumerate(token_ids):
+            if token_id == 7:
+                # 多字节字符被拆成两个 token，只解码到一半时得到替换字符
+                is_last = index == len(token_ids) - 1
+                text += "�" if is_last else ""
+            elif token_id == 8:
+                text += "字"
+            else:
+                text += self._PIECES[token_id]
+        return text
+
+
+class _FakeTensor:
+    def __init__(self, rows: list[list[int]]) -> None:
+        self.rows = rows
+
+    def tolist(self) -> list[list[int]]:
+        return self.rows
+
+
+class TestTextStreamer(unittest.TestCase):
+    def test_emits_only_new_complete_text(self):
+        emitted: list[str] = []
+        streamer = TextStreamer(_FakeTokenizer(), emitted.append)
+
+        streamer.put(_FakeTensor([[9, 9, 9]]))
+        for token_id in [1, 2, 3, 4, 5, 7, 8, 6, 0]:
+            streamer.put(_FakeTensor([token_id]))
+        streamer.end()
+
+        self.assertEqual("".join(emitted), "<|ref|>text<|/ref|>\n中字文")
+        self.assertNotIn("�", "".join(emitted))
+
+
+class _StreamingLLM(_FakeLLM):
+    hold_after_first_line = False
+    stopped_early = False
+
+    def generate(self, *args, **kwargs):
+        del args
+        streamer = kwargs["streamer"]
+        stopping_criteria = kwargs.get("stopping_criteria", [])
+        streamer.put([9])
+        for step, token_id in enumerate([1, 2, 3, 4, 5, 6], start=1):
+            streamer.put([token_id])
+            if token_id == 4 and self.hold_after_first_line:
+                # 模拟仍在生成：直到调用方关闭流、停止条件生效为止
+                while not any(
+                    criteria(_FakeInputIds(1, 5 + step), None) for criteria in stopping_criteria
+                ):
+                    time.sleep(0.01)
+                _StreamingLLM.stopped_early = True
+                return
+        streamer.end()
+
+    def infer(self, tokenizer, **kwargs) -> str:
+        del tokenizer, kwargs
+        self.calls += 1
+        self.generate()
+        return "<|ref|>text<|/ref|>\n中文"
+
+
+class TestHuggingFaceBackendStreaming(unittest.TestCase):
+    def _stream(self, context: ExtractionContext | None, consume):
+        modules, llms = _local_runtime_modules(
+            device_count=1,
+            infer_started=threading.Barrier(1),
+            llm_class=_StreamingLLM,
+        )
+        modules["transformers"].AutoTokenizer.from_pretrained = lambda **kwargs: _FakeTokenizer()
+
+        with patch.dict(sys.modules, modules):
+            sys.modules.pop("doc_page_extractor.model", None)
+            model_module = importlib.import_module("doc_page_extractor.model")
+            try:
+                backend = model_module.DeepSeekOCRHuggingFaceModel(
+                    model_path=None,
+                    local_only=False,
+                    enable_devices_numbers=None,
+                )
+                backend._cache_dir = lambda: None  # type: ignore[method-assign]
+                with TemporaryDirectory() as temp_dir:
+                    result = consume(
+                        backend.generate_stream(
+                            prompt="prompt",
+                            image_path=Path(temp_dir) / "page.png",
+                            output_path=Path(temp_dir),
+                            size="base",
+                            context=context,
+                            device_number=None,
+                        )
+                    )
+            finally:
+                sys.modules.pop("doc_page_extractor.model", None)
+        return result, llms
+
+    def test_generate_stream_yields_decoded_chunks(self):
+        context = ExtractionContext(check_aborted=lambda: False)
+        chunks, llms = self._stream(context, list)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "<|ref|>text<|/ref|>\n中文")
+        self.assertEqual(llms[0].calls, 1)
+        self.assertEqual(context.output_tokens, 0)
+
+    def test_closing_the_stream_stops_generation(self):
+        def first_chunk(stream):
+            chunk = next(stream)
+            stream.close()
+            return chunk
+
+        with patch.object(_StreamingLLM, "hold_after_first_line", True):
+            chunk, _ = self._stream(None, first_chunk)
+
+        self.assertEqual(chunk, "<|ref|>")
+        self.assertTrue(_StreamingLLM.stopped_early)
+
+
+if __name__ == "__main__":
+    unittest.main()
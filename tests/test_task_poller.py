@@ -0,0 +1,192 @@
+import threading
+import time
+import unittest
+
+from PIL import Image
+
+from doc_page_extractor import AbortError, ExtractionContext
+from doc_page_extractor.adapters.task_poller import PollBackoff, TaskPoller
+from doc_page_extractor.adapters.unlimited import (
+    UnlimitedOCRVendorAdapter,
+    UnlimitedOCRVendorConfig,
+)
+from stub_vendor_server import StubRequest, StubResponse, StubVendorServer
+
+
+class TestPollBackoff(unittest.TestCase):
+    def test_delays_follow_observed_completion_times(self):
+        backoff = PollBackoff(initial_seconds=2, min_seconds=0.1, max_seconds=5)
+        self.assertAlmostEqual(backoff.delay(0), 1.6, delta=1.6 * 0.2)
+
+        for seconds in [0.5, 0.6, 10]:
+            backoff.record(seconds)
+
+        self.assertEqual(backoff.expected_seconds(), 0.6)
+        self.assertAlmostEqual(backoff.delay(0), 0.48, delta=0.48 * 0.2)
+        self.assertAlmostEqual(backoff.delay(1), 0.15, delta=0.15 * 0.2)
+        self.assertAlmostEqual(backoff.delay(2), 0.3, delta=0.3 * 0.2)
+        self.assertAlmostEqual(backoff.delay(20), 5, delta=5 * 0.2)
+
+    def test_fixed_interval_polls_right_away_then_on_schedule(self):
+        backoff = PollBackoff(initial_seconds=2, min_seconds=0.1, max_seconds=5, interval_seconds=3)
+        backoff.record(0.5)
+
+        self.assertEqual([backoff.delay(attempt) for attempt in range(4)], [0.0, 3, 3, 3])
+
+    def test_jitter_spreads_polls(self):
+        backoff = PollBackoff(initial_seconds=1, min_seconds=0, max_seconds=10)
+        delays = {round(backoff.delay(0), 6) for _ in range(20)}
+        self.assertGreater(len(delays), 1)
+
+
+class _FakeTasks:
+    """query 第 n 次调用时任务完成；记录每个任务的查询次数和下载时间。"""
+
+    def __init__(self, finish_after: dict[str, float]) -> None:
+        self.started = time.monotonic()
+        self.finish_after = finish_after
+        self.queries: dict[str, int] = {task_id: 0 for task_id in finish_after}
+        self.fetched_at: dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def query(self, task_id: str):
+        with self.lock:
+            self.queries[task_id] += 1
+        if time.monotonic() - self.started >= self.finish_after[task_id]:
+            return {"task_id": task_id}
+        return None
+
+    def fetch(self, task_id: str, result) -> str:
+        with self.lock:
+            self.fetched_at[task_id] = time.monotonic() - self.started
+        return f"result of {result['task_id']}"
+
+
+class TestTaskPoller(unittest.TestCase):
+    def _poller(self, tasks: _FakeTasks, timeout_seconds: float = 5) -> TaskPoller:
+        return TaskPoller(
+            query=tasks.query,
+            fetch=tasks.fetch,
+            backoff=PollBackoff(initial_seconds=0.05, min_seconds=0.01, max_seconds=0.2),
+            timeout_seconds=timeout_seconds,
+            max_workers=4,
+        )
+
+    def test_tracks_many_tasks_with_few_threads(self):
+        finish_after = {f"fast-{i}": 0.05 for i in range(100)}
+        finish_after.update({f"slow-{i}": 0.6 for i in range(100)})
+        tasks = _FakeTasks(finish_after)
+        poller = self._poller(tasks)
+        threads_before = threading.active_count()
+        try:
+            futures = {task_id: poller.submit(task_id) for task_id in finish_after}
+            self.assertEqual(poller.pending(), 200)
+            self.assertLessEqual(threading.active_count() - threads_before, 5)
+            results = {task_id: future.result(timeout=5) for task_id, future in futures.items()}
+        finally:
+            poller.close()
+
+        self.assertEqual(results["slow-7"], "result of slow-7")
+        self.assertEqual(poller.pending(), 0)
+        # 快任务的结果在慢任务仍在处理时就已下载
+        self.assertLess(max(tasks.fetched_at[f"fast-{i}"] for i in range(100)), 0.6)
+        # 退避使慢任务的查询次数远少于固定 10ms 间隔所需的次数
+        self.assertLess(max(tasks.queries[f"slow-{i}"] for i in range(100)), 15)
+
+    def test_wait_returns_as_soon_as_the_context_aborts(self):
+        aborted = threading.Event()
+        poller = self._poller(_FakeTasks({"t": 60}))
+        context = ExtractionContext(check_aborted=aborted.is_set)
+        threading.Timer(0.1, aborted.set).start()
+        started = time.monotonic()
+        try:
+            with self.assertRaises(AbortError):
+                poller.wait("t", context)
+        finally:
+            poller.close()
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(poller.pending(), 0)
+
+    def test_tasks_time_out(self):
+        poller = self._poller(_FakeTasks({"t": 60}), timeout_seconds=0.1)
+        try:
+            with self.assertRaisesRegex(TimeoutError, "Task t timed out"):
+                poller.wait("t")
+        finally:
+            poller.close()
+
+
+def _unlimited_handler(server_url: list[str], finish_after_queries: dict[str, int]):
+    lock = threading.Lock()
+    queries: dict[str, int] = {}
+    submitted: list[str] = []
+
+    def handle(request: StubRequest) -> StubResponse:
+        if request.path == "/oauth/2.0/token":
+            return StubResponse(body={"access_token": "token", "expires_in": 3600})
+        if request.path.endswith("/task"):
+            with lock:
+                task_id = f"t-{len(submitted)}"
+                submitted.append(task_id)
+            return StubResponse(body={"error_code": 0, "result": {"task_id": task_id}})
+        if request.path.endswith("/task/query"):
+            task_id = request.form()["task_id"][0]
+            with lock:
+                queries[task_id] = queries.get(task_id, 0) + 1
+                done = queries[task_id] >= finish_after_queries.get(task_id, 1)
+            if not done:
+                return StubResponse(body={"error_code": 0, "result": {"status": "running"}})
+            return StubResponse(
+                body={
+                    "error_code": 0,
+                    "result": {
+                        "status": "success",
+                        "parse_result_url": f"{server_url[0]}/result/{task_id}.json",
+                    },
+                }
+            )
+        if request.path.startswith("/result/"):
+            task_id = request.path.rsplit("/", 1)[-1].removesuffix(".json")
+            return StubResponse(
+                body={
+                    "file_name": "page.png",
+                    "pages": [
+                        {"layouts": [{"text": task_id, "position": [1, 2, 3, 4], "type": "text"}]}
+                    ],
+                }
+            )
+        return StubResponse(status=404, body="not found")
+
+    return handle
+
+
+class TestUnlimitedVendorPolling(unittest.TestCase):
+    def test_submitted_pages_share_one_poller(self):
+        server_url: list[str] = []
+        handler = _unlimited_handler(server_url, {"t-0": 3, "t-1": 1, "t-2": 2})
+        with StubVendorServer(handler) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak",
+                sk="sk",
+                base_url=server.base_url,
+                expected_task_seconds=0.02,
+                min_poll_interval_seconds=0.01,
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                futures = [
+                    adapter.submit_page_image(Image.new("RGB", (50, 50), "white"))
+                    for _ in range(3)
+                ]
+                results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual([result.layouts[0].text for result in results], ["t-0", "t-1", "t-2"])
+        self.assertEqual([result.raw["task_id"] for result in results], ["t-0", "t-1", "t-2"])
+        paths = [request.path.rsplit("/", 1)[-1] for request in server.requests]
+        self.assertEqual(paths.count("token"), 1)
+        self.assertEqual(paths.count("query"), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
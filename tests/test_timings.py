@@ -0,0 +1,120 @@
+import asyncio
+import time
+import unittest
+
+from PIL import Image
+
+from doc_page_extractor import (
+    AsyncVendorHTTPClient,
+    DeepSeekOCRVendorConfig,
+    ExtractionContext,
+    UnlimitedOCRVendorConfig,
+    create_async_unlimited_ocr_vendor_page_extractor,
+)
+from doc_page_extractor.adapters.deepseek import DeepSeekOCRVendorAdapter
+from doc_page_extractor.adapters.unlimited import UnlimitedOCRVendorAdapter
+from doc_page_extractor.extractor import create_page_extractor_with_adapter
+from doc_page_extractor.timings import add_timings, timed
+from stub_vendor_server import StubRequest, StubResponse, StubVendorServer
+from test_vendor_adapters import _chat_completion, _unlimited_handler
+
+
+def _slow_query(server_url: list[str], delay_seconds: float):
+    handle = _unlimited_handler(server_url)
+
+    def slow(request: StubRequest) -> StubResponse:
+        if request.path.endswith("/task/query"):
+            time.sleep(delay_seconds)
+        return handle(request)
+
+    return slow
+
+
+class TestTimings(unittest.TestCase):
+    def test_timed_accumulates_and_records_on_error(self):
+        timings: dict[str, float] = {}
+        with timed(timings, "parse"):
+            pass
+        with self.assertRaises(ValueError):
+            with timed(timings, "parse"):
+                raise ValueError("boom")
+        add_timings(timings, {"parse": 1.0, "structure": 2.0})
+
+        self.assertGreaterEqual(timings["parse"], 1.0)
+        self.assertEqual(timings["structure"], 2.0)
+
+    def test_multi_stage_extraction_records_each_stage(self):
+        context = ExtractionContext(check_aborted=lambda: False)
+        image = Image.new("RGB", (400, 300), "white")
+
+        with StubVendorServer(_chat_completion) as server:
+            config = DeepSeekOCRVendorConfig(
+                base_url=server.base_url, api_key="key", model="deepseek-ocr"
+            )
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                extractor = create_page_extractor_with_adapter(adapter)
+                results = [
+                    page_result
+                    for _, page_result in extractor.extract_page_results(
+                        image, size="base", stages=2, context=context
+                    )
+                ]
+
+        first, second = (result.timings for result in results)
+        self.assertEqual(
+            set(first), {"encode", "request", "parse", "structure", "total"}
+        )
+        self.assertEqual(set(second), set(first) | {"background", "redact"})
+        for timings in (first, second):
+            self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+            stages = sum(seconds for stage, seconds in timings.items() if stage != "total")
+            self.assertLessEqual(stages, timings["total"])
+        self.assertAlmostEqual(context.timings["request"], first["request"] + second["request"])
+        self.assertAlmostEqual(context.timings["total"], first["total"] + second["total"])
+
+    def test_unlimited_vendor_separates_upload_poll_and_download(self):
+        server_url: list[str] = []
+        with StubVendorServer(_slow_query(server_url, delay_seconds=0.05)) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, poll_interval_seconds=0
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                result = adapter.extract_page_image(
+                    prompt="prompt",
+                    image=Image.new("RGB", (100, 100), "white"),
+                    output_path=None,  # type: ignore[arg-type]
+                    size="base",
+                    context=None,
+                    device_number=None,
+                )
+
+        self.assertEqual(
+            set(result.timings), {"encode", "upload", "poll", "download", "parse", "structure"}
+        )
+        self.assertGreaterEqual(result.timings["poll"], 0.05)
+        self.assertLess(result.timings["download"], result.timings["poll"])
+
+    def test_async_unlimited_vendor_records_timings(self):
+        server_url: list[str] = []
+
+        async def run():
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server_url[0], poll_interval_seconds=0
+            )
+            async with AsyncVendorHTTPClient.from_config(config) as client:
+                extractor = create_async_unlimited_ocr_vendor_page_extractor(config, client)
+                return [
+                    page_result
+                    async for _, page_result in extractor.extract_page_results(
+                        Image.new("RGB", (100, 100), "white"), size="base"
+                    )
+                ]
+
+        with StubVendorServer(_slow_query(server_url, delay_seconds=0.05)) as server:
+            server_url.append(server.base_url)
+            (result,) = asyncio.run(run())
+
+        self.assertGreaterEqual(result.timings["poll"], 0.05)
+        self.assertIn("download", result.timings)
+        self.assertIn("total", result.timings)
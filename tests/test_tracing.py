@@ -0,0 +1,202 @@
+import importlib
+import io
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from PIL import Image
+
+from doc_page_extractor import (
+    ExtractionContext,
+    InMemoryTracer,
+    JSONLinesTracer,
+    NoopTracer,
+    extract_document,
+)
+from doc_page_extractor.adapters.deepseek import DeepSeekOCRVendorAdapter, DeepSeekOCRVendorConfig
+from doc_page_extractor.adapters.unlimited import UnlimitedOCRVendorAdapter, UnlimitedOCRVendorConfig
+from doc_page_extractor.extractor import create_page_extractor_with_adapter
+from doc_page_extractor.tracing import current_span, span
+from stub_vendor_server import StubVendorServer
+from test_scheduler import _local_runtime_modules
+from test_vendor_adapters import _chat_completion, _unlimited_handler
+
+
+def _only(tracer: InMemoryTracer, name: str):
+    (found,) = tracer.find(name)
+    return found
+
+
+class TestSpans(unittest.TestCase):
+    def test_spans_nest_and_record_errors(self):
+        tracer = InMemoryTracer()
+        with span("outer", tracer, page=3) as outer:
+            with self.assertRaises(ValueError):
+                with span("inner"):
+                    raise ValueError("boom")
+            outer.set(done=True)
+        self.assertIsNone(current_span())
+
+        inner = _only(tracer, "inner")
+        self.assertEqual([found.name for found in tracer.spans], ["inner", "outer"])
+        self.assertEqual(inner.parent_id, outer.span_id)
+        self.assertEqual(inner.trace_id, outer.trace_id)
+        self.assertEqual(inner.error, "ValueError: boom")
+        self.assertEqual(outer.attributes, {"page": 3, "done": True})
+        self.assertIsNone(outer.parent_id)
+        self.assertGreaterEqual(outer.duration, inner.duration)
+
+    def test_no_tracer_records_nothing(self):
+        for tracer in (None, NoopTracer()):
+            with span("outer", tracer) as outer, span("inner") as inner:
+                outer.set(ignored=True)
+                self.assertIsNone(current_span())
+            self.assertFalse(outer.recording)
+            self.assertFalse(inner.recording)
+            self.assertEqual(outer.attributes, {})
+
+    def test_inactive_span_is_parent_only_when_given(self):
+        tracer = InMemoryTracer()
+        with span("page", tracer, activate=False) as page:
+            self.assertIsNone(current_span())
+            with span("stage", parent=page):
+                pass
+        self.assertEqual(_only(tracer, "stage").parent_id, page.span_id)
+
+    def test_json_lines_tracer(self):
+        stream = io.StringIO()
+        with span("outer", JSONLinesTracer(stream), size="base"):
+            with span("inner"):
+                pass
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([line["name"] for line in lines], ["inner", "outer"])
+        self.assertEqual(lines[0]["parent_id"], lines[1]["span_id"])
+        self.assertEqual(lines[1]["attributes"], {"size": "base"})
+
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "spans.jsonl"
+            for _ in range(2):
+                with JSONLinesTracer(path) as tracer, span("page", tracer):
+                    pass
+            self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 2)
+
+
+class TestPipelineSpans(unittest.TestCase):
+    def test_document_spans_cover_pages_stages_adapter_and_http(self):
+        tracer = InMemoryTracer()
+        context = ExtractionContext(check_aborted=lambda: False, tracer=tracer)
+        pages = [Image.new("RGB", (400, 300), "white") for _ in range(2)]
+
+        with StubVendorServer(_chat_completion) as server:
+            config = DeepSeekOCRVendorConfig(
+                base_url=server.base_url, api_key="key", model="deepseek-ocr"
+            )
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                extractor = create_page_extractor_with_adapter(adapter)
+                list(extract_document(extractor, pages, size="base", stages=2, context=context))
+
+        document = _only(tracer, "document")
+        self.assertEqual({found.trace_id for found in tracer.spans}, {document.trace_id})
+        document_pages = tracer.children(document)
+        self.assertEqual(sorted(found.attributes["page"] for found in document_pages), [0, 1])
+        for document_page in document_pages:
+            (page,) = tracer.children(document_page)
+            self.assertEqual(page.attributes, {"size": "base", "stages": 2})
+            stages = tracer.children(page)
+            self.assertEqual([stage.attributes["stage"] for stage in stages], [1, 2])
+            second_stage = {found.name for found in tracer.children(stages[1])}
+            self.assertEqual(second_stage, {"background", "redact", "adapter.extract_page"})
+
+        adapter_spans = tracer.find("adapter.extract_page")
+        self.assertEqual(len(adapter_spans), 4)
+        self.assertEqual(
+            adapter_spans[0].attributes,
+            {
+                "adapter": "DeepSeekOCRVendorAdapter",
+                "source": "deepseek-ocr-vendor",
+                "layouts": 1,
+                "input_tokens": 7,
+                "output_tokens": 3,
+            },
+        )
+        requests = tracer.find("http.request")
+        self.assertEqual(
+            sorted(request.parent_id for request in requests),
+            sorted(found.span_id for found in adapter_spans),
+        )
+        self.assertEqual(requests[0].attributes["status"], 200)
+
+    def test_unlimited_polls_are_traced_from_poller_threads(self):
+        tracer = InMemoryTracer()
+        context = ExtractionContext(check_aborted=lambda: False, tracer=tracer)
+        server_url: list[str] = []
+
+        with StubVendorServer(_unlimited_handler(server_url)) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, poll_interval_seconds=0
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                extractor = create_page_extractor_with_adapter(adapter)
+                list(
+                    extractor.extract_page_results(
+                        Image.new("RGB", (100, 100), "white"), size="base", context=context
+                    )
+                )
+
+        adapter_span = _only(tracer, "adapter.extract_page")
+        query = _only(tracer, "poll.query")
+        fetch = _only(tracer, "poll.fetch")
+        self.assertEqual(query.parent_id, adapter_span.span_id)
+        self.assertEqual(fetch.parent_id, adapter_span.span_id)
+        self.assertEqual(query.attributes, {"attempt": 0, "done": True})
+        self.assertNotEqual(query.thread, adapter_span.thread)
+        urls = [found.attributes["url"] for found in tracer.find("http.request")]
+        self.assertEqual(len(urls), 4)
+        self.assertFalse(any("access_token" in url for url in urls))
+
+    def test_model_backend_spans_lock_waits_and_generation(self):
+        tracer = InMemoryTracer()
+        modules, _ = _local_runtime_modules(device_count=2, infer_started=threading.Barrier(1))
+        with patch.dict(sys.modules, modules):
+            sys.modules.pop("doc_page_extractor.model", None)
+            model_module = importlib.import_module("doc_page_extractor.model")
+            try:
+                backend = model_module.DeepSeekOCRHuggingFaceModel(
+                    model_path=None, local_only=False, enable_devices_numbers=None
+                )
+                backend._cache_dir = lambda: None  # type: ignore[method-assign]
+                with TemporaryDirectory() as temp_dir, span("inference", tracer) as inference:
+                    backend.generate(
+                        prompt="prompt",
+                        image_path=Path(temp_dir) / "page.png",
+                        output_path=Path(temp_dir),
+                        size="base",
+                        context=None,
+                        device_number=None,
+                    )
+            finally:
+                sys.modules.pop("doc_page_extractor.model", None)
+
+        self.assertEqual(
+            [found.name for found in tracer.children(inference)],
+            ["model.acquire_device", "model.read_lock", "model.generate"],
+        )
+        self.assertEqual(_only(tracer, "model.acquire_device").attributes, {"device_number": 0})
+        self.assertEqual(
+            _only(tracer, "model.generate").attributes,
+            {
+                "model": "deepseek-ai/DeepSeek-OCR",
+                "base_size": 1024,
+                "image_size": 1024,
+                "crop_mode": False,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import base64
+import io
+import random
+import unittest
+
+from PIL import Image
+
+from doc_page_extractor import ExtractionContext, ImageEncodingConfig
+from doc_page_extractor.adapters.deepseek import (
+    DeepSeekOCRVendorAdapter,
+    DeepSeekOCRVendorConfig,
+)
+from doc_page_extractor.adapters.images import encode_png, encode_upload
+from doc_page_extractor.adapters.unlimited import (
+    UnlimitedOCRVendorAdapter,
+    UnlimitedOCRVendorConfig,
+)
+from doc_page_extractor.extractor import create_page_extractor_with_adapter
+from stub_vendor_server import StubVendorServer
+from test_vendor_adapters import _chat_completion, _unlimited_handler
+
+
+def _scanned_page(width: int = 400, height: int = 300) -> Image.Image:
+    # 带噪点的黑白扫描页：大部分是浅灰底色，少量深色笔画
+    rng = random.Random(1)
+    image = Image.new("RGB", (width, height))
+    image.putdata(
+        [
+            (20, 20, 20) if rng.random() < 0.05 else (235 + rng.randint(0, 20),) * 3
+            for _ in range(width * height)
+        ]
+    )
+    return image
+
+
+def _decoded_upload(request) -> tuple[str, Image.Image]:
+    url = request.json()["messages"][0]["content"][0]["image_url"]["url"]
+    header, data = url.split(",", 1)
+    return header, Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+class TestEncodeUpload(unittest.TestCase):
+    def test_formats_and_color_modes(self):
+        image = _scanned_page()
+        png = encode_upload(image, ImageEncodingConfig())
+        gray = encode_upload(image, ImageEncodingConfig(color_mode="grayscale"))
+        bilevel = encode_upload(image, ImageEncodingConfig(color_mode="bilevel"))
+        jpeg = encode_upload(image, ImageEncodingConfig(format="jpeg", quality=60))
+        webp_bilevel = encode_upload(
+            image, ImageEncodingConfig(format="webp", color_mode="bilevel")
+        )
+
+        self.assertEqual(png.data, encode_png(image))
+        self.assertEqual(Image.open(io.BytesIO(gray.data)).mode, "L")
+        self.assertEqual(Image.open(io.BytesIO(bilevel.data)).mode, "1")
+        self.assertEqual(Image.open(io.BytesIO(jpeg.data)).format, "JPEG")
+        self.assertEqual(Image.open(io.BytesIO(webp_bilevel.data)).format, "WEBP")
+        self.assertLess(len(bilevel.data), len(png.data) / 4)
+        self.assertLess(len(jpeg.data), len(png.data))
+
+    def test_default_config_reuses_written_png(self):
+        source = b"already encoded"
+        encoded = encode_upload(_scanned_page(10, 10), ImageEncodingConfig(), source)
+        self.assertIs(encoded.data, source)
+
+        reencoded = encode_upload(
+            _scanned_page(10, 10), ImageEncodingConfig(format="jpeg"), source
+        )
+        self.assertIsNot(reencoded.data, source)
+
+        image = _scanned_page()
+        recompressed = encode_upload(image, ImageEncodingConfig(png_compress_level=9), encode_png(image))
+        self.assertLess(len(recompressed.data), len(encode_png(image)))
+
+    def test_invalid_settings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            ImageEncodingConfig(format="gif")  # type: ignore[arg-type]
+        with self.assertRaises(ValueError):
+            ImageEncodingConfig(quality=0)
+
+
+class TestVendorUploadEncoding(unittest.TestCase):
+    def test_deepseek_uploads_configured_format_at_size_resolution(self):
+        encoding = ImageEncodingConfig(format="jpeg", quality=70, max_image_side={"small": 500})
+        with StubVendorServer(_chat_completion) as server:
+            config = DeepSeekOCRVendorConfig(
+                base_url=server.base_url, api_key="key", model="deepseek-ocr", encoding=encoding
+            )
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                extractor = create_page_extractor_with_adapter(adapter)
+                image = _scanned_page(1000, 800)
+                _, small = next(extractor.extract_page_results(image, size="small"))
+                _, base = next(extractor.extract_page_results(image, size="base"))
+
+        header, uploaded = _decoded_upload(server.requests[0])
+        self.assertEqual(header, "data:image/jpeg;base64")
+        self.assertEqual(uploaded.size, (500, 400))
+        self.assertEqual(_decoded_upload(server.requests[1])[1].size, (1000, 800))
+        # 坐标按上传图片计算后换算回原图，与不缩放时一致
+        self.assertEqual(small.layouts[0].det, base.layouts[0].det)
+
+        upload = small.raw["upload"]
+        self.assertEqual(upload["format"], "jpeg")
+        self.assertGreater(upload["bytes"], 0)
+        self.assertGreaterEqual(upload["response_seconds"], 0)
+        self.assertNotIn("submit_seconds", upload)
+        self.assertEqual(small.raw["usage"], {"prompt_tokens": 7, "completion_tokens": 3})
+
+    def test_unlimited_uploads_configured_format(self):
+        server_url: list[str] = []
+        with StubVendorServer(_unlimited_handler(server_url)) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak",
+                sk="sk",
+                base_url=server.base_url,
+                poll_interval_seconds=0.01,
+                encoding=ImageEncodingConfig(color_mode="bilevel", max_image_side={"base": 100}),
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                self.assertEqual(adapter.max_image_side["base"], 100)
+                self.assertEqual(adapter.max_image_side["tiny"], 8192)
+                result = adapter.extract_page_image(
+                    prompt="",
+                    image=_scanned_page(),
+                    output_path=None,  # type: ignore[arg-type]
+                    size="base",
+                    context=ExtractionContext(check_aborted=lambda: False),
+                    device_number=None,
+                )
+
+        submit = next(request for request in server.requests if request.path.endswith("/task"))
+        form = submit.form()
+        self.assertEqual(form["file_name"], ["page.png"])
+        uploaded = Image.open(io.BytesIO(base64.b64decode(form["file_data"][0])))
+        self.assertEqual(uploaded.mode, "1")
+        self.assertEqual(result.raw["upload"]["bytes"], len(base64.b64decode(form["file_data"][0])))
+        self.assertEqual(result.raw["upload"]["submit_seconds"], result.timings["upload"])
+        self.assertNotIn("response_seconds", result.raw["upload"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,456 @@
+import base64
+import json
+import threading
+import time
+import unittest
+
+from PIL import Image
+
+from doc_page_extractor import AbortError, ExtractionContext, TokenLimitError
+from doc_page_extractor.adapters.deepseek import (
+    DeepSeekOCRVendorAdapter,
+    DeepSeekOCRVendorConfig,
+)
+from doc_page_extractor.adapters.unlimited import (
+    UnlimitedOCRVendorAdapter,
+    UnlimitedOCRVendorConfig,
+)
+from stub_vendor_server import StubRequest, StubResponse, StubVendorServer
+
+
+def _chat_completion(request: StubRequest) -> StubResponse:
+    del request
+    return StubResponse(
+        body={
+            "choices": [
+                {
+                    "message": {
+                        "content": "<|ref|>text<|/ref|><|det|>[[100, 200, 300, 400]]<|/det|>hello"
+                    }
+                }
+            ],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3},
+        }
+    )
+
+
+_STREAM_TEXT = (
+    "<|ref|>title<|/ref|><|det|>[[100, 100, 900, 200]]<|/det|>\n# Title\n\n"
+    "<|ref|>text<|/ref|><|det|>[[100, 300, 900, 600]]<|/det|>\nhello world"
+)
+
+
+def _sse_event(data: dict | str) -> bytes:
+    payload = data if isinstance(data, str) else json.dumps(data)
+    return f"data: {payload}\n\n".encode("utf-8")
+
+
+def _sse_chunks(text: str, piece: int = 8, between=None):
+    pieces = [text[i : i + piece] for i in range(0, len(text), piece)]
+    for index, content in enumerate(pieces):
+        if between is not None:
+            between(index)
+        yield _sse_event({"choices": [{"index": 0, "delta": {"content": content}}]})
+    yield _sse_event(
+        {"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": len(pieces)}}
+    )
+    yield _sse_event("[DONE]")
+
+
+def _unlimited_handler(server_url: list[str]):
+    def handle(request: StubRequest) -> StubResponse:
+        if request.path == "/oauth/2.0/token":
+            return StubResponse(body={"access_token": "token", "expires_in": 3600})
+        if request.path.endswith("/task"):
+            return StubResponse(body={"error_code": 0, "result": {"task_id": "t-1"}})
+        if request.path.endswith("/task/query"):
+            return StubResponse(
+                body={
+                    "error_code": 0,
+                    "result": {
+                        "status": "success",
+                        "parse_result_url": f"{server_url[0]}/result/t-1.json",
+                    },
+                }
+            )
+        if request.path == "/result/t-1.json":
+            return StubResponse(
+                body={
+                    "file_name": "page.png",
+                    "pages": [
+                        {
+                            "layouts": [
+                                {
+                                    "text": "hello",
+                                    "position": [10, 20, 30, 40],
+                                    "type": "text",
+                                }
+                            ]
+                        }
+                    ],
+                }
+            )
+        return StubResponse(status=404, body="not found")
+
+    return handle
+
+
+class TestVendorHTTPSessions(unittest.TestCase):
+    def test_deepseek_vendor_reuses_pooled_connection(self):
+        image = Image.new("RGB", (1000, 500), "white")
+        context = ExtractionContext(check_aborted=lambda: False)
+
+        with StubVendorServer(_chat_completion) as server:
+            config = DeepSeekOCRVendorConfig(
+                base_url=server.base_url, api_key="key", model="deepseek-ocr"
+            )
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                results = [
+                    adapter.extract_page_image(
+                        prompt="prompt",
+                        image=image,
+                        output_path=None,  # type: ignore[arg-type]
+                        size="base",
+                        context=context,
+                        device_number=None,
+                    )
+                    for _ in range(3)
+                ]
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(server.requests[0].path, "/v1/chat/completions")
+        self.assertEqual(results[0].layouts[0].det, (100, 100, 300, 200))
+        self.assertEqual(context.input_tokens, 21)
+        self.assertEqual(context.output_tokens, 9)
+
+    def test_keep_alive_can_be_disabled(self):
+        image = Image.new("RGB", (100, 100), "white")
+
+        with StubVendorServer(_chat_completion) as server:
+            config = DeepSeekOCRVendorConfig(
+                base_url=server.base_url,
+                api_key="key",
+                model="deepseek-ocr",
+                keep_alive=False,
+            )
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                for _ in range(2):
+                    adapter.extract_page_image(
+                        prompt="prompt",
+                        image=image,
+                        output_path=None,  # type: ignore[arg-type]
+                        size="base",
+                        context=None,
+                        device_number=None,
+                    )
+
+        self.assertEqual(server.connections, 2)
+
+    def test_retries_post_only_on_rate_limit_with_retry_after(self):
+        def extract(responses: list[StubResponse]):
+            def handle(request: StubRequest) -> StubResponse:
+                return responses.pop(0) if responses else _chat_completion(request)
+
+            with StubVendorServer(handle) as server:
+                config = DeepSeekOCRVendorConfig(
+                    base_url=server.base_url,
+                    api_key="key",
+                    model="deepseek-ocr",
+                    max_retries=1,
+                    retry_backoff_seconds=0,
+                )
+                with DeepSeekOCRVendorAdapter(config) as adapter:
+                    try:
+                        return adapter.extract_page_image(
+                            prompt="prompt",
+                            image=Image.new("RGB", (100, 100), "white"),
+                            output_path=None,  # type: ignore[arg-type]
+                            size="base",
+                            context=None,
+                            device_number=None,
+                        ), len(server.requests)
+                    except RuntimeError:
+                        return None, len(server.requests)
+
+        rate_limited = StubResponse(status=429, body={"error": "slow down"}, headers={"Retry-After": "0"})
+        result, requests = extract([rate_limited])
+        self.assertEqual(requests, 2)
+        assert result is not None
+        self.assertEqual(result.layouts[0].text, "hello")
+
+        # 5xx 时服务端可能已经开始生成，POST 不重放
+        for response in (
+            StubResponse(status=503, body={"error": "busy"}),
+            StubResponse(status=429, body={"error": "slow down"}),
+        ):
+            with self.subTest(status=response.status, headers=response.headers):
+                self.assertEqual(extract([response]), (None, 1))
+
+    def test_retries_get_on_transient_status(self):
+        server_url: list[str] = []
+        unlimited = _unlimited_handler(server_url)
+        statuses = [503]
+
+        def handle(request: StubRequest) -> StubResponse:
+            if request.method == "GET" and statuses:
+                return StubResponse(status=statuses.pop(), body={"error": "busy"})
+            return unlimited(request)
+
+        with StubVendorServer(handle) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, poll_interval_seconds=0,
+                max_retries=1, retry_backoff_seconds=0,
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                result = adapter.extract_page_image(
+                    prompt="prompt",
+                    image=Image.new("RGB", (100, 100), "white"),
+                    output_path=None,  # type: ignore[arg-type]
+                    size="base",
+                    context=None,
+                    device_number=None,
+                )
+
+        paths = [request.path.rsplit("/", 1)[-1] for request in server.requests]
+        self.assertEqual(paths.count("t-1.json"), 2)
+        self.assertEqual(result.layouts[0].text, "hello")
+
+    def test_unlimited_vendor_shares_one_connection_across_task_flow(self):
+        server_url: list[str] = []
+        with StubVendorServer(_unlimited_handler(server_url)) as server:
+            server_url.append(server.base_url)
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, poll_interval_seconds=0
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                result = adapter.extract_page_image(
+                    prompt="prompt",
+                    image=Image.new("RGB", (100, 100), "white"),
+                    output_path=None,  # type: ignore[arg-type]
+                    size="base",
+                    context=None,
+                    device_number=None,
+                )
+
+        self.assertEqual(
+            [request.path.rsplit("/", 1)[-1] for request in server.requests],
+            ["token", "task", "query", "t-1.json"],
+        )
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(result.layouts[0].det, (10, 20, 40, 60))
+
+    def test_unlimited_vendor_submits_a_document_as_one_task(self):
+        def handle(request: StubRequest) -> StubResponse:
+            if request.path == "/oauth/2.0/token":
+                return StubResponse(body={"access_token": "token"})
+            if request.path.endswith("/task"):
+                return StubResponse(body={"error_code": 0, "result": {"task_id": "doc-1"}})
+            if request.path.endswith("/task/query"):
+                return StubResponse(
+                    body={
+                        "error_code": 0,
+                        "result": {
+                            "status": "success",
+                            "parse_result_url": f"{server.base_url}/result/doc-1.json",
+                        },
+                    }
+                )
+            return StubResponse(
+                body={
+                    "file_name": "document.pdf",
+                    # 页面按 page_num 放置，与返回顺序无关；第 1 页没有解析结果
+                    "pages": [
+                        {"page_num": i, "layouts": [{"text": f"page {i}", "position": [i, 0, 10, 10]}]}
+                        for i in (2, 0)
+                    ],
+                }
+            )
+
+        with StubVendorServer(handle) as server:
+            config = UnlimitedOCRVendorConfig(
+                ak="ak", sk="sk", base_url=server.base_url, min_poll_interval_seconds=0
+            )
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                results = adapter.extract_document_pages(
+                    [Image.new("RGB", (100, 140), "white") for _ in range(3)]
+                )
+
+        submits = [request for request in server.requests if request.path.endswith("/task")]
+        self.assertEqual(len(submits), 1)
+        form = submits[0].form()
+        self.assertEqual(form["file_name"], ["document.pdf"])
+        self.assertTrue(base64.b64decode(form["file_data"][0]).startswith(b"%PDF"))
+        self.assertEqual(
+            [[layout.text for layout in result.layouts] for result in results],
+            [["page 0"], [], ["page 2"]],
+        )
+        self.assertEqual(results[2].layouts[0].det, (2, 0, 12, 10))
+        self.assertEqual([result.raw["page_index"] for result in results], [0, 1, 2])
+        self.assertEqual([result.raw.get("missing", False) for result in results], [False, True, False])
+        self.assertTrue(all(result.structured is not None for result in results))
+
+    def test_unlimited_vendor_document_wait_uses_its_own_timeout_and_aborts(self):
+        finished = threading.Event()
+
+        def handle(request: StubRequest) -> StubResponse:
+            if request.path == "/oauth/2.0/token":
+                return StubResponse(body={"access_token": "token"})
+            if request.path.endswith("/task"):
+                return StubResponse(body={"error_code": 0, "result": {"task_id": "doc-1"}})
+            if request.path.endswith("/task/query"):
+                if not finished.is_set():
+                    return StubResponse(body={"error_code": 0, "result": {"status": "running"}})
+                return StubResponse(
+                    body={
+                        "error_code": 0,
+                        "result": {
+                            "status": "success",
+                            "parse_result_url": f"{server.base_url}/result/doc-1.json",
+                        },
+                    }
+                )
+            return StubResponse(body={"pages": [{"page_num": 0, "layouts": []}]})
+
+        with StubVendorServer(handle) as server:
+            # 单页任务 0.1 秒即超时，整份文档仍按 document_timeout_seconds 等待
+            config = UnlimitedOCRVendorConfig(
+                ak="ak",
+                sk="sk",
+                base_url=server.base_url,
+                poll_interval_seconds=0.02,
+                timeout_seconds=0.1,  # type: ignore[arg-type]
+            )
+            images = [Image.new("RGB", (100, 140), "white")]
+            with UnlimitedOCRVendorAdapter(config) as adapter:
+                threading.Timer(0.4, finished.set).start()
+                results = adapter.extract_document_pages(images)
+                self.assertEqual(len(results), 1)
+
+                finished.clear()
+                aborted = threading.Event()
+                threading.Timer(0.2, aborted.set).start()
+                started = time.monotonic()
+                with self.assertRaises(AbortError):
+                    adapter.extract_document_pages(
+                        images, ExtractionContext(check_aborted=aborted.is_set)
+                    )
+                self.assertLess(time.monotonic() - started, 2)
+                self.assertEqual(adapter._get_poller().pending(), 0)  # pylint: disable=protected-access
+
+
+class TestDeepSeekVendorStreaming(unittest.TestCase):
+    def _extract(self, server: StubVendorServer, context: ExtractionContext | None):
+        config = DeepSeekOCRVendorConfig(
+            base_url=server.base_url, api_key="key", model="deepseek-ocr", stream=True
+        )
+        with DeepSeekOCRVendorAdapter(config) as adapter:
+            return adapter.extract_page_image(
+                prompt="prompt",
+                image=Image.new("RGB", (1000, 500), "white"),
+                output_path=None,  # type: ignore[arg-type]
+                size="base",
+                context=context,
+                device_number=None,
+            )
+
+    def test_streamed_completion_matches_full_response(self):
+        context = ExtractionContext(check_aborted=lambda: False)
+
+        def handle(request: StubRequest) -> StubResponse:
+            del request
+            return StubResponse(
+                headers={"Content-Type": "text/event-stream"}, chunks=_sse_chunks(_STREAM_TEXT)
+            )
+
+        with StubVendorServer(handle) as server:
+            result = self._extract(server, context)
+
+        payload = server.requests[0].json()
+        self.assertTrue(payload["stream"])
+        self.assertEqual(payload["stream_options"], {"include_usage": True})
+        self.assertEqual(result.raw_text, _STREAM_TEXT)
+        self.assertEqual(
+            [layout.det for layout in result.layouts],
+            [(100, 50, 900, 100), (100, 150, 900, 300)],
+        )
+        self.assertEqual(result.layouts[1].text, "\nhello world")
+        # usage 取自最后一个事件：每 8 个字符一个增量
+        self.assertEqual(
+            (context.input_tokens, context.output_tokens), (7, -(-len(_STREAM_TEXT) // 8))
+        )
+
+    def test_abort_stops_reading_mid_generation(self):
+        aborted = threading.Event()
+
+        def slow(index: int) -> None:
+            if index == 3:
+                aborted.set()
+            time.sleep(0.05)
+
+        def handle(request: StubRequest) -> StubResponse:
+            del request
+            return StubResponse(chunks=_sse_chunks("x" * 8000, piece=1, between=slow))
+
+        context = ExtractionContext(check_aborted=aborted.is_set)
+        started = time.monotonic()
+        with StubVendorServer(handle) as server:
+            with self.assertRaises(AbortError) as raised:
+                self._extract(server, context)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertLess(context.output_tokens, 10)
+        self.assertEqual(raised.exception.output_tokens, context.output_tokens)
+
+    def test_output_token_limit_is_checked_between_chunks(self):
+        def handle(request: StubRequest) -> StubResponse:
+            del request
+            return StubResponse(chunks=_sse_chunks(_STREAM_TEXT, piece=1))
+
+        context = ExtractionContext(check_aborted=lambda: False, max_output_tokens=5)
+        with StubVendorServer(handle) as server:
+            with self.assertRaises(TokenLimitError) as raised:
+                self._extract(server, context)
+
+        self.assertEqual(raised.exception.output_tokens, 6)
+
+    def test_layouts_are_yielded_while_the_response_streams(self):
+        held = threading.Event()
+        release = threading.Event()
+
+        def wait_for_first_layout(index: int) -> None:
+            # 第一块的正文在下一个标签完整到达（第 86 个字符，即第 10 个事件）后才确定；
+            # 服务端在发送第 11 个事件之前停下，直到测试放行
+            if index == 11:
+                held.set()
+                release.wait(timeout=5)
+
+        def handle(request: StubRequest) -> StubResponse:
+            del request
+            return StubResponse(chunks=_sse_chunks(_STREAM_TEXT, between=wait_for_first_layout))
+
+        config = DeepSeekOCRVendorConfig(base_url="", api_key="key", model="deepseek-ocr")
+        with StubVendorServer(handle) as server:
+            config.base_url = server.base_url
+            with DeepSeekOCRVendorAdapter(config) as adapter:
+                layouts = adapter.stream_page_layouts(
+                    prompt="prompt",
+                    image=Image.new("RGB", (1000, 500), "white"),
+                    output_path=None,  # type: ignore[arg-type]
+                    size="base",
+                    context=None,
+                    device_number=None,
+                )
+                first = next(layouts)
+                # 第一块产出时，第 11 个事件及之后的内容都还没有发送
+                self.assertTrue(held.wait(timeout=5))
+                release.set()
+                rest = list(layouts)
+
+        self.assertEqual(first.text, "\n# Title\n\n")
+        self.assertEqual([layout.text for layout in rest], ["\nhello world"])
+
+
+if __name__ == "__main__":
+    unittest.main()